@@ -0,0 +1,233 @@
+#!/usr/bin/env python3
+"""
+Incremental word-frequency aggregates per (neighborhood, scrape batch)
+
+Each scrape run stamps its rows with one ``scraped_date``, which identifies the
+batch. When a batch lands its descriptions are tokenized once and the word
+counts are stored in data/aggregates/<Neighborhood>/<batch>.json. Because
+counts simply add up, a cloud for any date window or a week-over-week drift
+report comes from summing a few stored files; only new (or changed) batches
+are ever re-tokenized, even after the CSV itself has been overwritten by a
+later scrape.
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import re
+from collections import Counter, defaultdict
+from datetime import date
+
+import pandas as pd
+
+from generate_wordcloud import count_description_words, save_description_wordcloud
+from profiling import NULL_PROFILER, add_profiling_arguments, profiled_run
+
+AGGREGATE_DIR = 'data/aggregates'
+UNKNOWN_BATCH = 'unknown'
+
+
+def batch_key(scraped_date):
+    """Filename-safe batch id for a scraped_date value, e.g. '2025-08-06T22-17-47'"""
+    if not isinstance(scraped_date, str) or not scraped_date.strip():
+        return UNKNOWN_BATCH
+    return re.sub(r'[^0-9A-Za-z]+', '-', scraped_date.strip().replace(' ', 'T')).strip('-')
+
+
+def batch_date(key):
+    """Calendar date of a batch id (None for batches without a date)"""
+    try:
+        return date.fromisoformat(key[:10])
+    except ValueError:
+        return None
+
+
+def aggregate_dir(neighborhood, root=AGGREGATE_DIR):
+    return os.path.join(root, neighborhood.replace(' ', '_'))
+
+
+def descriptions_hash(descriptions):
+    """Fingerprint of a batch's text, to notice batches that were rewritten"""
+    digest = hashlib.sha256()
+    for text in descriptions:
+        digest.update(text.encode('utf-8'))
+        digest.update(b'\0')
+    return digest.hexdigest()
+
+
+def load_aggregate(neighborhood, key, root=AGGREGATE_DIR):
+    """Stored aggregate dict for one batch, or None"""
+    filename = os.path.join(aggregate_dir(neighborhood, root), f'{key}.json')
+    if not os.path.exists(filename):
+        return None
+    with open(filename) as f:
+        return json.load(f)
+
+
+def update_aggregates(neighborhood, df=None, root=AGGREGATE_DIR):
+    """Tokenize and store any batches of a neighborhood that aren't aggregated yet
+
+    ``df`` defaults to the neighborhood's rentals CSV. Returns the list of batch
+    ids that were (re)computed.
+    """
+    if df is None:
+        csv_filename = f'data/{neighborhood.replace(" ", "_")}_rentals.csv'
+        if not os.path.exists(csv_filename):
+            print(f"No data file found for {neighborhood}")
+            return []
+        df = pd.read_csv(csv_filename)
+
+    directory = aggregate_dir(neighborhood, root)
+    os.makedirs(directory, exist_ok=True)
+
+    if 'scraped_date' in df.columns:
+        keys = df['scraped_date'].map(batch_key)
+    else:
+        keys = pd.Series(UNKNOWN_BATCH, index=df.index)
+
+    updated = []
+    for key, batch in df.groupby(keys, sort=True):
+        descriptions = batch['description'].dropna().astype(str)
+        rows_hash = descriptions_hash(descriptions)
+        stored = load_aggregate(neighborhood, key, root)
+        if stored is not None and stored['rows_sha256'] == rows_hash:
+            continue
+
+        aggregate = {
+            'neighborhood': neighborhood,
+            'batch': key,
+            'listings': len(batch),
+            'rows_sha256': rows_hash,
+            'words': dict(count_description_words(descriptions)),
+        }
+        filename = os.path.join(directory, f'{key}.json')
+        with open(filename + '.tmp', 'w') as f:
+            json.dump(aggregate, f, sort_keys=True)
+        os.replace(filename + '.tmp', filename)
+        updated.append(key)
+        print(f"Aggregated batch {key} for {neighborhood} ({len(batch)} listings)")
+
+    return updated
+
+
+def list_batches(neighborhood, root=AGGREGATE_DIR):
+    """Stored batch ids for a neighborhood, oldest first"""
+    directory = aggregate_dir(neighborhood, root)
+    if not os.path.isdir(directory):
+        return []
+    return sorted(name[:-len('.json')] for name in os.listdir(directory)
+                  if name.endswith('.json'))
+
+
+def window_frequencies(neighborhood, start=None, end=None, root=AGGREGATE_DIR):
+    """Summed word counts and listing count for batches within [start, end]
+
+    ``start``/``end`` are ``datetime.date`` objects or ISO date strings; either
+    may be None for an open-ended window. Undated batches are only included
+    when no window is given.
+    """
+    if isinstance(start, str):
+        start = date.fromisoformat(start)
+    if isinstance(end, str):
+        end = date.fromisoformat(end)
+
+    word_freq = Counter()
+    listings = 0
+    for key in list_batches(neighborhood, root):
+        day = batch_date(key)
+        if day is None and (start or end):
+            continue
+        if day is not None and ((start and day < start) or (end and day > end)):
+            continue
+        aggregate = load_aggregate(neighborhood, key, root)
+        word_freq.update(aggregate['words'])
+        listings += aggregate['listings']
+    return word_freq, listings
+
+
+def weekly_frequencies(neighborhood, root=AGGREGATE_DIR):
+    """``{(iso_year, iso_week): (Counter, listings)}`` from the stored batches"""
+    weeks = defaultdict(lambda: [Counter(), 0])
+    for key in list_batches(neighborhood, root):
+        day = batch_date(key)
+        if day is None:
+            continue
+        aggregate = load_aggregate(neighborhood, key, root)
+        week = weeks[day.isocalendar()[:2]]
+        week[0].update(aggregate['words'])
+        week[1] += aggregate['listings']
+    return {week: tuple(value) for week, value in sorted(weeks.items())}
+
+
+def word_drift_report(neighborhood, top_n=10, min_count=3, root=AGGREGATE_DIR):
+    """Print the words rising and falling most between consecutive weeks
+
+    Changes are measured in occurrences per 1,000 words so weeks with more
+    listings don't dominate. Returns ``[(week, previous_week, risers, fallers)]``.
+    """
+    weeks = weekly_frequencies(neighborhood, root)
+    if len(weeks) < 2:
+        print(f"Need at least two weeks of batches for {neighborhood}, have {len(weeks)}")
+        return []
+
+    report = []
+    items = list(weeks.items())
+    for (previous_week, (previous, _)), (week, (current, listings)) in zip(items, items[1:]):
+        previous_total = sum(previous.values()) or 1
+        current_total = sum(current.values()) or 1
+        changes = {}
+        for word in set(previous) | set(current):
+            if previous[word] + current[word] < min_count:
+                continue
+            changes[word] = (1000 * current[word] / current_total
+                             - 1000 * previous[word] / previous_total)
+        ranked = sorted(changes.items(), key=lambda item: item[1])
+        risers = [item for item in reversed(ranked[-top_n:]) if item[1] > 0]
+        fallers = [item for item in ranked[:top_n] if item[1] < 0]
+        report.append((week, previous_week, risers, fallers))
+
+        print(f"\n{neighborhood} week {week[0]}-W{week[1]:02d} vs "
+              f"{previous_week[0]}-W{previous_week[1]:02d} ({listings} listings)")
+        print("  Rising:  " + ', '.join(f"{w} (+{c:.1f})" for w, c in risers))
+        print("  Falling: " + ', '.join(f"{w} ({c:.1f})" for w, c in fallers))
+    return report
+
+
+def generate_window_wordcloud(neighborhood, start=None, end=None, root=AGGREGATE_DIR,
+                              profiler=NULL_PROFILER, **render_kwargs):
+    """Word cloud for a date window built only from stored aggregates"""
+    with profiler.stage('load'):
+        word_freq, listings = window_frequencies(neighborhood, start, end, root)
+    label = f"{start or 'start'}_to_{end or 'latest'}"
+    filename = f'data/{neighborhood.replace(" ", "_")}_{label}_wordcloud.png'
+    render_kwargs.setdefault('render', 'direct')
+    return save_description_wordcloud(word_freq, neighborhood, listings,
+                                      filename=filename, profiler=profiler, **render_kwargs)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Maintain per-batch word aggregates')
+    parser.add_argument('neighborhood')
+    parser.add_argument('--start', help='window start date (YYYY-MM-DD)')
+    parser.add_argument('--end', help='window end date (YYYY-MM-DD)')
+    parser.add_argument('--cloud', action='store_true', help='render a cloud for the window')
+    parser.add_argument('--drift', action='store_true', help='print a week-over-week drift report')
+    add_profiling_arguments(parser)
+    args = parser.parse_args()
+
+    with profiled_run(args, f'aggregates_{args.neighborhood.replace(" ", "_")}') as profiler:
+        with profiler.stage('aggregate'):
+            update_aggregates(args.neighborhood)
+        batches = list_batches(args.neighborhood)
+        print(f"{len(batches)} stored batches for {args.neighborhood}")
+
+        if args.cloud:
+            generate_window_wordcloud(args.neighborhood, args.start, args.end, profiler=profiler)
+        if args.drift:
+            with profiler.stage('drift'):
+                word_drift_report(args.neighborhood)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Latency of filtered-subset word frequencies from the listing index
+
+Builds a listing index over a synthetic corpus (benchmarks/synthetic.py) and
+times random neighborhood/price/beds queries answered from the memory-mapped
+arrays, next to the original approach of filtering the DataFrame and
+re-tokenizing the matching descriptions.
+
+Usage:
+    python benchmarks/bench_index.py --rows 100000 --queries 200
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, os.path.dirname(__file__))
+from generate_wordcloud import count_description_words
+from listing_index import ListingIndex, build_index, listing_attributes
+from synthetic import NEIGHBORHOODS, write_synthetic_csv
+
+
+def random_filters(rng):
+    """One random query: a neighborhood and/or a price cap and/or a bedroom minimum"""
+    filters = {}
+    if rng.rand() < 0.8:
+        filters['neighborhood'] = NEIGHBORHOODS[rng.randint(len(NEIGHBORHOODS))]
+    if rng.rand() < 0.7:
+        filters['max_price'] = float(rng.choice([1500, 2000, 2500, 3000, 4000]))
+    if rng.rand() < 0.4:
+        filters['min_beds'] = float(rng.randint(0, 4))
+    return filters
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark listing index queries')
+    parser.add_argument('--rows', type=int, default=100000)
+    parser.add_argument('--queries', type=int, default=200)
+    parser.add_argument('--baseline', type=int, default=3,
+                        help='queries to time with the filter-and-retokenize approach')
+    args = parser.parse_args()
+
+    rng = np.random.RandomState(0)
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_filename = os.path.join(tmp, 'synthetic.csv')
+        print(f"Generating {args.rows:,} synthetic listings...")
+        write_synthetic_csv(csv_filename, args.rows)
+        df = pd.read_csv(csv_filename)
+
+        build_index(df, directory=os.path.join(tmp, 'index'))
+        index = ListingIndex(os.path.join(tmp, 'index'))
+
+        timings, matched = [], []
+        for _ in range(args.queries):
+            filters = random_filters(rng)
+            start = time.perf_counter()
+            rows = index.select(filters.pop('neighborhood', None), **filters)
+            index.frequencies(rows, top_n=200)
+            timings.append(time.perf_counter() - start)
+            matched.append(index.listings if rows is None else len(rows))
+
+        attributes = listing_attributes(df)
+        baseline = []
+        for _ in range(args.baseline):
+            filters = random_filters(rng)
+            start = time.perf_counter()
+            mask = pd.Series(True, index=df.index)
+            if 'neighborhood' in filters:
+                mask &= df['neighborhood'] == filters['neighborhood']
+            if 'max_price' in filters:
+                mask &= attributes['price'] <= filters['max_price']
+            if 'min_beds' in filters:
+                mask &= attributes['beds'] >= filters['min_beds']
+            count_description_words(df.loc[mask, 'description'].dropna().astype(str))
+            baseline.append(time.perf_counter() - start)
+
+    timings = np.array(timings) * 1000
+    print(f"\nIndex queries ({args.queries}, median {int(np.median(matched)):,} listings matched):")
+    print(f"  p50 {np.percentile(timings, 50):.1f} ms   p99 {np.percentile(timings, 99):.1f} ms   "
+          f"max {timings.max():.1f} ms")
+    if baseline:
+        print(f"Filter + re-tokenize ({len(baseline)} queries): "
+              f"median {np.median(baseline) * 1000:,.0f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Peak memory of in-memory vs streaming description counting
+
+Writes synthetic corpora of increasing size and measures the tracemalloc peak
+of counting their description words (1) the original way, loading the CSV and
+joining every description into one string, and (2) with count_words_streaming.
+The streaming peak should stay roughly flat as the corpus grows.
+
+Usage:
+    python benchmarks/bench_memory.py --sizes 1000 10000 100000 --chunksize 5000
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, os.path.dirname(__file__))
+from generate_wordcloud import count_description_words, count_words_streaming
+from synthetic import write_synthetic_csv
+
+
+def in_memory_count(csv_filename):
+    """Original approach: whole DataFrame, one joined string, full token list"""
+    df = pd.read_csv(csv_filename)
+    return count_description_words(df['description'].dropna().astype(str))
+
+
+def measure(func, *args, **kwargs):
+    """Return (peak MiB, seconds) for one call"""
+    tracemalloc.start()
+    start = time.perf_counter()
+    func(*args, **kwargs)
+    seconds = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak / 1024 / 1024, seconds
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Streaming vs in-memory peak memory')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 50000])
+    parser.add_argument('--chunksize', type=int, default=5000)
+    parser.add_argument('--max-in-memory', type=int, default=100000,
+                        help="skip the in-memory path above this many rows")
+    args = parser.parse_args()
+
+    print(f"{'rows':>10}{'in-memory MiB':>16}{'streaming MiB':>16}"
+          f"{'in-memory s':>14}{'streaming s':>14}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in args.sizes:
+            csv_filename = os.path.join(tmp, f'synthetic_{size}.csv')
+            write_synthetic_csv(csv_filename, size)
+
+            if size <= args.max_in_memory:
+                memory_peak, memory_seconds = measure(in_memory_count, csv_filename)
+                memory_cols = f"{memory_peak:>16.1f}"
+                seconds_cols = f"{memory_seconds:>14.2f}"
+            else:
+                memory_cols = f"{'skipped':>16}"
+                seconds_cols = f"{'-':>14}"
+
+            stream_peak, stream_seconds = measure(count_words_streaming, csv_filename,
+                                                  chunksize=args.chunksize)
+            print(f"{size:>10,}{memory_cols}{stream_peak:>16.1f}{seconds_cols}{stream_seconds:>14.2f}")
+            os.remove(csv_filename)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Layout time of the grid placement engine vs WordCloud's own
+
+Lays out the same frequencies with WordCloud.generate_from_frequencies and
+placement.generate_layout for each canvas size and word count, using the
+notebook settings with font sizes scaled to the canvas width. Frequencies are
+Zipf-distributed pseudo-words (benchmarks/synthetic.py) unless a neighborhood
+is given. Reports the best of ``--repeat`` runs, how many words each engine
+placed, and with ``--check`` the number of pixels where two words overlap
+(should be 0 for both).
+
+Usage:
+    python benchmarks/bench_placement.py --canvas 1200x800 2400x1600 3600x2400 --words 150 400
+    python benchmarks/bench_placement.py --neighborhood "Echo Park" --check
+"""
+
+import argparse
+import os
+import sys
+import time
+from collections import Counter
+
+import numpy as np
+import pandas as pd
+from PIL import Image, ImageDraw, ImageFont
+from wordcloud import WordCloud
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, os.path.dirname(__file__))
+from generate_wordcloud import count_description_words
+from layout_cache import NOTEBOOK_SETTINGS
+from placement import generate_layout
+from synthetic import build_vocabulary, zipf_probabilities
+
+
+def synthetic_frequencies(size, total=1000000):
+    """Zipf-distributed counts for ``size`` pseudo-words"""
+    counts = np.maximum(np.round(zipf_probabilities(size) * total), 1).astype(int)
+    return Counter(dict(zip(build_vocabulary(size), counts.tolist())))
+
+
+def canvas_settings(width, height, max_words):
+    """Notebook settings on a ``width`` x ``height`` canvas, font sizes scaled to match"""
+    scale = width / NOTEBOOK_SETTINGS['width']
+    return dict(NOTEBOOK_SETTINGS, width=width, height=height, max_words=max_words,
+                max_font_size=round(NOTEBOOK_SETTINGS['max_font_size'] * scale),
+                min_font_size=round(NOTEBOOK_SETTINGS['min_font_size'] * scale))
+
+
+def overlap_pixels(wordcloud):
+    """Pixels inked by more than one word of the layout"""
+    counts = np.zeros((wordcloud.height, wordcloud.width), dtype=np.uint16)
+    for (word, _), font_size, (x, y), orientation, _ in wordcloud.layout_:
+        image = Image.new('L', (wordcloud.width, wordcloud.height))
+        font = ImageFont.TransposedFont(ImageFont.truetype(wordcloud.font_path, font_size),
+                                        orientation=orientation)
+        ImageDraw.Draw(image).text((y, x), word, fill=255, font=font)
+        counts += np.asarray(image) > 0
+    return int((counts > 1).sum())
+
+
+def time_layout(engine, frequencies, settings, repeat, seed):
+    """Best time of ``repeat`` layouts and the last WordCloud"""
+    best = float('inf')
+    for _ in range(repeat):
+        wordcloud = WordCloud(random_state=seed, **settings)
+        start = time.perf_counter()
+        if engine == 'grid':
+            generate_layout(wordcloud, frequencies)
+        else:
+            wordcloud.generate_from_frequencies(frequencies)
+        best = min(best, time.perf_counter() - start)
+    return best, wordcloud
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark word placement engines')
+    parser.add_argument('--canvas', nargs='+', default=['1200x800', '2400x1600', '3600x2400'],
+                        help='canvas sizes as WIDTHxHEIGHT')
+    parser.add_argument('--words', nargs='+', type=int, default=[150, 400])
+    parser.add_argument('--neighborhood', help='use word counts from data/<neighborhood>_rentals.csv')
+    parser.add_argument('--repeat', type=int, default=1)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--check', action='store_true', help='count overlapping pixels')
+    args = parser.parse_args()
+
+    if args.neighborhood:
+        df = pd.read_csv(f'data/{args.neighborhood.replace(" ", "_")}_rentals.csv')
+        frequencies = count_description_words(df['description'].dropna().astype(str))
+        print(f"{len(frequencies)} distinct words from {args.neighborhood}")
+    else:
+        frequencies = synthetic_frequencies(max(args.words) * 2)
+
+    header = f"{'canvas':>10} {'words':>6} {'wordcloud':>10} {'grid':>8} {'speedup':>8} {'placed':>9}"
+    print(header + ('  overlap px' if args.check else ''))
+    for canvas in args.canvas:
+        width, height = (int(value) for value in canvas.split('x'))
+        for max_words in args.words:
+            settings = canvas_settings(width, height, max_words)
+            stock_seconds, stock = time_layout('wordcloud', frequencies, settings, args.repeat, args.seed)
+            grid_seconds, grid = time_layout('grid', frequencies, settings, args.repeat, args.seed)
+            line = (f"{canvas:>10} {max_words:>6} {stock_seconds:>9.2f}s {grid_seconds:>7.2f}s "
+                    f"{stock_seconds / grid_seconds:>7.1f}x {len(stock.layout_):>4}/{len(grid.layout_):<4}")
+            if args.check:
+                line += f"  {overlap_pixels(stock)}/{overlap_pixels(grid)}"
+            print(line, flush=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Compare the matplotlib and direct (Pillow) word cloud rendering paths
+
+Usage:
+    python benchmarks/bench_render.py [neighborhood] [--repeat N] [--width PX]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import matplotlib
+matplotlib.use('Agg')
+import matplotlib.pyplot as plt
+import pandas as pd
+from wordcloud import WordCloud
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from generate_wordcloud import count_description_words, save_wordcloud_direct
+
+
+def render_matplotlib(wordcloud, filename, title):
+    """Original path: imshow + savefig at 300 dpi"""
+    plt.figure(figsize=(12, 8))
+    plt.imshow(wordcloud, interpolation='bilinear')
+    plt.axis('off')
+    plt.title(title, fontsize=16, fontweight='bold')
+    plt.tight_layout()
+    plt.savefig(filename, dpi=300, bbox_inches='tight')
+    plt.close()
+
+
+def time_call(func, repeat):
+    """Return the best wall-clock time of ``repeat`` calls"""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('neighborhood', nargs='?', default='Echo Park')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--width', type=int, default=2400,
+                        help='target pixel width for the direct path')
+    args = parser.parse_args()
+
+    csv_filename = f'data/{args.neighborhood.replace(" ", "_")}_rentals.csv'
+    df = pd.read_csv(csv_filename)
+
+    # Build word frequencies once with the real pipeline, outside the timings
+    word_freq = count_description_words(df['description'].dropna().astype(str))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        wordcloud = WordCloud(width=800, height=400, background_color='white',
+                              max_words=100, contour_width=3,
+                              contour_color='steelblue', colormap='viridis',
+                              random_state=42)
+        wordcloud.generate_from_frequencies(word_freq)
+        title = f'Most Common Words in {args.neighborhood} Rental Descriptions\n(Total: {len(df)} listings)'
+
+        results = []
+        mpl_file = os.path.join(tmp, 'matplotlib.png')
+        seconds = time_call(lambda: render_matplotlib(wordcloud, mpl_file, title), args.repeat)
+        results.append(('matplotlib (dpi=300)', seconds, os.path.getsize(mpl_file)))
+
+        for level in (1, 6, 9):
+            direct_file = os.path.join(tmp, f'direct_{level}.png')
+            seconds = time_call(
+                lambda: save_wordcloud_direct(wordcloud, direct_file, title,
+                                              target_width=args.width,
+                                              compress_level=level),
+                args.repeat)
+            results.append((f'direct (compress_level={level})', seconds,
+                            os.path.getsize(direct_file)))
+
+    print(f"Render benchmark for {args.neighborhood} "
+          f"(best of {args.repeat}, direct width {args.width}px)")
+    print(f"{'path':<28}{'seconds':>10}{'size (KB)':>12}")
+    for name, seconds, size in results:
+        print(f"{name:<28}{seconds:>10.3f}{size / 1024:>12.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Size and parse time of compact SVG export vs WordCloud.to_svg
+
+For each neighborhood this lays out the notebook-style cloud once and
+serializes it five ways: the notebook's saved matplotlib SVG (if present),
+WordCloud.to_svg(), WordCloud.to_svg(embed_font=True) (which a browser needs
+to render with the right font) and svg_export.to_compact_svg() in its 'paths'
+and 'font' modes. Sizes are
+reported raw, gzipped and (with the brotli module) brotli-compressed.
+
+Parse time is measured with ElementTree, and with ``--browser`` also in
+Chromium through Playwright (DOMParser parse plus first layout).
+
+Usage:
+    python benchmarks/bench_svg.py "Echo Park" Koreatown --browser
+"""
+
+import argparse
+import gzip
+import os
+import sys
+import time
+import xml.etree.ElementTree as ElementTree
+
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from generate_wordcloud import count_description_words
+from layout_cache import NOTEBOOK_SETTINGS, cached_wordcloud
+from svg_export import brotli, to_compact_svg
+
+BROWSER_SCRIPT = """(svg) => {
+    const runs = 20;
+    const start = performance.now();
+    for (let i = 0; i < runs; i++) {
+        const doc = new DOMParser().parseFromString(svg, 'image/svg+xml');
+        const node = document.importNode(doc.documentElement, true);
+        document.body.appendChild(node);
+        node.getBBox();
+        node.remove();
+    }
+    return (performance.now() - start) / runs;
+}"""
+
+
+def variants(neighborhood):
+    """``{label: svg text}`` for one neighborhood"""
+    stem = neighborhood.replace(' ', '_')
+    df = pd.read_csv(f'data/{stem}_rentals.csv')
+    word_freq = count_description_words(df['description'].dropna().astype(str))
+    wordcloud, _ = cached_wordcloud(word_freq, **NOTEBOOK_SETTINGS)
+
+    result = {}
+    notebook_svg = f'data/{stem}_description_wordcloud.svg'
+    if os.path.exists(notebook_svg):
+        with open(notebook_svg) as f:
+            result['notebook (matplotlib)'] = f.read()
+    result['to_svg'] = wordcloud.to_svg()
+    result['to_svg(embed_font)'] = wordcloud.to_svg(embed_font=True)
+    result['compact (paths)'] = to_compact_svg(wordcloud, mode='paths')
+    result['compact (font)'] = to_compact_svg(wordcloud, mode='font')
+    return result
+
+
+def parse_seconds(svg, repeat=20):
+    data = svg.encode('utf-8')
+    start = time.perf_counter()
+    for _ in range(repeat):
+        ElementTree.fromstring(data)
+    return (time.perf_counter() - start) / repeat
+
+
+def browser_milliseconds(svgs):
+    """Chromium parse + layout time per SVG (needs playwright and its browser)"""
+    from playwright.sync_api import sync_playwright
+    with sync_playwright() as playwright:
+        browser = playwright.chromium.launch()
+        page = browser.new_page()
+        page.set_content('<!doctype html><html><body></body></html>')
+        timings = {label: page.evaluate(BROWSER_SCRIPT, svg) for label, svg in svgs.items()}
+        browser.close()
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare SVG export sizes and parse times')
+    parser.add_argument('neighborhoods', nargs='+')
+    parser.add_argument('--browser', action='store_true', help='also time parsing in Chromium')
+    args = parser.parse_args()
+
+    for neighborhood in args.neighborhoods:
+        svgs = variants(neighborhood)
+        browser = browser_milliseconds(svgs) if args.browser else {}
+
+        print(f"\n{neighborhood}")
+        header = f"{'':<24}{'KB':>10}{'gzip KB':>10}{'br KB':>10}{'parse ms':>10}"
+        if browser:
+            header += f"{'browser ms':>12}"
+        print(header)
+        for label, svg in svgs.items():
+            data = svg.encode('utf-8')
+            br = f"{len(brotli.compress(data)) / 1024:.1f}" if brotli is not None else '-'
+            row = (f"{label:<24}{len(data) / 1024:>10.1f}{len(gzip.compress(data, 9)) / 1024:>10.1f}"
+                   f"{br:>10}{parse_seconds(svg) * 1000:>10.2f}")
+            if browser:
+                row += f"{browser[label]:>12.2f}"
+            print(row)
+
+
+if __name__ == '__main__':
+    main()
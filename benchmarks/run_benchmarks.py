@@ -0,0 +1,253 @@
+#!/usr/bin/env python3
+"""
+Stage-by-stage benchmarks of the text-to-cloud pipeline on synthetic corpora
+
+Each size gets a deterministic synthetic CSV (benchmarks/synthetic.py) and the
+following stages are timed separately:
+
+    csv_load, price_parsing, tokenization, stopword_filtering, counting,
+    cloud_layout, image_encoding_direct, image_encoding_matplotlib
+
+Tokenization, filtering and counting run over 10k-row chunks so even the 1M
+row corpus fits in memory; their times are summed across chunks. Up to
+``--max-end-to-end`` rows the public entry points (load_and_analyze_data,
+generate_word_cloud_from_descriptions, create_price_analysis,
+create_neighborhood_comparison) are timed as well.
+
+Results are written to benchmarks/results/<timestamp>.json; ``--compare``
+prints the ratio against the previous (or a given) result file.
+
+Usage:
+    python benchmarks/run_benchmarks.py --sizes 1000 10000 100000 1000000
+    python benchmarks/run_benchmarks.py --sizes 1000 --compare
+"""
+
+import argparse
+import contextlib
+import glob
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter
+from datetime import datetime
+
+import matplotlib
+matplotlib.use('Agg')
+import matplotlib.pyplot as plt
+import pandas as pd
+from nltk.corpus import stopwords
+from nltk.tokenize import word_tokenize
+from wordcloud import WordCloud
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCH_DIR)
+RESULTS_DIR = os.path.join(BENCH_DIR, 'results')
+sys.path.insert(0, REPO_DIR)
+sys.path.insert(0, BENCH_DIR)
+
+import generate_wordcloud
+from generate_wordcloud import (create_neighborhood_comparison, create_price_analysis,
+                                extract_numeric_prices, generate_word_cloud_from_descriptions,
+                                is_content_word, load_and_analyze_data,
+                                save_wordcloud_direct)
+from synthetic import NEIGHBORHOODS, write_synthetic_csv
+
+CHUNK_ROWS = 10000
+
+
+class StageTimer:
+    """Accumulates wall-clock seconds per stage"""
+
+    def __init__(self):
+        self.seconds = Counter()
+
+    @contextlib.contextmanager
+    def __call__(self, stage):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.seconds[stage] += time.perf_counter() - start
+
+
+def run_stages(csv_filename):
+    """Time every pipeline stage once on one CSV"""
+    timer = StageTimer()
+    stop_words = set(stopwords.words('english'))
+
+    with timer('csv_load'):
+        df = pd.read_csv(csv_filename)
+    with timer('price_parsing'):
+        extract_numeric_prices(df['price'].dropna())
+
+    word_freq = Counter()
+    descriptions = df['description'].dropna().astype(str)
+    for start in range(0, len(descriptions), CHUNK_ROWS):
+        chunk = descriptions.iloc[start:start + CHUNK_ROWS]
+        with timer('tokenization'):
+            tokens = word_tokenize(' '.join(chunk).lower())
+        with timer('stopword_filtering'):
+            filtered = [word for word in tokens if is_content_word(word, stop_words)]
+        with timer('counting'):
+            word_freq.update(filtered)
+    del df, descriptions
+
+    with timer('cloud_layout'):
+        wordcloud = WordCloud(width=800, height=400, background_color='white',
+                              max_words=100, contour_width=3, contour_color='steelblue',
+                              colormap='viridis', random_state=42)
+        wordcloud.generate_from_frequencies(word_freq)
+    with timer('image_encoding_direct'):
+        save_wordcloud_direct(wordcloud, io.BytesIO(), 'Benchmark', target_width=2400)
+    with timer('image_encoding_matplotlib'):
+        plt.figure(figsize=(12, 8))
+        plt.imshow(wordcloud, interpolation='bilinear')
+        plt.axis('off')
+        plt.title('Benchmark', fontsize=16, fontweight='bold')
+        plt.tight_layout()
+        plt.savefig(io.BytesIO(), format='png', dpi=300, bbox_inches='tight')
+        plt.close('all')
+
+    return dict(timer.seconds)
+
+
+def run_entry_points(csv_filename, size):
+    """Time the public functions of generate_wordcloud.py end to end"""
+    timer = StageTimer()
+    show = plt.show
+    plt.show = lambda *args, **kwargs: None
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp:
+        os.makedirs(os.path.join(tmp, 'data'))
+        # One file per neighborhood so create_neighborhood_comparison has work to do
+        df = pd.read_csv(csv_filename)
+        for neighborhood, group in df.groupby('neighborhood'):
+            group.to_csv(os.path.join(tmp, 'data', f'{neighborhood.replace(" ", "_")}_rentals.csv'),
+                         index=False)
+        del df
+        neighborhood = NEIGHBORHOODS[0]
+        os.chdir(tmp)
+        try:
+            with contextlib.redirect_stdout(io.StringIO()):
+                with timer('load_and_analyze_data'):
+                    df = load_and_analyze_data(neighborhood)
+                with timer('generate_word_cloud_from_descriptions'):
+                    generate_word_cloud_from_descriptions(df, neighborhood)
+                with timer('create_price_analysis'):
+                    create_price_analysis(df, neighborhood)
+                with timer('create_neighborhood_comparison'):
+                    create_neighborhood_comparison()
+        finally:
+            os.chdir(cwd)
+            plt.show = show
+            plt.close('all')
+    return dict(timer.seconds)
+
+
+def best_of(func, repeat, *args):
+    """Per-key minimum over ``repeat`` runs of a function returning {key: seconds}"""
+    best = {}
+    for _ in range(repeat):
+        for key, seconds in func(*args).items():
+            best[key] = min(seconds, best.get(key, float('inf')))
+    return best
+
+
+def git_revision():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], cwd=REPO_DIR,
+                                       stderr=subprocess.DEVNULL, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+def print_results(results, previous=None):
+    """Table of seconds per stage and size, with ratios against ``previous``"""
+    sizes = list(results['sizes'])
+    stages = []
+    for timings in results['sizes'].values():
+        stages.extend(stage for stage in timings if stage not in stages)
+
+    header = f"{'stage':<40}" + ''.join(f"{int(size):>14,}" for size in sizes)
+    print(header)
+    print('-' * len(header))
+    for stage in stages:
+        row = f"{stage:<40}"
+        for size in sizes:
+            seconds = results['sizes'][size].get(stage)
+            if seconds is None:
+                row += f"{'-':>14}"
+                continue
+            cell = f"{seconds:.3f}s"
+            old = (previous or {}).get('sizes', {}).get(size, {}).get(stage)
+            if old:
+                cell += f" x{seconds / old:.2f}"
+            row += f"{cell:>14}"
+        print(row)
+
+
+def latest_result(exclude=None):
+    files = sorted(glob.glob(os.path.join(RESULTS_DIR, '*.json')))
+    files = [f for f in files if f != exclude]
+    return files[-1] if files else None
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the text-to-cloud pipeline')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 100000])
+    parser.add_argument('--repeat', type=int, default=1, help='keep the best of N runs')
+    parser.add_argument('--max-end-to-end', type=int, default=10000,
+                        help='only time the entry points up to this many rows')
+    parser.add_argument('--compare', nargs='?', const='latest',
+                        help='compare with a previous result file (default: the latest)')
+    parser.add_argument('--no-save', action='store_true')
+    args = parser.parse_args()
+
+    previous = None
+    if args.compare:
+        filename = latest_result() if args.compare == 'latest' else args.compare
+        if filename:
+            with open(filename) as f:
+                previous = json.load(f)
+            print(f"Comparing with {filename} (x = this run / previous)")
+
+    results = {
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'git_revision': git_revision(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'repeat': args.repeat,
+        'sizes': {},
+    }
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in args.sizes:
+            csv_filename = os.path.join(tmp, f'synthetic_{size}.csv')
+            print(f"Generating {size:,} synthetic listings...")
+            write_synthetic_csv(csv_filename, size)
+
+            print(f"Timing stages for {size:,} rows...")
+            timings = best_of(run_stages, args.repeat, csv_filename)
+            if size <= args.max_end_to_end:
+                timings.update(best_of(run_entry_points, args.repeat, csv_filename, size))
+            results['sizes'][str(size)] = timings
+            os.remove(csv_filename)
+
+    print()
+    print_results(results, previous)
+
+    if not args.no_save:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        filename = os.path.join(RESULTS_DIR, f"{datetime.now():%Y%m%d-%H%M%S}-{results['git_revision']}.json")
+        with open(filename, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"\nResults saved to {filename}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Deterministic synthetic rental listings shaped like data/*_rentals.csv
+
+Word choice follows a Zipf-like distribution over a real-estate flavored
+vocabulary (plus generated filler words, so vocabulary keeps growing slowly
+with corpus size like real text). The same ``seed`` always yields the same rows.
+"""
+
+import argparse
+import os
+
+import numpy as np
+import pandas as pd
+
+COLUMNS = ['address', 'price', 'beds', 'baths', 'sqft', 'url', 'description',
+           'type', 'page_number', 'neighborhood', 'scraped_date']
+
+NEIGHBORHOODS = ['Beverly Hills', 'Boyle Heights', 'Echo Park', 'Koreatown',
+                 'Pacoima', 'Watts']
+
+BUILDING_NAMES = ['Milo on Morton', 'The Angeleno', 'Sunset Lofts', 'Park Vista',
+                  'The Residences', 'Echo Gardens', 'Wilshire Towers', 'Vermont Court']
+STREETS = ['Morton Ave', 'Everett St', 'Sunset Blvd', 'Wilshire Blvd', 'Vermont Ave',
+           'Van Nuys Blvd', 'Central Ave', 'Cesar Chavez Ave']
+
+BASE_WORDS = (
+    'kitchen living updated renovated hardwood floors floor stainless steel appliances '
+    'washer dryer in-unit dishwasher granite countertops quartz cabinets closet closets '
+    'walk-in natural light windows balcony patio yard garage gated secured pool fitness '
+    'center gym rooftop deck views city neighborhood restaurants shopping transit metro '
+    'freeway access quiet tenant credit application month fee required income pet '
+    'friendly dogs cats welcome storage open concept dining area bedrooms bathrooms '
+    'ceiling fans central air conditioning heating recessed lighting tile vinyl plank '
+    'remodeled fresh paint newly installed amenities onsite management maintenance '
+    'coffee shops parks hiking trails stadium lake elegant retreat wellness residences '
+    'the a and of to in with for is on this our your you are at from by it has have '
+    'apartment unit rent lease parking laundry available luxury spacious beautiful'
+).split()
+
+
+def build_vocabulary(size=20000, seed=0):
+    """Base words followed by pseudo-words, in rank order"""
+    rng = np.random.RandomState(seed)
+    letters = np.array(list('abcdefghijklmnopqrstuvwxyz'))
+    filler = set()
+    while len(filler) < size - len(BASE_WORDS):
+        length = rng.randint(4, 11)
+        filler.add(''.join(rng.choice(letters, length)))
+    return np.array(BASE_WORDS + sorted(filler), dtype=object)
+
+
+def zipf_probabilities(size, exponent=1.1):
+    """Normalized Zipf weights for ``size`` ranks"""
+    weights = 1.0 / np.arange(1, size + 1) ** exponent
+    return weights / weights.sum()
+
+
+def generate_listings(n_rows, seed=0, start=0, vocabulary=None, neighborhood=None):
+    """Return ``n_rows`` synthetic listings as a DataFrame
+
+    ``start`` offsets the row numbering (and random stream) so large corpora
+    can be produced chunk by chunk with identical results.
+    """
+    if vocabulary is None:
+        vocabulary = build_vocabulary(seed=seed)
+    probabilities = zipf_probabilities(len(vocabulary))
+    rng = np.random.RandomState((seed * 1000003 + start) % (2 ** 32))
+
+    lengths = rng.randint(40, 160, size=n_rows)
+    words = vocabulary[rng.choice(len(vocabulary), size=lengths.sum(), p=probabilities)]
+    boundaries = np.concatenate([[0], np.cumsum(lengths)])
+    descriptions = []
+    for i in range(n_rows):
+        sentence = words[boundaries[i]:boundaries[i + 1]]
+        text = ' '.join(sentence)
+        descriptions.append(text[0].upper() + text[1:] + '.')
+
+    rents = (rng.lognormal(mean=7.9, sigma=0.4, size=n_rows) // 5 * 5).astype(int)
+    beds = rng.randint(0, 5, size=n_rows)
+    price_style = rng.randint(0, 3, size=n_rows)
+    prices = []
+    for rent, bed, style in zip(rents, beds, price_style):
+        if style == 0:
+            label = 'Studio' if bed == 0 else f"{bed} bd{'s' if bed > 1 else ''}"
+            prices.append(f'${rent:,}+ {label}')
+        elif style == 1:
+            prices.append(f'${rent:,}/mo')
+        else:
+            prices.append(f'${rent:,}')
+
+    row_ids = np.arange(start, start + n_rows)
+    buildings = rng.randint(0, len(BUILDING_NAMES), size=n_rows)
+    streets = rng.randint(0, len(STREETS), size=n_rows)
+    numbers = rng.randint(100, 9999, size=n_rows)
+    if neighborhood is None:
+        hoods = np.array(NEIGHBORHOODS, dtype=object)[rng.randint(0, len(NEIGHBORHOODS), size=n_rows)]
+    else:
+        hoods = np.full(n_rows, neighborhood, dtype=object)
+    days = rng.randint(0, 28, size=n_rows)
+
+    return pd.DataFrame({
+        'address': [f'{BUILDING_NAMES[b]} | {n} {STREETS[s]}, Los Angeles, CA'
+                    for b, s, n in zip(buildings, streets, numbers)],
+        'price': prices,
+        'beds': np.where(price_style == 2, beds.astype(object), 'N/A'),
+        'baths': np.where(price_style == 2, np.maximum(1, beds - 1).astype(object), 'N/A'),
+        'sqft': 'N/A',
+        'url': [f'https://www.zillow.com/apartments/los-angeles-ca/synthetic-{i}/' for i in row_ids],
+        'description': descriptions,
+        'type': 'Rental',
+        'page_number': row_ids // 40 + 1,
+        'neighborhood': hoods,
+        'scraped_date': [f'2025-08-{d + 1:02d} 12:00:00' for d in days],
+    }, columns=COLUMNS)
+
+
+def write_synthetic_csv(filename, n_rows, seed=0, chunksize=50000, neighborhood=None):
+    """Write a synthetic CSV in chunks so huge corpora don't need to fit in memory"""
+    vocabulary = build_vocabulary(seed=seed)
+    os.makedirs(os.path.dirname(filename) or '.', exist_ok=True)
+    for start in range(0, n_rows, chunksize):
+        chunk = generate_listings(min(chunksize, n_rows - start), seed=seed, start=start,
+                                  vocabulary=vocabulary, neighborhood=neighborhood)
+        chunk.to_csv(filename, mode='w' if start == 0 else 'a', header=start == 0, index=False)
+    return filename
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Write a synthetic rentals CSV')
+    parser.add_argument('filename')
+    parser.add_argument('rows', type=int)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+    write_synthetic_csv(args.filename, args.rows, seed=args.seed)
+    print(f"Wrote {args.rows:,} synthetic listings to {args.filename}")
+
+
+if __name__ == '__main__':
+    main()
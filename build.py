@@ -0,0 +1,287 @@
+#!/usr/bin/env python3
+"""
+Incremental, dependency-tracked build of every derived artifact
+
+Each target (a neighborhood's word cloud PNG, compact SVG or price chart, the
+cross-neighborhood comparison chart, and the web thumbnails) declares:
+
+- its input files (rentals CSVs, or other targets' outputs),
+- the settings that shape it (stopword set, color scheme, render settings),
+- the source files of the code that builds it,
+- the files it writes.
+
+data/.build_manifest.json stores, per target, the content hashes of all of
+those from its last successful build. A target is rebuilt only when an input,
+setting or source file hash changed, an output is missing or was modified, or
+a target it depends on is being rebuilt. Independent targets run in parallel
+worker processes; ``--dry-run`` lists what would be rebuilt and why.
+
+Usage:
+    python build.py --dry-run
+    python build.py --jobs 4
+    python build.py --scheme greens --only Echo_Park
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+# Workers render charts without a display
+os.environ.setdefault('MPLBACKEND', 'Agg')
+
+from nltk.corpus import stopwords
+
+from build_web_assets import file_sha256
+from generate_wordcloud import find_neighborhoods, real_estate_stopwords
+from profiling import add_profiling_arguments, profiled_run
+
+MANIFEST_FILENAME = 'data/.build_manifest.json'
+
+DEFAULT_SETTINGS = {
+    'render': 'direct',
+    'target_width': 2400,
+    'scheme': 'viridis',
+    'svg_mode': 'paths',
+    'layout_engine': 'wordcloud',
+}
+
+
+def value_sha256(value):
+    """Hash a JSON-serializable value"""
+    return hashlib.sha256(json.dumps(value, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+def stopword_fingerprint():
+    return value_sha256(sorted(set(stopwords.words('english')) | real_estate_stopwords))
+
+
+# Build steps: module-level so worker processes can run them
+
+def build_wordcloud(neighborhood, render, target_width, layout_engine):
+    import pandas as pd
+    from generate_wordcloud import generate_word_cloud_from_descriptions
+    df = pd.read_csv(f'data/{neighborhood}_rentals.csv')
+    generate_word_cloud_from_descriptions(df, neighborhood.replace('_', ' '),
+                                          render=render, target_width=target_width,
+                                          layout_engine=layout_engine)
+
+
+def build_svg(neighborhood, scheme, svg_mode, layout_engine):
+    from svg_export import export_neighborhood_svg
+    export_neighborhood_svg(neighborhood.replace('_', ' '), scheme=scheme, mode=svg_mode,
+                            layout_engine=layout_engine)
+
+
+def build_price_chart(neighborhood):
+    import pandas as pd
+    from generate_wordcloud import create_price_analysis
+    df = pd.read_csv(f'data/{neighborhood}_rentals.csv')
+    create_price_analysis(df, neighborhood.replace('_', ' '))
+
+
+def build_comparison():
+    from generate_wordcloud import create_neighborhood_comparison
+    create_neighborhood_comparison()
+
+
+def build_web_assets():
+    from build_web_assets import build_assets, patch_index
+    patch_index(build_assets())
+
+
+class Target:
+    """One derived artifact (or group of artifacts) and what it depends on"""
+
+    def __init__(self, name, step, args=(), inputs=(), settings=None, code=(), outputs=(),
+                 depends=()):
+        self.name = name
+        self.step = step
+        self.args = tuple(args)
+        self.inputs = list(inputs)
+        self.settings = settings or {}
+        self.code = list(code)
+        self.outputs = list(outputs)
+        self.depends = list(depends)
+
+    def signature(self):
+        """Current hashes of everything that determines the outputs"""
+        signature = {f'input:{path}': file_sha256(path) for path in self.inputs}
+        signature.update({f'code:{path}': file_sha256(path) for path in self.code})
+        signature.update({f'setting:{key}': value_sha256(value) for key, value in self.settings.items()})
+        return signature
+
+
+def build_targets(settings, data_dir='data'):
+    """The full build graph for every neighborhood with a rentals CSV"""
+    base_code = ['generate_wordcloud.py', 'profiling.py', 'placement.py']
+    stopwords_hash = stopword_fingerprint()
+    targets = []
+    clouds = []
+    for neighborhood in find_neighborhoods(data_dir):
+        csv_filename = os.path.join(data_dir, f'{neighborhood}_rentals.csv')
+        cloud = Target(
+            f'{neighborhood}:wordcloud', build_wordcloud,
+            args=(neighborhood, settings['render'], settings['target_width'],
+                  settings['layout_engine']),
+            inputs=[csv_filename], code=base_code,
+            settings=dict(stopwords=stopwords_hash,
+                          **{key: settings[key] for key in ('render', 'target_width',
+                                                            'layout_engine')}),
+            outputs=[os.path.join(data_dir, f'{neighborhood}_description_wordcloud.png')])
+        clouds.append(cloud)
+        targets += [
+            cloud,
+            Target(f'{neighborhood}:svg', build_svg,
+                   args=(neighborhood, settings['scheme'], settings['svg_mode'],
+                         settings['layout_engine']),
+                   inputs=[csv_filename], code=base_code + ['layout_cache.py', 'svg_export.py'],
+                   settings=dict(stopwords=stopwords_hash,
+                                 **{key: settings[key] for key in ('scheme', 'svg_mode',
+                                                                   'layout_engine')}),
+                   outputs=[os.path.join(data_dir, f'{neighborhood}_description_wordcloud_compact.svg')]),
+            Target(f'{neighborhood}:price_chart', build_price_chart, args=(neighborhood,),
+                   inputs=[csv_filename], code=base_code,
+                   outputs=[os.path.join(data_dir, f'{neighborhood}_price_analysis.png')]),
+        ]
+
+    csv_files = [os.path.join(data_dir, f'{n}_rentals.csv') for n in find_neighborhoods(data_dir)]
+    targets.append(Target('comparison', build_comparison, inputs=csv_files, code=base_code,
+                          outputs=[os.path.join(data_dir, 'neighborhood_comparison.png')]))
+    targets.append(Target('web_assets', build_web_assets,
+                          inputs=[path for cloud in clouds for path in cloud.outputs],
+                          code=['build_web_assets.py'],
+                          outputs=[os.path.join(data_dir, 'web', 'manifest.json'), 'index.html'],
+                          depends=[cloud.name for cloud in clouds]))
+    return targets
+
+
+def load_manifest(filename=MANIFEST_FILENAME):
+    if not os.path.exists(filename):
+        return {'targets': {}}
+    with open(filename) as f:
+        return json.load(f)
+
+
+def save_manifest(manifest, filename=MANIFEST_FILENAME):
+    os.makedirs(os.path.dirname(filename), exist_ok=True)
+    with open(filename + '.tmp', 'w') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(filename + '.tmp', filename)
+
+
+def stale_reasons(target, manifest, rebuilding):
+    """Why ``target`` needs rebuilding (empty list if it is up to date)"""
+    record = manifest['targets'].get(target.name)
+    if record is None:
+        return ['never built']
+
+    reasons = []
+    signature = target.signature()
+    for key, value in signature.items():
+        if record['signature'].get(key) != value:
+            reasons.append(f'{key} changed' if value is not None else f'{key} missing')
+    for path in target.outputs:
+        current = file_sha256(path)
+        if current is None:
+            reasons.append(f'{path} missing')
+        elif current != record['outputs'].get(path):
+            reasons.append(f'{path} modified')
+    reasons += [f'{name} rebuilt' for name in target.depends if name in rebuilding]
+    return reasons
+
+
+def plan(targets, manifest, force=False):
+    """``{target name: reasons}`` for every stale target, in dependency order"""
+    stale = {}
+    for target in targets:
+        reasons = ['forced'] if force else stale_reasons(target, manifest, stale)
+        if reasons:
+            stale[target.name] = reasons
+    return stale
+
+
+def run_build(targets, stale, manifest, jobs=None):
+    """Build the stale targets, each as soon as its dependencies are done"""
+    by_name = {target.name: target for target in targets}
+    pending = [by_name[name] for name in stale]
+    done, failed = set(), set()
+
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        running = {}
+        while pending or running:
+            for target in list(pending):
+                waiting = [name for name in target.depends if name in stale and name not in done]
+                if any(name in failed for name in waiting):
+                    print(f"  ! {target.name} skipped (dependency failed)")
+                    failed.add(target.name)
+                    pending.remove(target)
+                elif not waiting:
+                    running[executor.submit(target.step, *target.args)] = (target, time.perf_counter())
+                    pending.remove(target)
+            if not running:
+                break
+
+            future = next(as_completed(running))
+            target, start = running.pop(future)
+            try:
+                future.result()
+            except Exception as error:
+                print(f"  ! {target.name} failed: {error}")
+                failed.add(target.name)
+                continue
+            manifest['targets'][target.name] = {
+                'signature': target.signature(),
+                'outputs': {path: file_sha256(path) for path in target.outputs},
+                'built': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            }
+            save_manifest(manifest)
+            done.add(target.name)
+            print(f"  + {target.name} ({time.perf_counter() - start:.1f}s)")
+    return done, failed
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Rebuild stale word clouds, charts and web assets')
+    parser.add_argument('--dry-run', action='store_true', help='list what would be rebuilt and why')
+    parser.add_argument('--force', action='store_true', help='rebuild everything')
+    parser.add_argument('--jobs', type=int, default=None, help='worker processes (default: CPUs)')
+    parser.add_argument('--only', nargs='+', help='only targets whose name starts with these')
+    for key, value in DEFAULT_SETTINGS.items():
+        parser.add_argument(f"--{key.replace('_', '-')}", type=type(value), default=value)
+    add_profiling_arguments(parser)
+    args = parser.parse_args()
+    with profiled_run(args, 'build') as profiler:
+        _build(args, profiler)
+
+
+def _build(args, profiler):
+    """Plan and run the build described by the parsed command line"""
+    settings = {key: getattr(args, key) for key in DEFAULT_SETTINGS}
+    targets = build_targets(settings)
+    if args.only:
+        targets = [target for target in targets
+                   if any(target.name.startswith(prefix) for prefix in args.only)]
+
+    with profiler.stage('plan'):
+        manifest = load_manifest()
+        stale = plan(targets, manifest, force=args.force)
+
+    print(f"{len(stale)} of {len(targets)} targets out of date")
+    for name, reasons in stale.items():
+        print(f"  {name}: {'; '.join(reasons)}")
+    if args.dry_run or not stale:
+        return
+
+    start = time.perf_counter()
+    # Targets build in worker processes, so this is wall time only
+    with profiler.stage('build'):
+        done, failed = run_build(targets, stale, manifest, jobs=args.jobs)
+    print(f"Built {len(done)} targets in {time.perf_counter() - start:.1f}s"
+          + (f", {len(failed)} failed" if failed else ''))
+
+
+if __name__ == '__main__':
+    main()
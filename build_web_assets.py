@@ -0,0 +1,264 @@
+#!/usr/bin/env python3
+"""
+Build web-optimized word cloud assets for index.html
+
+For every data/*_description_wordcloud.png this writes thumbnail, medium and
+full-size variants as WebP (with a PNG fallback) to data/web/, records their
+sizes and hashes in data/web/manifest.json, and patches index.html so the
+gallery previews lazy-load through srcset and the full image is only fetched
+when a card is opened.
+"""
+
+import argparse
+import glob
+import hashlib
+import json
+import os
+import re
+
+from PIL import Image
+
+SOURCE_PATTERN = 'data/*_description_wordcloud.png'
+OUTPUT_DIR = 'data/web'
+MANIFEST_FILENAME = os.path.join(OUTPUT_DIR, 'manifest.json')
+INDEX_FILENAME = 'index.html'
+
+# Variant name -> maximum width in pixels (None keeps the source width)
+VARIANTS = {
+    'thumb': 480,
+    'medium': 1200,
+    'full': None,
+}
+WEBP_QUALITY = 82
+
+# Preview cards are roughly a third of the viewport on desktop, full width on mobile
+PREVIEW_SIZES = '(max-width: 768px) 100vw, 33vw'
+
+
+def file_sha256(filename):
+    """Hash a file's contents (None if it doesn't exist)"""
+    if not os.path.exists(filename):
+        return None
+    digest = hashlib.sha256()
+    with open(filename, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def asset_stem(source_filename):
+    """Name used for a source image in the manifest, e.g. 'Echo_Park'"""
+    return os.path.basename(source_filename).replace('_description_wordcloud.png', '')
+
+
+def build_variants(source_filename, output_dir=OUTPUT_DIR):
+    """Write every size/format variant of one word cloud and describe them"""
+    stem = asset_stem(source_filename)
+    entry = {
+        'source': source_filename,
+        'source_sha256': file_sha256(source_filename),
+        'variants': {},
+    }
+
+    with Image.open(source_filename) as original:
+        source = original.convert('RGB')
+
+    for name, max_width in VARIANTS.items():
+        if max_width is not None and source.width > max_width:
+            height = round(source.height * max_width / source.width)
+            image = source.resize((max_width, height), Image.LANCZOS)
+        else:
+            image = source
+
+        variant = {'width': image.width, 'height': image.height}
+        for fmt, options in (('webp', {'quality': WEBP_QUALITY, 'method': 6}),
+                             ('png', {'optimize': True})):
+            if fmt == 'png' and image is source:
+                # The source already is the full-size PNG, no need to duplicate it
+                filename = source_filename
+            else:
+                filename = os.path.join(output_dir, f'{stem}-{name}.{fmt}')
+                image.save(filename, format=fmt.upper(), **options)
+            variant[fmt] = {
+                'path': filename.replace(os.sep, '/'),
+                'bytes': os.path.getsize(filename),
+                'sha256': file_sha256(filename),
+            }
+        entry['variants'][name] = variant
+
+    return stem, entry
+
+
+def load_manifest(filename=MANIFEST_FILENAME):
+    """Load an existing manifest, or an empty one"""
+    if not os.path.exists(filename):
+        return {'assets': {}}
+    with open(filename) as f:
+        return json.load(f)
+
+
+def build_assets(force=False):
+    """Build variants for every source image that changed since the last run"""
+    os.makedirs(OUTPUT_DIR, exist_ok=True)
+    manifest = load_manifest()
+    assets = manifest.setdefault('assets', {})
+
+    for source_filename in sorted(glob.glob(SOURCE_PATTERN)):
+        stem = asset_stem(source_filename)
+        previous = assets.get(stem)
+        if (not force and previous is not None
+                and previous['source_sha256'] == file_sha256(source_filename)
+                and all(os.path.exists(v[fmt]['path'])
+                        for v in previous['variants'].values()
+                        for fmt in ('webp', 'png'))):
+            print(f"  = {stem} (unchanged)")
+            continue
+
+        stem, entry = build_variants(source_filename)
+        assets[stem] = entry
+        source_kb = os.path.getsize(source_filename) / 1024
+        thumb_kb = entry['variants']['thumb']['webp']['bytes'] / 1024
+        print(f"  + {stem}: {source_kb:,.0f} KB source -> {thumb_kb:,.0f} KB WebP thumbnail")
+
+    with open(MANIFEST_FILENAME, 'w') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    print(f"Manifest written to {MANIFEST_FILENAME}")
+    return manifest
+
+
+def versioned_url(asset):
+    """URL with a short content hash so browsers can cache it indefinitely"""
+    return f"{asset['path']}?v={asset['sha256'][:10]}"
+
+
+def srcset(entry, fmt, names=('thumb', 'medium')):
+    """srcset attribute value for the given format"""
+    return ', '.join(f"{versioned_url(entry['variants'][name][fmt])} "
+                     f"{entry['variants'][name]['width']}w" for name in names)
+
+
+def preview_markup(stem, entry, indent):
+    """<picture> element for a gallery card preview"""
+    thumb = entry['variants']['thumb']
+    pad = ' ' * indent
+    return (
+        f'{pad}<!-- web-assets:{stem} -->\n'
+        f'{pad}<picture>\n'
+        f'{pad}  <source type="image/webp" srcset="{srcset(entry, "webp")}" sizes="{PREVIEW_SIZES}">\n'
+        f'{pad}  <img src="{versioned_url(thumb["png"])}" srcset="{srcset(entry, "png")}" '
+        f'sizes="{PREVIEW_SIZES}" width="{thumb["width"]}" height="{thumb["height"]}" '
+        f'loading="lazy" decoding="async" alt="{stem.replace("_", " ")} word cloud">\n'
+        f'{pad}</picture>\n'
+        f'{pad}<!-- /web-assets:{stem} -->'
+    )
+
+
+PREVIEW_CSS = """      /* web-assets */
+      .wordcloud-preview picture,
+      .wordcloud-preview img {
+        display: block;
+        width: 100%;
+        height: 100%;
+        object-fit: cover;
+      }
+      /* /web-assets */"""
+
+
+# Full-size images open as WebP, or as the PNG fallback where WebP isn't supported
+WEBP_CHECK_JS = """        // Full-size images are WebP, with the PNG for browsers that can't show it
+        const supportsWebp = document.createElement('canvas').toDataURL('image/webp').startsWith('data:image/webp');
+
+"""
+CARD_URL_JS = ("const imageUrl = (supportsWebp && this.getAttribute('data-full'))\n"
+               "              || this.getAttribute('data-full-png') "
+               "|| `data/${neighborhood}_description_wordcloud.png`;")
+
+
+def hero_css(entry):
+    """Background declarations for the Beverly Hills hero"""
+    medium = entry['variants']['medium']
+    return (
+        f"background-image: url('{versioned_url(medium['png'])}');\n"
+        f"        background-image: image-set(url('{versioned_url(medium['webp'])}') type('image/webp'), "
+        f"url('{versioned_url(medium['png'])}') type('image/png'));"
+    )
+
+
+def patch_index(manifest, index_filename=INDEX_FILENAME):
+    """Point index.html at the generated variants (idempotent)"""
+    with open(index_filename) as f:
+        html = f.read()
+    assets = manifest['assets']
+
+    # Gallery cards: replace the inline full-size background with a lazy <picture>
+    card_pattern = re.compile(
+        r'<div class="wordcloud-card" data-neighborhood="(?P<stem>[^"]+)"[^>]*>\n'
+        r'(?P<indent> *)<div class="wordcloud-preview"[^>]*>\n'
+        r'(?:(?P=indent)  <!-- web-assets:(?P=stem) -->.*?<!-- /web-assets:(?P=stem) -->\n)?',
+        re.DOTALL)
+
+    def replace_card(match):
+        stem = match.group('stem')
+        if stem not in assets:
+            return match.group(0)
+        entry = assets[stem]
+        indent = match.group('indent')
+        full = entry['variants']['full']
+        return (f'<div class="wordcloud-card" data-neighborhood="{stem}" '
+                f'data-full="{versioned_url(full["webp"])}" data-full-png="{versioned_url(full["png"])}">\n'
+                f'{indent}<div class="wordcloud-preview">\n'
+                f'{preview_markup(stem, entry, len(indent) + 2)}\n')
+
+    html = card_pattern.sub(replace_card, html)
+
+    if '/* web-assets */' not in html:
+        html = html.replace('      .magnifying-glass {', PREVIEW_CSS + '\n\n      .magnifying-glass {', 1)
+
+    if 'Beverly_Hills' in assets:
+        entry = assets['Beverly_Hills']
+        html = re.sub(r"background-image: url\('data/(?:web/)?Beverly_Hills[^']*'\);\n"
+                      r"(?:        background-image: image-set\([^\n]*\);\n)?",
+                      lambda m: hero_css(entry) + '\n', html, count=1)
+        full = entry['variants']['full']
+        html = re.sub(r"window\.open\((?:supportsWebp \? )?'data/[^']*Beverly_Hills[^']*'"
+                      r"(?: : '[^']*')?, '_blank'\)",
+                      f"window.open(supportsWebp ? '{versioned_url(full['webp'])}' "
+                      f": '{versioned_url(full['png'])}', '_blank')", html, count=1)
+
+    if 'const supportsWebp' not in html:
+        html = html.replace('        // Click functionality for Beverly Hills background\n',
+                            WEBP_CHECK_JS + '        // Click functionality for Beverly Hills background\n', 1)
+    html = re.sub(r"const imageUrl = (?:this\.getAttribute\('data-full'\) \|\| )?"
+                  r"`data/\$\{neighborhood\}_description_wordcloud\.png`;",
+                  lambda m: CARD_URL_JS, html, count=1)
+
+    with open(index_filename, 'w') as f:
+        f.write(html)
+    print(f"Patched {index_filename}")
+
+
+def print_summary(manifest):
+    """Compare page weight before and after"""
+    before = after = 0
+    for entry in manifest['assets'].values():
+        before += os.path.getsize(entry['source'])
+        after += entry['variants']['thumb']['webp']['bytes']
+    print(f"Initial image weight: {before / 1024 / 1024:.1f} MB of full PNGs -> "
+          f"{after / 1024:.0f} KB of WebP thumbnails")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Build responsive word cloud assets')
+    parser.add_argument('--force', action='store_true', help='rebuild unchanged images')
+    parser.add_argument('--no-patch', action='store_true', help="don't modify index.html")
+    args = parser.parse_args()
+
+    print("Building web assets...")
+    manifest = build_assets(force=args.force)
+    if not args.no_patch:
+        patch_index(manifest)
+    print_summary(manifest)
+
+
+if __name__ == '__main__':
+    main()
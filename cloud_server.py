@@ -0,0 +1,480 @@
+#!/usr/bin/env python3
+"""
+Local HTTP service that renders word clouds and top-word lists on demand
+
+Serves index.html at /, the built web assets under /data/web/ and the
+full-size data/*_description_wordcloud.png fallbacks, plus:
+
+    /api/cloud.png   /api/cloud.webp   rendered cloud
+    /api/words.json                    top words as JSON
+    /api/stats                         cache hit rates and p50/p99 latency
+
+Query parameters: ``neighborhood`` (required), ``scheme`` (a color_schemes
+name or one of SCHEMES), ``width``/``height``/``max_words`` (from WIDTHS,
+HEIGHTS and MAX_WORDS_CHOICES), ``title`` (1 adds the title band), and the
+filters ``exclude`` (up to MAX_EXCLUDE comma-separated words), ``min_count``,
+``start``/``end`` (date window from the stored scrape-batch aggregates) and
+``n`` (words.json only). Sizes come from fixed lists so clients can't create
+an unbounded number of layouts; the on-disk layout cache is also pruned to
+layout_cache.MAX_CACHE_BYTES.
+
+Word counts sit in an LRU cache keyed by neighborhood, window and the data
+files' modification times, encoded images in an LRU cache bounded by total
+bytes, and layouts in the on-disk layout cache, so a new color scheme only
+recolors. Concurrent misses for the same response wait for one render;
+misses for different responses render in parallel. Responses carry an ETag
+and Cache-Control; a matching If-None-Match gets a 304, and a render that
+fails gets a 500.
+
+Usage:
+    python cloud_server.py --port 8000
+    curl 'http://localhost:8000/api/cloud.png?neighborhood=Echo_Park&scheme=greens'
+"""
+
+import argparse
+import functools
+import hashlib
+import io
+import json
+import os
+import posixpath
+import re
+import threading
+import time
+import traceback
+from collections import Counter, OrderedDict, defaultdict, deque
+from datetime import date
+from concurrent.futures import Future
+from http import HTTPStatus
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, unquote, urlsplit
+
+import pandas as pd
+
+from aggregates import aggregate_dir, window_frequencies
+from build_web_assets import WEBP_QUALITY
+from generate_wordcloud import color_schemes, compose_wordcloud_image, count_description_words
+from layout_cache import cached_wordcloud
+
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+DATA_DIR = os.path.join(REPO_DIR, 'data')
+WEB_PREFIX = '/data/web/'
+# Full-size PNGs that index.html falls back to without WebP support
+FULL_PNG_PATTERN = re.compile(r'/data/[A-Za-z0-9_]+_description_wordcloud\.png')
+SCHEMES = ('viridis', 'plasma', 'inferno', 'magma', 'cividis',
+           'Blues', 'Greens', 'Oranges', 'Purples', 'Reds')
+WIDTHS = (400, 600, 800, 1200, 1600, 2400)
+HEIGHTS = (200, 300, 400, 600, 800, 1200, 1600)
+MAX_WORDS_CHOICES = (20, 40, 60, 80, 100, 150, 200, 300, 500)
+MAX_EXCLUDE = 20
+MAX_MIN_COUNT = 1000
+MAX_WORDS = 500
+CACHE_CONTROL = 'public, max-age=300'
+IMAGE_TYPES = {'png': 'image/png', 'webp': 'image/webp'}
+
+
+class LRUCache:
+    """Least-recently-used cache with a fixed number of entries
+
+    ``size`` is the running total of ``_size()`` over the entries.
+    """
+
+    def __init__(self, maxsize=32):
+        self.maxsize = maxsize
+        self.entries = OrderedDict()
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    def _size(self, value):
+        return 1
+
+    def _full(self):
+        return len(self.entries) > self.maxsize
+
+    def get(self, key):
+        with self.lock:
+            if key in self.entries:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return self.entries[key]
+            self.misses += 1
+            return None
+
+    def put(self, key, value):
+        with self.lock:
+            if key in self.entries:
+                self.size -= self._size(self.entries[key])
+            self.entries[key] = value
+            self.entries.move_to_end(key)
+            self.size += self._size(value)
+            while self._full() and len(self.entries) > 1:
+                _, evicted = self.entries.popitem(last=False)
+                self.size -= self._size(evicted)
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            'entries': len(self.entries),
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else None,
+        }
+
+
+class ByteLRUCache(LRUCache):
+    """LRU cache of encoded responses bounded by their total size in bytes"""
+
+    def __init__(self, max_bytes=64 * 1024 * 1024):
+        super().__init__(maxsize=None)
+        self.max_bytes = max_bytes
+
+    def _size(self, response):
+        return len(response['body'])
+
+    def _full(self):
+        return self.size > self.max_bytes
+
+    def total_bytes(self):
+        return self.size
+
+    def stats(self):
+        stats = super().stats()
+        stats['bytes'] = self.total_bytes()
+        stats['max_bytes'] = self.max_bytes
+        return stats
+
+
+class LatencyStats:
+    """Recent request durations per route"""
+
+    def __init__(self, window=2000):
+        self.durations = defaultdict(lambda: deque(maxlen=window))
+        self.lock = threading.Lock()
+
+    def record(self, route, seconds):
+        with self.lock:
+            self.durations[route].append(seconds)
+
+    def summary(self):
+        with self.lock:
+            routes = {route: sorted(values) for route, values in self.durations.items()}
+        return {route: {'requests': len(values),
+                        'p50_ms': 1000 * percentile(values, 50),
+                        'p99_ms': 1000 * percentile(values, 99)}
+                for route, values in routes.items() if values}
+
+
+def percentile(sorted_values, q):
+    """Nearest-rank percentile of an already sorted list"""
+    index = max(0, min(len(sorted_values) - 1, -(-len(sorted_values) * q // 100) - 1))
+    return sorted_values[int(index)]
+
+
+class BadRequest(ValueError):
+    pass
+
+
+def _int_param(query, name, default, low, high):
+    try:
+        value = int(query.get(name, [default])[0])
+    except ValueError:
+        raise BadRequest(f"{name} must be an integer")
+    if not low <= value <= high:
+        raise BadRequest(f"{name} must be between {low} and {high}")
+    return value
+
+
+def _choice_param(query, name, default, choices):
+    value = _int_param(query, name, default, min(choices), max(choices))
+    if value not in choices:
+        raise BadRequest(f"{name} must be one of {', '.join(map(str, choices))}")
+    return value
+
+
+def _date_param(query, name):
+    value = query.get(name, [None])[0]
+    if not value:
+        return None
+    try:
+        return date.fromisoformat(value).isoformat()
+    except ValueError:
+        raise BadRequest(f"{name} must be a YYYY-MM-DD date")
+
+
+def parse_params(query, data_dir=DATA_DIR):
+    """Validated, normalized request parameters (also the cache key)"""
+    neighborhood = query.get('neighborhood', [''])[0].strip().replace(' ', '_')
+    if (not neighborhood.replace('_', '').isalnum()
+            or not os.path.exists(os.path.join(data_dir, f'{neighborhood}_rentals.csv'))):
+        raise BadRequest(f"Unknown neighborhood: {neighborhood or '(missing)'}")
+
+    scheme = query.get('scheme', ['viridis'])[0]
+    if scheme not in color_schemes and scheme not in SCHEMES:
+        raise BadRequest(f"Unknown color scheme: {scheme}")
+
+    exclude = {word.strip().lower() for word in query.get('exclude', [''])[0].split(',')
+               if word.strip()}
+    if len(exclude) > MAX_EXCLUDE or not all(word.isalpha() for word in exclude):
+        raise BadRequest(f"exclude takes up to {MAX_EXCLUDE} comma-separated words")
+
+    return {
+        'neighborhood': neighborhood,
+        'scheme': scheme,
+        'width': _choice_param(query, 'width', 800, WIDTHS),
+        'height': _choice_param(query, 'height', 400, HEIGHTS),
+        'max_words': _choice_param(query, 'max_words', 100, MAX_WORDS_CHOICES),
+        'min_count': _int_param(query, 'min_count', 1, 1, MAX_MIN_COUNT),
+        'n': _int_param(query, 'n', 25, 1, MAX_WORDS),
+        'title': query.get('title', ['0'])[0] in ('1', 'true', 'yes'),
+        'exclude': tuple(sorted(exclude)),
+        'start': _date_param(query, 'start'),
+        'end': _date_param(query, 'end'),
+    }
+
+
+class CloudService:
+    """Frequency and image caches plus the rendering they front"""
+
+    def __init__(self, data_dir=DATA_DIR, frequency_entries=32, image_bytes=64 * 1024 * 1024):
+        self.data_dir = data_dir
+        self.layout_cache_dir = os.path.join(data_dir, '.layout_cache')
+        self.frequencies = LRUCache(maxsize=frequency_entries)
+        self.images = ByteLRUCache(max_bytes=image_bytes)
+        self.latency = LatencyStats()
+        self.renders = 0
+        # Cache key -> Future for the render in progress
+        self.pending = {}
+        self.pending_lock = threading.Lock()
+
+    def data_version(self, params):
+        """Changes whenever the CSV (or, for windows, the stored aggregates) change"""
+        if params['start'] or params['end']:
+            directory = aggregate_dir(params['neighborhood'].replace('_', ' '),
+                                      os.path.join(self.data_dir, 'aggregates'))
+            if not os.path.isdir(directory):
+                return 0
+            return max((entry.stat().st_mtime_ns for entry in os.scandir(directory)), default=0)
+        csv_filename = os.path.join(self.data_dir, f"{params['neighborhood']}_rentals.csv")
+        return os.stat(csv_filename).st_mtime_ns
+
+    def word_frequencies(self, params):
+        """``(Counter, listings)`` for a neighborhood/window, before filters"""
+        key = (params['neighborhood'], params['start'], params['end'], self.data_version(params))
+        cached = self.frequencies.get(key)
+        if cached is not None:
+            return cached
+
+        if params['start'] or params['end']:
+            try:
+                result = window_frequencies(params['neighborhood'].replace('_', ' '),
+                                            params['start'], params['end'],
+                                            root=os.path.join(self.data_dir, 'aggregates'))
+            except ValueError:
+                raise BadRequest("start/end must be YYYY-MM-DD dates")
+        else:
+            df = pd.read_csv(os.path.join(self.data_dir, f"{params['neighborhood']}_rentals.csv"))
+            descriptions = df['description'].dropna().astype(str)
+            result = (count_description_words(descriptions), len(df))
+        self.frequencies.put(key, result)
+        return result
+
+    def filtered_frequencies(self, params):
+        word_freq, listings = self.word_frequencies(params)
+        excluded = set(params['exclude'])
+        return Counter({word: count for word, count in word_freq.items()
+                        if count >= params['min_count'] and word not in excluded}), listings
+
+    def cached_response(self, kind, params, build):
+        """Encoded response for ``params`` from the image cache, building it on a miss"""
+        key = (kind, tuple(sorted(params.items())), self.data_version(params))
+        response = self.images.get(key)
+        if response is not None:
+            return response
+        with self.pending_lock:
+            # Another thread may have rendered it since the lookup above
+            with self.images.lock:
+                response = self.images.entries.get(key)
+            if response is not None:
+                return response
+            future = self.pending.get(key)
+            rendering = future is None
+            if rendering:
+                future = self.pending[key] = Future()
+        if not rendering:
+            return future.result()
+
+        try:
+            body, content_type = build(params)
+            response = {
+                'body': body,
+                'content_type': content_type,
+                'etag': '"' + hashlib.sha256(body).hexdigest()[:32] + '"',
+            }
+            self.images.put(key, response)
+            future.set_result(response)
+            return response
+        except Exception as error:
+            future.set_exception(error)
+            raise
+        finally:
+            with self.pending_lock:
+                del self.pending[key]
+
+    def render_cloud(self, params, fmt='png'):
+        word_freq, listings = self.filtered_frequencies(params)
+        if not word_freq:
+            raise BadRequest("No words left after filtering")
+        self.renders += 1
+        wordcloud, _ = cached_wordcloud(word_freq, colormap=params['scheme'],
+                                        cache_dir=self.layout_cache_dir,
+                                        width=params['width'], height=params['height'],
+                                        max_words=params['max_words'],
+                                        background_color='white', collocations=False)
+        if params['title']:
+            title = (f"Most Common Words in {params['neighborhood'].replace('_', ' ')} "
+                     f"Rental Descriptions\n(Total: {listings} listings)")
+            image = compose_wordcloud_image(wordcloud, title)
+        else:
+            image = wordcloud.to_image()
+
+        buffer = io.BytesIO()
+        if fmt == 'webp':
+            image.save(buffer, format='WEBP', quality=WEBP_QUALITY)
+        else:
+            image.save(buffer, format='PNG', compress_level=6)
+        return buffer.getvalue(), IMAGE_TYPES[fmt]
+
+    def top_words(self, params):
+        word_freq, listings = self.filtered_frequencies(params)
+        body = json.dumps({
+            'neighborhood': params['neighborhood'],
+            'listings': listings,
+            'words': [{'word': word, 'count': count}
+                      for word, count in word_freq.most_common(params['n'])],
+        }).encode('utf-8')
+        return body, 'application/json'
+
+    def stats(self):
+        return {
+            'frequency_cache': self.frequencies.stats(),
+            'image_cache': self.images.stats(),
+            'renders': self.renders,
+            'latency': self.latency.summary(),
+        }
+
+
+def is_public_path(path):
+    """Whether a static request is index.html, a built web asset or a full-size cloud PNG"""
+    path = posixpath.normpath(unquote(urlsplit(path).path))
+    return (path in ('/', '/index.html') or path.startswith(WEB_PREFIX)
+            or FULL_PNG_PATTERN.fullmatch(path) is not None)
+
+
+class CloudRequestHandler(SimpleHTTPRequestHandler):
+    """index.html and data/web/ from the repository plus the /api/ routes"""
+
+    service = None
+    verbose = False
+
+    def do_HEAD(self):
+        if not is_public_path(self.path):
+            self.send_error(HTTPStatus.NOT_FOUND)
+            return
+        super().do_HEAD()
+
+    def list_directory(self, path):
+        self.send_error(HTTPStatus.NOT_FOUND)
+        return None
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        if not url.path.startswith('/api/'):
+            if not is_public_path(self.path):
+                self.send_error(HTTPStatus.NOT_FOUND)
+                return
+            return super().do_GET()
+
+        start = time.perf_counter()
+        route = url.path
+        try:
+            query = parse_qs(url.query)
+            if route == '/api/stats':
+                self.send_body(json.dumps(self.service.stats(), indent=2).encode('utf-8'),
+                               'application/json', cache=False)
+                return
+            if route in ('/api/cloud.png', '/api/cloud.webp'):
+                fmt = route.rsplit('.', 1)[1]
+                build = functools.partial(self.service.render_cloud, fmt=fmt)
+            elif route == '/api/words.json':
+                build = self.service.top_words
+            else:
+                self.send_error(HTTPStatus.NOT_FOUND)
+                return
+            params = parse_params(query, self.service.data_dir)
+            if route != '/api/words.json':
+                del params['n']
+            self.send_cached(self.service.cached_response(route, params, build))
+        except BadRequest as error:
+            self.send_error(HTTPStatus.BAD_REQUEST, str(error))
+        except Exception:
+            print(f"Error handling {self.path}:")
+            traceback.print_exc()
+            self.send_error(HTTPStatus.INTERNAL_SERVER_ERROR)
+        finally:
+            self.service.latency.record(route, time.perf_counter() - start)
+
+    def send_cached(self, response):
+        if self.headers.get('If-None-Match') == response['etag']:
+            self.send_response(HTTPStatus.NOT_MODIFIED)
+            self.send_header('ETag', response['etag'])
+            self.send_header('Cache-Control', CACHE_CONTROL)
+            self.end_headers()
+            return
+        self.send_body(response['body'], response['content_type'], etag=response['etag'])
+
+    def send_body(self, body, content_type, etag=None, cache=True):
+        self.send_response(HTTPStatus.OK)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('Cache-Control', CACHE_CONTROL if cache else 'no-store')
+        if etag:
+            self.send_header('ETag', etag)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        if self.verbose:
+            super().log_message(format, *args)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Serve word clouds and top words on demand')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--frequency-entries', type=int, default=32,
+                        help='word-count sets kept in memory')
+    parser.add_argument('--image-cache-mb', type=float, default=64,
+                        help='memory budget for encoded images')
+    parser.add_argument('--verbose', action='store_true', help='log every request')
+    args = parser.parse_args()
+
+    service = CloudService(frequency_entries=args.frequency_entries,
+                           image_bytes=int(args.image_cache_mb * 1024 * 1024))
+    handler = type('Handler', (CloudRequestHandler,), {'service': service, 'verbose': args.verbose})
+    handler = functools.partial(handler, directory=REPO_DIR)
+
+    server = ThreadingHTTPServer((args.host, args.port), handler)
+    print(f"Serving on http://{args.host}:{args.port}/ (stats at /api/stats)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\nStopping server")
+        print(json.dumps(service.stats(), indent=2))
+    finally:
+        server.server_close()
+
+
+if __name__ == '__main__':
+    main()
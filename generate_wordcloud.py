@@ -4,6 +4,7 @@ Generate word clouds from scraped Zillow data
 """
 
 import os
+import glob
 import pandas as pd
 import matplotlib.pyplot as plt
 import seaborn as sns
@@ -12,7 +13,12 @@ import nltk
 from nltk.corpus import stopwords
 from nltk.tokenize import word_tokenize
 from wordcloud import WordCloud
+import matplotlib.colors as mcolors
+from PIL import Image, ImageDraw, ImageFont
+import argparse
 import re
+from profiling import NULL_PROFILER, add_profiling_arguments, profiled_run
+from placement import LAYOUT_ENGINES, layout_words
 
 # Download NLTK resources if needed
 try:
@@ -82,7 +88,52 @@ real_estate_stopwords = set([
     'yorba linda', 'placentia', 'brea', 'la habra heights'
 ])
 
-def load_and_analyze_data(neighborhood):
+# Cohesive color schemes (same as making_clouds.ipynb)
+color_schemes = {
+    'cool_blues': ['#1f77b4', '#3182bd', '#4299e1', '#63b3ed', '#90cdf4', '#bee3f8', '#dbeafe'],
+    'warm_reds': ['#dc2626', '#ef4444', '#f87171', '#fca5a5', '#fecaca', '#fee2e2', '#fef2f2'],
+    'greens': ['#059669', '#10b981', '#34d399', '#6ee7b7', '#a7f3d0', '#d1fae5', '#ecfdf5'],
+    'purples': ['#7c3aed', '#8b5cf6', '#a78bfa', '#c4b5fd', '#ddd6fe', '#ede9fe', '#f3f4f6'],
+    'oranges': ['#ea580c', '#f97316', '#fb923c', '#fdba74', '#fed7aa', '#ffedd5', '#fff7ed'],
+    'teals': ['#0d9488', '#14b8a6', '#2dd4bf', '#5eead4', '#99f6e4', '#ccfbf1', '#f0fdfa']
+}
+
+def create_custom_colormap(colors):
+    """Create a custom colormap from a list of colors"""
+    return mcolors.LinearSegmentedColormap.from_list('custom', colors, N=len(colors))
+
+def find_neighborhoods(data_dir='data'):
+    """List neighborhoods (underscored, e.g. 'Echo_Park') that have a rentals CSV"""
+    return sorted(os.path.basename(f)[:-len('_rentals.csv')]
+                  for f in glob.glob(os.path.join(data_dir, '*_rentals.csv')))
+
+PRICE_PATTERN = re.compile(r'\$\s*(\d[\d,]*)')
+NUMBER_PATTERN = re.compile(r'\d[\d,]*')
+
+def parse_price(price):
+    """Monthly rent from labels like '$2,800+ 1 bd', '$4,595/mo' or 4500 (None if absent)
+
+    Only the first dollar amount counts, so the bedroom number in
+    '$2,800+ 1 bd' is not glued onto the rent.
+    """
+    text = str(price)
+    match = PRICE_PATTERN.search(text)
+    digits = match.group(1) if match else None
+    if digits is None:
+        match = NUMBER_PATTERN.search(text)
+        digits = match.group() if match else None
+    return int(digits.replace(',', '')) if digits else None
+
+def extract_numeric_prices(prices):
+    """Parse each price label with parse_price, skipping those without a price"""
+    numeric_prices = []
+    for price in prices:
+        value = parse_price(price)
+        if value is not None:
+            numeric_prices.append(value)
+    return numeric_prices
+
+def load_and_analyze_data(neighborhood, profiler=NULL_PROFILER):
     """Load scraped data and analyze it"""
     csv_filename = f'data/{neighborhood.replace(" ", "_")}_rentals.csv'
     
@@ -90,7 +141,8 @@ def load_and_analyze_data(neighborhood):
         print(f"No data file found for {neighborhood}")
         return None
     
-    df = pd.read_csv(csv_filename)
+    with profiler.stage('load'):
+        df = pd.read_csv(csv_filename)
     print(f"Loaded {len(df)} listings for {neighborhood}")
     
     # Show sample data
@@ -103,12 +155,8 @@ def load_and_analyze_data(neighborhood):
     print(f"Number of listings with prices: {len(prices)}")
     
     # Extract numeric prices
-    numeric_prices = []
-    for price in prices:
-        # Extract numbers from price strings
-        price_digits = re.sub(r'[^\d]', '', str(price))
-        if price_digits:
-            numeric_prices.append(int(price_digits))
+    with profiler.stage('parse_prices'):
+        numeric_prices = extract_numeric_prices(prices)
     
     if numeric_prices:
         print(f"Average price: ${sum(numeric_prices)/len(numeric_prices):,.0f}")
@@ -116,8 +164,134 @@ def load_and_analyze_data(neighborhood):
     
     return df
 
-def generate_word_cloud_from_descriptions(df, neighborhood):
-    """Generate word cloud from property descriptions"""
+def is_content_word(word, stop_words):
+    """Keep alphabetic words longer than two letters that aren't stopwords"""
+    return (word.isalpha() and 
+            len(word) > 2 and 
+            word not in stop_words and 
+            word not in real_estate_stopwords)
+
+def description_tokens(text, stop_words=None):
+    """Tokenize a single description into filtered, lower-cased words"""
+    if stop_words is None:
+        stop_words = set(stopwords.words('english'))
+    return [word for word in word_tokenize(text.lower())
+            if is_content_word(word, stop_words)]
+
+def count_description_words(descriptions, profiler=NULL_PROFILER):
+    """Tokenize descriptions, remove stopwords and count the remaining words"""
+    with profiler.stage('tokenize'):
+        all_text = ' '.join(descriptions)
+        
+        # Tokenize and remove stopwords
+        stop_words = set(stopwords.words('english'))
+        tokens = word_tokenize(all_text.lower())
+    
+    with profiler.stage('count'):
+        # Filter tokens
+        filtered_tokens = []
+        for word in tokens:
+            if is_content_word(word, stop_words):
+                filtered_tokens.append(word)
+        
+        # Create frequency distribution
+        return Counter(filtered_tokens)
+
+def count_words_streaming(csv_filename, chunksize=10000, profiler=NULL_PROFILER, normalizer=None):
+    """Count description words in a CSV without loading it all at once
+
+    Descriptions are read ``chunksize`` rows at a time and tokenized one by
+    one. Raw token counts are kept per chunk and the stopword/length filters
+    run once per distinct token rather than once per occurrence, so memory is
+    bounded by the chunk size plus the vocabulary, not by the corpus size.
+    With a ``normalize.Normalizer`` the raw type counts are merged across
+    chunks and remapped onto normalized words once at the end.
+    Returns ``(word_freq, listing_count)``.
+    """
+    stop_words = set(stopwords.words('english'))
+    word_freq = Counter()
+    listing_count = 0
+    
+    reader = pd.read_csv(csv_filename, usecols=['description'], chunksize=chunksize)
+    while True:
+        with profiler.stage('load'):
+            chunk = next(reader, None)
+        if chunk is None:
+            break
+        listing_count += len(chunk)
+        with profiler.stage('tokenize'):
+            chunk_counts = Counter()
+            for text in chunk['description'].dropna().astype(str):
+                chunk_counts.update(word_tokenize(text.lower()))
+        with profiler.stage('count'):
+            if normalizer is not None:
+                word_freq.update(chunk_counts)
+                continue
+            for word, count in chunk_counts.items():
+                if is_content_word(word, stop_words):
+                    word_freq[word] += count
+    
+    if normalizer is not None:
+        with profiler.stage('normalize'):
+            word_freq = normalizer.normalize_counts(word_freq)
+            normalizer.save()
+    
+    return word_freq, listing_count
+
+def compose_wordcloud_image(wordcloud, title, target_width=None, title_color='#1f2937'):
+    """Render a word cloud straight to a Pillow image with a title band on top
+
+    The cloud is drawn by WordCloud itself at ``target_width`` pixels (via its
+    ``scale`` setting), so the glyphs are rasterized once at the final size
+    instead of being resampled by matplotlib.
+    """
+    scale = wordcloud.scale
+    try:
+        if target_width is not None:
+            wordcloud.scale = target_width / float(wordcloud.width)
+        cloud = wordcloud.to_image().convert('RGB')
+    finally:
+        # The caller's cloud may be reused (layout cache, server, previews)
+        wordcloud.scale = scale
+
+    lines = title.split('\n')
+    font_size = max(12, cloud.width // 40)
+    font = ImageFont.truetype(wordcloud.font_path, font_size)
+    line_height = int(font_size * 1.3)
+    padding = font_size // 2
+    band_height = line_height * len(lines) + 2 * padding
+
+    image = Image.new('RGB', (cloud.width, cloud.height + band_height), 'white')
+    draw = ImageDraw.Draw(image)
+    for i, line in enumerate(lines):
+        line_width = draw.textlength(line, font=font)
+        draw.text(((cloud.width - line_width) / 2, padding + i * line_height),
+                  line, fill=title_color, font=font)
+    image.paste(cloud, (0, band_height))
+    return image
+
+def save_wordcloud_direct(wordcloud, filename, title, target_width=None, compress_level=6):
+    """Save a word cloud PNG without going through matplotlib"""
+    image = compose_wordcloud_image(wordcloud, title, target_width=target_width)
+    image.save(filename, format='PNG', compress_level=compress_level)
+    return image
+
+def generate_word_cloud_from_descriptions(df, neighborhood, render='matplotlib',
+                                          target_width=None, compress_level=6,
+                                          dedupe=None, top_phrases=0, normalize=None,
+                                          layout_engine='wordcloud', profiler=NULL_PROFILER):
+    """Generate word cloud from property descriptions
+
+    ``render='matplotlib'`` keeps the original figure/savefig output.
+    ``render='direct'`` writes the WordCloud image at ``target_width`` pixels
+    with a Pillow-drawn title and the given PNG ``compress_level`` (0-9).
+    ``dedupe='collapse'`` (or ``'sqrt'``) counts near-duplicate descriptions
+    once (or down-weighted) instead of once per copy.
+    ``top_phrases=N`` adds the N most frequent 2-3 word phrases to the cloud.
+    ``normalize=True`` (or a ``normalize.Normalizer``) merges inflections such
+    as "floor"/"floors" before counting.
+    ``layout_engine='grid'`` places words with placement.generate_layout.
+    """
     if df.empty:
         print(f"No data for {neighborhood}")
         return
@@ -128,28 +302,76 @@ def generate_word_cloud_from_descriptions(df, neighborhood):
         print(f"No descriptions available for {neighborhood}")
         return
     
-    all_text = ' '.join(descriptions)
+    if normalize:
+        # Imported here because normalize uses this module's stopwords
+        from normalize import Normalizer, count_token_types
+        normalizer = normalize if isinstance(normalize, Normalizer) else Normalizer()
+    
+    if dedupe:
+        # Imported here because dedup builds on this module's tokenizer
+        from dedup import count_words_deduplicated, print_dedup_report
+        with profiler.stage('dedupe'):
+            word_freq, report = count_words_deduplicated(descriptions, mode=dedupe)
+        print_dedup_report(report, neighborhood)
+    elif normalize:
+        with profiler.stage('tokenize'):
+            word_freq = count_token_types(descriptions)
+    else:
+        word_freq = count_description_words(descriptions, profiler=profiler)
+    
+    if normalize:
+        with profiler.stage('normalize'):
+            word_freq = normalizer.normalize_counts(word_freq)
+            normalizer.save()
+    
+    if top_phrases:
+        from phrases import combine_words_and_phrases, count_phrases
+        with profiler.stage('phrases'):
+            if dedupe:
+                # Count phrases over the same deduplicated, weighted descriptions
+                phrase_counter = count_phrases(descriptions.iloc[report['representatives']],
+                                               weights=report['weights'])
+            else:
+                phrase_counter = count_phrases(descriptions)
+            phrase_freq = phrase_counter.top(top_phrases)
+            word_freq = combine_words_and_phrases(word_freq, phrase_freq)
+    
+    return save_description_wordcloud(word_freq, neighborhood, len(df), render=render,
+                                      target_width=target_width,
+                                      compress_level=compress_level,
+                                      layout_engine=layout_engine, profiler=profiler)
+
+def generate_word_cloud_streaming(neighborhood, chunksize=10000, render='direct',
+                                  target_width=None, compress_level=6, normalizer=None,
+                                  layout_engine='wordcloud', profiler=NULL_PROFILER):
+    """Generate the description word cloud straight from the CSV, chunk by chunk
+
+    Unlike generate_word_cloud_from_descriptions this never holds the whole
+    corpus in memory, so it works for scrapes far larger than RAM.
+    """
+    csv_filename = f'data/{neighborhood.replace(" ", "_")}_rentals.csv'
     
-    # Tokenize and remove stopwords
-    stop_words = set(stopwords.words('english'))
-    tokens = word_tokenize(all_text.lower())
+    if not os.path.exists(csv_filename):
+        print(f"No data file found for {neighborhood}")
+        return None
     
-    # Filter tokens
-    filtered_tokens = []
-    for word in tokens:
-        if (word.isalpha() and 
-            len(word) > 2 and 
-            word not in stop_words and 
-            word not in real_estate_stopwords):
-            filtered_tokens.append(word)
+    word_freq, listing_count = count_words_streaming(csv_filename, chunksize=chunksize,
+                                                     profiler=profiler, normalizer=normalizer)
+    print(f"Counted words in {listing_count} listings for {neighborhood}")
     
-    if not filtered_tokens:
+    return save_description_wordcloud(word_freq, neighborhood, listing_count, render=render,
+                                      target_width=target_width,
+                                      compress_level=compress_level,
+                                      layout_engine=layout_engine, profiler=profiler)
+
+def save_description_wordcloud(word_freq, neighborhood, listing_count, render='matplotlib',
+                               target_width=None, compress_level=6, filename=None,
+                               layout_engine='wordcloud', profiler=NULL_PROFILER):
+    """Lay out, render and save the description word cloud for word counts"""
+    if not word_freq:
         print(f"No meaningful words found for {neighborhood}")
         return
     
-    # Create frequency distribution
-    word_freq = Counter(filtered_tokens)
-    
     # Generate word cloud
     wordcloud = WordCloud(
         width=800, 
@@ -160,27 +382,42 @@ def generate_word_cloud_from_descriptions(df, neighborhood):
         contour_color='steelblue',
         colormap='viridis'
     )
-    wordcloud.generate_from_frequencies(word_freq)
-    
-    # Display word cloud
-    plt.figure(figsize=(12, 8))
-    plt.imshow(wordcloud, interpolation='bilinear')
-    plt.axis('off')
-    plt.title(f'Most Common Words in {neighborhood} Rental Descriptions\n(Total: {len(df)} listings)', 
-              fontsize=16, fontweight='bold')
-    plt.tight_layout()
-    
-    # Save word cloud
-    filename = f'data/{neighborhood.replace(" ", "_")}_description_wordcloud.png'
-    plt.savefig(filename, dpi=300, bbox_inches='tight')
-    print(f"Description word cloud saved to {filename}")
-    
-    plt.show()
+    with profiler.stage('layout'):
+        layout_words(wordcloud, word_freq, engine=layout_engine)
+    
+    title = f'Most Common Words in {neighborhood} Rental Descriptions\n(Total: {listing_count} listings)'
+    if filename is None:
+        filename = f'data/{neighborhood.replace(" ", "_")}_description_wordcloud.png'
+    
+    if render == 'direct':
+        with profiler.stage('render'):
+            image = compose_wordcloud_image(wordcloud, title, target_width=target_width)
+        with profiler.stage('save'):
+            image.save(filename, format='PNG', compress_level=compress_level)
+        print(f"Description word cloud saved to {filename}")
+    else:
+        # Display word cloud
+        with profiler.stage('render'):
+            plt.figure(figsize=(12, 8))
+            plt.imshow(wordcloud, interpolation='bilinear')
+            plt.axis('off')
+            plt.title(title, fontsize=16, fontweight='bold')
+            plt.tight_layout()
+        
+        # Save word cloud
+        with profiler.stage('save'):
+            plt.savefig(filename, dpi=300, bbox_inches='tight')
+        print(f"Description word cloud saved to {filename}")
+        
+        plt.show()
+        plt.close()
     
     # Print top words
     print(f"\nTop 10 words in {neighborhood} descriptions:")
     for word, count in word_freq.most_common(10):
         print(f"  {word}: {count}")
+    
+    return word_freq
 
 def create_price_analysis(df, neighborhood):
     """Create price analysis visualization"""
@@ -188,15 +425,7 @@ def create_price_analysis(df, neighborhood):
         return
     
     # Extract numeric prices
-    numeric_prices = []
-    price_labels = []
-    
-    for price in df['price'].dropna():
-        # Extract numbers from price strings
-        price_digits = re.sub(r'[^\d]', '', str(price))
-        if price_digits:
-            numeric_prices.append(int(price_digits))
-            price_labels.append(price)
+    numeric_prices = extract_numeric_prices(df['price'].dropna())
     
     if not numeric_prices:
         print("No valid prices found for analysis")
@@ -242,6 +471,7 @@ def create_price_analysis(df, neighborhood):
     print(f"Price analysis saved to {filename}")
     
     plt.show()
+    plt.close()
     
     # Print statistics
     print(f"\nPrice Statistics for {neighborhood}:")
@@ -252,7 +482,7 @@ def create_price_analysis(df, neighborhood):
 
 def create_neighborhood_comparison():
     """Create comparison across multiple neighborhoods"""
-    neighborhoods = ["Beverly_Hills"]  # Add more as data becomes available
+    neighborhoods = find_neighborhoods()
     
     all_data = {}
     
@@ -276,18 +506,15 @@ def create_neighborhood_comparison():
     labels = []
     
     for neighborhood, df in all_data.items():
-        prices = []
-        for price in df['price'].dropna():
-            price_digits = re.sub(r'[^\d]', '', str(price))
-            if price_digits:
-                prices.append(int(price_digits))
+        prices = extract_numeric_prices(df['price'].dropna())
         
         if prices:
             price_data.append(prices)
             labels.append(neighborhood.replace('_', ' '))
     
     if price_data:
-        axes[0, 0].boxplot(price_data, labels=labels)
+        axes[0, 0].boxplot(price_data)
+        axes[0, 0].set_xticks(range(1, len(labels) + 1), labels)
         axes[0, 0].set_title('Price Comparison')
         axes[0, 0].set_ylabel('Price ($)')
     
@@ -302,11 +529,7 @@ def create_neighborhood_comparison():
     # Price ranges
     price_ranges = []
     for neighborhood, df in all_data.items():
-        prices = []
-        for price in df['price'].dropna():
-            price_digits = re.sub(r'[^\d]', '', str(price))
-            if price_digits:
-                prices.append(int(price_digits))
+        prices = extract_numeric_prices(df['price'].dropna())
         
         if prices:
             price_ranges.append(max(prices) - min(prices))
@@ -320,11 +543,7 @@ def create_neighborhood_comparison():
     # Average prices
     avg_prices = []
     for neighborhood, df in all_data.items():
-        prices = []
-        for price in df['price'].dropna():
-            price_digits = re.sub(r'[^\d]', '', str(price))
-            if price_digits:
-                prices.append(int(price_digits))
+        prices = extract_numeric_prices(df['price'].dropna())
         
         if prices:
             avg_prices.append(sum(prices)/len(prices))
@@ -343,31 +562,59 @@ def create_neighborhood_comparison():
     print(f"Neighborhood comparison saved to {filename}")
     
     plt.show()
+    plt.close(fig)
 
 def main():
     """Main function"""
+    parser = argparse.ArgumentParser(description='Generate word clouds from scraped Zillow data')
+    parser.add_argument('--neighborhood', default='Beverly Hills')
+    parser.add_argument('--render', choices=['matplotlib', 'direct'], default='matplotlib')
+    parser.add_argument('--target-width', type=int, default=None,
+                        help='pixel width of the direct-rendered PNG (default: canvas width)')
+    parser.add_argument('--compress-level', type=int, choices=range(10), default=6,
+                        metavar='0-9', help='PNG compression level for --render direct')
+    parser.add_argument('--layout', choices=LAYOUT_ENGINES, default='wordcloud',
+                        help="word placement engine ('grid' is faster on large canvases)")
+    parser.add_argument('--streaming', action='store_true',
+                        help='count words chunk by chunk from the CSV and only save the word cloud')
+    parser.add_argument('--chunksize', type=int, default=10000, help='rows per chunk with --streaming')
+    add_profiling_arguments(parser)
+    args = parser.parse_args()
+    
     print("=" * 60)
     print("ZILLOW DATA ANALYSIS")
     print("=" * 60)
     
-    # Analyze Beverly Hills data
-    neighborhood = "Beverly Hills"
-    df = load_and_analyze_data(neighborhood)
-    
-    if df is not None:
-        # Generate word cloud from descriptions
-        generate_word_cloud_from_descriptions(df, neighborhood)
+    neighborhood = args.neighborhood
+    with profiled_run(args, neighborhood.replace(' ', '_')) as profiler:
+        if args.streaming:
+            generate_word_cloud_streaming(neighborhood, chunksize=args.chunksize,
+                                          render='direct', target_width=args.target_width,
+                                          compress_level=args.compress_level,
+                                          layout_engine=args.layout, profiler=profiler)
+            return
         
-        # Create price analysis
-        create_price_analysis(df, neighborhood)
+        df = load_and_analyze_data(neighborhood, profiler=profiler)
         
-        # Create neighborhood comparison (when more data is available)
-        create_neighborhood_comparison()
-        
-        print(f"\nAnalysis completed for {neighborhood}!")
-        print("Check the data/ directory for generated visualizations.")
-    else:
-        print("No data available for analysis.")
+        if df is not None:
+            # Generate word cloud from descriptions
+            generate_word_cloud_from_descriptions(df, neighborhood, render=args.render,
+                                                  target_width=args.target_width,
+                                                  compress_level=args.compress_level,
+                                                  layout_engine=args.layout, profiler=profiler)
+            
+            # Create price analysis
+            with profiler.stage('price_analysis'):
+                create_price_analysis(df, neighborhood)
+            
+            # Create neighborhood comparison (when more data is available)
+            with profiler.stage('comparison'):
+                create_neighborhood_comparison()
+            
+            print(f"\nAnalysis completed for {neighborhood}!")
+            print("Check the data/ directory for generated visualizations.")
+        else:
+            print("No data available for analysis.")
 
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    main()
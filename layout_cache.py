@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+"""
+Cache word cloud layouts so recoloring and restyling skip the placement step
+
+WordCloud.generate_from_frequencies spends almost all of its time on the
+collision-checked word placement. The result (``layout_``: word, font size,
+position, orientation) only depends on the frequencies and the canvas
+settings, not on the colors, so it is stored on disk keyed by a fingerprint of
+both. A different color scheme then only needs ``recolor()`` plus the final
+rasterize/SVG step.
+
+Colors are always applied with a seeded ``recolor()`` after the layout is
+either computed or loaded, so a cached cloud is identical to a fresh one.
+The font is keyed by its contents, and the least recently used layouts are
+pruned once the cache passes MAX_CACHE_BYTES.
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+
+from PIL import Image
+from wordcloud import WordCloud
+
+from generate_wordcloud import (color_schemes, create_custom_colormap,
+                                save_wordcloud_direct)
+from placement import layout_words
+
+CACHE_DIR = 'data/.layout_cache'
+# Least recently used layouts are deleted once the cache grows past this
+MAX_CACHE_BYTES = 64 * 1024 * 1024
+
+_font_hashes = {}
+
+# WordCloud settings that influence placement; everything else (colors,
+# background, contour, scale) only matters at render time
+LAYOUT_SETTINGS = ('width', 'height', 'margin', 'max_words', 'min_font_size',
+                   'max_font_size', 'font_step', 'relative_scaling',
+                   'prefer_horizontal', 'repeat', 'font_path')
+
+# Defaults matching generate_improved_wordcloud in making_clouds.ipynb
+NOTEBOOK_SETTINGS = {
+    'width': 1200,
+    'height': 800,
+    'background_color': 'white',
+    'max_words': 150,
+    'contour_width': 2,
+    'contour_color': '#374151',
+    'relative_scaling': 0.5,
+    'min_font_size': 12,
+    'max_font_size': 200,
+    'prefer_horizontal': 0.7,
+    'collocations': False,
+}
+
+
+def font_fingerprint(font_path):
+    """Content hash of a font file, memoized by resolved path, size and mtime"""
+    path = os.path.realpath(str(font_path))
+    stat = os.stat(path)
+    key = (path, stat.st_size, stat.st_mtime_ns)
+    if key not in _font_hashes:
+        with open(path, 'rb') as f:
+            _font_hashes[key] = hashlib.sha256(f.read()).hexdigest()
+    return _font_hashes[key]
+
+
+def layout_fingerprint(frequencies, wordcloud, seed, layout_engine='wordcloud'):
+    """Hash the frequencies and the placement-relevant canvas configuration"""
+    config = {name: getattr(wordcloud, name) for name in LAYOUT_SETTINGS}
+    # Two fonts with the same file name must not share layouts
+    config['font_path'] = font_fingerprint(config['font_path'])
+    config['seed'] = seed
+    # Only non-default engines are keyed, so existing cache entries stay valid
+    if layout_engine != 'wordcloud':
+        config['layout_engine'] = layout_engine
+    if wordcloud.mask is not None:
+        config['mask'] = hashlib.sha256(wordcloud.mask.tobytes()).hexdigest()
+
+    digest = hashlib.sha256()
+    digest.update(json.dumps(config, sort_keys=True).encode('utf-8'))
+    for word, count in sorted(frequencies.items()):
+        digest.update(f'{word}\t{count!r}\n'.encode('utf-8'))
+    return digest.hexdigest()
+
+
+def save_layout(wordcloud, key, cache_dir=CACHE_DIR):
+    """Write a computed layout to the cache"""
+    os.makedirs(cache_dir, exist_ok=True)
+    data = {
+        'words': wordcloud.words_,
+        'layout': [
+            [word, freq, font_size, [int(position[0]), int(position[1])],
+             None if orientation is None else int(orientation)]
+            for (word, freq), font_size, position, orientation, _ in wordcloud.layout_
+        ],
+    }
+    filename = os.path.join(cache_dir, f'{key}.json')
+    # Per-writer temp file: concurrent renders can share a layout key
+    tmp_filename = f'{filename}.{os.getpid()}-{threading.get_ident()}.tmp'
+    with open(tmp_filename, 'w') as f:
+        json.dump(data, f)
+    os.replace(tmp_filename, filename)
+    prune_cache(cache_dir)
+
+
+def prune_cache(cache_dir=CACHE_DIR, max_bytes=MAX_CACHE_BYTES):
+    """Delete least recently used layouts until the cache fits in ``max_bytes``"""
+    entries = []
+    for entry in os.scandir(cache_dir):
+        if entry.name.endswith('.json'):
+            stat = entry.stat()
+            entries.append((stat.st_mtime, stat.st_size, entry.path))
+    total = sum(size for _, size, _ in entries)
+    removed = 0
+    for _, size, path in sorted(entries):
+        if total <= max_bytes:
+            break
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            continue
+        total -= size
+        removed += 1
+    return removed
+
+
+def load_layout(wordcloud, key, cache_dir=CACHE_DIR):
+    """Restore a cached layout onto ``wordcloud``; returns False on a miss"""
+    filename = os.path.join(cache_dir, f'{key}.json')
+    if not os.path.exists(filename):
+        return False
+    with open(filename) as f:
+        data = json.load(f)
+    # Mark as recently used for prune_cache
+    os.utime(filename)
+
+    wordcloud.words_ = data['words']
+    wordcloud.layout_ = [
+        ((word, freq), font_size, tuple(position),
+         None if orientation is None else Image.Transpose(orientation), None)
+        for word, freq, font_size, position, orientation in data['layout']
+    ]
+    return True
+
+
+def cached_wordcloud(frequencies, colormap='viridis', seed=42, cache_dir=CACHE_DIR,
+                     layout_engine='wordcloud', **wordcloud_kwargs):
+    """Build (or restore) a word cloud layout and color it with ``colormap``
+
+    ``colormap`` may be a matplotlib colormap or the name of one of the
+    ``color_schemes``. ``layout_engine='grid'`` places words with
+    placement.generate_layout. Returns the WordCloud and whether the layout
+    came from the cache.
+    """
+    if isinstance(colormap, str) and colormap in color_schemes:
+        colormap = create_custom_colormap(color_schemes[colormap])
+
+    wordcloud = WordCloud(random_state=seed, colormap=colormap, **wordcloud_kwargs)
+    key = layout_fingerprint(frequencies, wordcloud, seed, layout_engine)
+
+    hit = load_layout(wordcloud, key, cache_dir)
+    if not hit:
+        layout_words(wordcloud, frequencies, engine=layout_engine)
+        save_layout(wordcloud, key, cache_dir)
+
+    wordcloud.recolor(random_state=seed, colormap=colormap)
+    return wordcloud, hit
+
+
+def render_color_schemes(word_freq, neighborhood, schemes=None, target_width=None,
+                         export_svg=False, cache_dir=CACHE_DIR, layout_engine='wordcloud',
+                         **wordcloud_kwargs):
+    """Render one neighborhood under several color schemes, placing words once"""
+    if schemes is None:
+        schemes = list(color_schemes)
+    settings = dict(NOTEBOOK_SETTINGS, **wordcloud_kwargs)
+    title = f'Most Common Words in {neighborhood} Rental Descriptions'
+    base = f'data/{neighborhood.replace(" ", "_")}_description_wordcloud'
+
+    filenames = []
+    for scheme in schemes:
+        start = time.perf_counter()
+        wordcloud, hit = cached_wordcloud(word_freq, colormap=scheme, cache_dir=cache_dir,
+                                          layout_engine=layout_engine, **settings)
+        png_filename = f'{base}_{scheme}.png'
+        save_wordcloud_direct(wordcloud, png_filename, title, target_width=target_width)
+        filenames.append(png_filename)
+
+        if export_svg:
+            svg_filename = f'{base}_{scheme}.svg'
+            with open(svg_filename, 'w') as f:
+                f.write(wordcloud.to_svg())
+            filenames.append(svg_filename)
+
+        source = 'cached layout' if hit else 'new layout'
+        print(f"  {scheme}: {png_filename} ({source}, {time.perf_counter() - start:.2f}s)")
+
+    return filenames
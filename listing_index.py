@@ -0,0 +1,275 @@
+#!/usr/bin/env python3
+"""
+Precomputed index of tokenized listings for instant filtered-subset clouds
+
+Every listing is tokenized once (neighborhood_compare.build_document_term_matrix)
+and stored as an integer-ID sparse vector in CSR form. Each array is a plain
+.npy file in data/.listing_index/, so a query memory-maps it instead of
+reading it:
+
+    indptr.npy    int64, listing i's terms are term_ids[indptr[i]:indptr[i + 1]]
+    term_ids.npy  int32 vocabulary ids
+    counts.npy    int32 occurrences of each term in the listing
+    totals.npy    int64 corpus-wide count per term
+
+Attributes (price, beds, baths, sqft, neighborhood) are stored per listing plus
+as a sorted column with the matching row order, so a range or equality filter
+is two binary searches. A filtered subset's word frequencies are then a
+``bincount`` over the matching listings' slices, without touching any text
+(for subsets larger than half the corpus the complement is subtracted from
+``totals`` instead).
+
+Usage:
+    python listing_index.py build
+    python listing_index.py query --neighborhood Koreatown --max-price 2500 --cloud
+"""
+
+import argparse
+import json
+import os
+import re
+import time
+from collections import Counter
+
+import numpy as np
+import pandas as pd
+
+from generate_wordcloud import parse_price, save_description_wordcloud
+from neighborhood_compare import build_document_term_matrix, load_all_listings
+from profiling import NULL_PROFILER, add_profiling_arguments, profiled_run
+
+INDEX_DIR = 'data/.listing_index'
+NUMERIC_ATTRIBUTES = ('price', 'beds', 'baths', 'sqft')
+
+BEDS_PATTERN = re.compile(r'(\d+(?:\.\d+)?)\s*(?:bds?|beds?|br)\b', re.IGNORECASE)
+
+
+def parse_number(value):
+    """Float from values like '1,200', '2.5' or 3 (NaN for 'N/A' and blanks)"""
+    if isinstance(value, (int, float, np.number)):
+        return float(value)
+    match = re.search(r'\d[\d,]*(?:\.\d+)?', str(value))
+    return float(match.group().replace(',', '')) if match else np.nan
+
+
+def parse_beds(price_text, beds_value=None):
+    """Bedrooms from the beds column, falling back to the price label ('Studio' is 0)"""
+    beds = parse_number(beds_value) if beds_value is not None else np.nan
+    if not np.isnan(beds):
+        return beds
+    text = str(price_text)
+    if 'studio' in text.lower():
+        return 0.0
+    match = BEDS_PATTERN.search(text)
+    return float(match.group(1)) if match else np.nan
+
+
+def listing_attributes(df):
+    """Numeric price/beds/baths/sqft columns (NaN when unknown) for a listings DataFrame"""
+    def column(name):
+        return df[name] if name in df.columns else pd.Series(np.nan, index=df.index)
+
+    prices = column('price')
+    return pd.DataFrame({
+        'price': prices.map(parse_price),
+        'beds': [parse_beds(price, beds) for price, beds in zip(prices, column('beds'))],
+        'baths': column('baths').map(parse_number),
+        'sqft': column('sqft').map(parse_number),
+    }, index=df.index).astype(np.float32)
+
+
+def _save_sorted_column(directory, name, values):
+    """Store a column with its stable sort order (NaNs sort last)"""
+    order = np.argsort(values, kind='stable').astype(np.int32)
+    np.save(os.path.join(directory, f'{name}.npy'), values)
+    np.save(os.path.join(directory, f'{name}_order.npy'), order)
+    np.save(os.path.join(directory, f'{name}_sorted.npy'), values[order])
+
+
+def build_index(df=None, directory=INDEX_DIR):
+    """Tokenize every listing once and write the index arrays
+
+    ``df`` defaults to all data/*_rentals.csv files; it needs a
+    ``neighborhood_key`` (or ``neighborhood``) column.
+    """
+    if df is None:
+        df = load_all_listings()
+    key = 'neighborhood_key' if 'neighborhood_key' in df.columns else 'neighborhood'
+    os.makedirs(directory, exist_ok=True)
+
+    start = time.perf_counter()
+    matrix, vocabulary = build_document_term_matrix(df['description'])
+    np.save(os.path.join(directory, 'indptr.npy'), matrix.indptr.astype(np.int64))
+    np.save(os.path.join(directory, 'term_ids.npy'), matrix.indices.astype(np.int32))
+    np.save(os.path.join(directory, 'counts.npy'), matrix.data.astype(np.int32))
+    np.save(os.path.join(directory, 'totals.npy'),
+            np.bincount(matrix.indices, weights=matrix.data,
+                        minlength=len(vocabulary)).astype(np.int64))
+
+    attributes = listing_attributes(df)
+    for name in NUMERIC_ATTRIBUTES:
+        _save_sorted_column(directory, name, attributes[name].to_numpy())
+    codes, neighborhoods = pd.factorize(df[key].astype(str).str.replace(' ', '_'), sort=True)
+    _save_sorted_column(directory, 'neighborhood', codes.astype(np.int16))
+
+    with open(os.path.join(directory, 'meta.json'), 'w') as f:
+        json.dump({
+            'listings': len(df),
+            'vocabulary': list(vocabulary),
+            'neighborhoods': list(neighborhoods),
+        }, f)
+
+    print(f"Indexed {len(df):,} listings, {len(vocabulary):,} words, "
+          f"{matrix.nnz:,} entries in {time.perf_counter() - start:.1f}s -> {directory}")
+    return ListingIndex(directory)
+
+
+class ListingIndex:
+    """Memory-mapped view of an index written by build_index"""
+
+    def __init__(self, directory=INDEX_DIR, mmap=True):
+        self.directory = directory
+        mode = 'r' if mmap else None
+        with open(os.path.join(directory, 'meta.json')) as f:
+            meta = json.load(f)
+        self.listings = meta['listings']
+        self.vocabulary = np.array(meta['vocabulary'], dtype=object)
+        self.neighborhoods = meta['neighborhoods']
+        self.arrays = {}
+        for filename in os.listdir(directory):
+            if filename.endswith('.npy'):
+                self.arrays[filename[:-len('.npy')]] = np.load(os.path.join(directory, filename),
+                                                              mmap_mode=mode)
+
+    def rows_between(self, attribute, low=None, high=None):
+        """Sorted ids of listings with ``low <= attribute <= high``"""
+        values = self.arrays[f'{attribute}_sorted']
+        first = 0 if low is None else np.searchsorted(values, low, side='left')
+        # NaNs sort after +inf, so an open upper bound still skips unknown values
+        last = np.searchsorted(values, np.inf if high is None else high, side='right')
+        return np.sort(self.arrays[f'{attribute}_order'][first:last])
+
+    def rows_in_neighborhood(self, neighborhood):
+        """Sorted ids of one neighborhood's listings (empty if unknown)"""
+        neighborhood = neighborhood.replace(' ', '_')
+        if neighborhood not in self.neighborhoods:
+            return np.array([], dtype=np.int32)
+        code = self.neighborhoods.index(neighborhood)
+        return self.rows_between('neighborhood', code, code)
+
+    def select(self, neighborhood=None, **ranges):
+        """Listing ids matching every filter; ``None`` means all listings
+
+        ``ranges`` are ``min_<attribute>``/``max_<attribute>`` keywords for
+        price, beds, baths and sqft, e.g. ``select('Koreatown', max_price=2500)``.
+        """
+        selections = []
+        if neighborhood is not None:
+            selections.append(self.rows_in_neighborhood(neighborhood))
+        for attribute in NUMERIC_ATTRIBUTES:
+            low, high = ranges.pop(f'min_{attribute}', None), ranges.pop(f'max_{attribute}', None)
+            if low is not None or high is not None:
+                selections.append(self.rows_between(attribute, low, high))
+        if ranges:
+            raise ValueError(f"Unknown filters: {', '.join(ranges)}")
+        if not selections:
+            return None
+
+        selections.sort(key=len)
+        rows = selections[0]
+        for other in selections[1:]:
+            rows = np.intersect1d(rows, other, assume_unique=True)
+        return rows
+
+    def term_counts(self, rows=None):
+        """Per-term counts summed over ``rows`` (all listings when None)"""
+        totals = self.arrays['totals']
+        if rows is None:
+            return np.asarray(totals)
+        if len(rows) > self.listings // 2:
+            # Cheaper to subtract the smaller complement from the totals
+            complement = np.setdiff1d(np.arange(self.listings), rows, assume_unique=True)
+            return np.asarray(totals) - self._sum_rows(complement)
+        return self._sum_rows(rows)
+
+    def _sum_rows(self, rows):
+        indptr = self.arrays['indptr']
+        starts, ends = indptr[rows], indptr[np.asarray(rows) + 1]
+        lengths = ends - starts
+        total = int(lengths.sum())
+        if total == 0:
+            return np.zeros(len(self.vocabulary), dtype=np.int64)
+        # Positions of every entry of every selected row, without a Python loop
+        offsets = np.repeat(starts - np.concatenate([[0], np.cumsum(lengths)[:-1]]), lengths)
+        positions = offsets + np.arange(total)
+        return np.bincount(self.arrays['term_ids'][positions],
+                           weights=self.arrays['counts'][positions],
+                           minlength=len(self.vocabulary)).astype(np.int64)
+
+    def frequencies(self, rows=None, top_n=None):
+        """Counter of words for a listing subset, optionally only the ``top_n`` words"""
+        counts = self.term_counts(rows)
+        nonzero = np.flatnonzero(counts)
+        if top_n is not None and len(nonzero) > top_n:
+            nonzero = nonzero[np.argpartition(-counts[nonzero], top_n - 1)[:top_n]]
+        return Counter({self.vocabulary[i]: int(counts[i]) for i in nonzero})
+
+
+def subset_wordcloud(index, neighborhood=None, max_words=200, profiler=NULL_PROFILER, **ranges):
+    """Word cloud for the listings matching the filters, straight from the index"""
+    with profiler.stage('select'):
+        rows = index.select(neighborhood, **ranges)
+    with profiler.stage('count'):
+        word_freq = index.frequencies(rows, top_n=max_words)
+    listing_count = index.listings if rows is None else len(rows)
+    label = neighborhood or 'All Neighborhoods'
+    suffix = '_'.join(f'{name}_{value:g}' for name, value in sorted(ranges.items()))
+    filename = f"data/{label.replace(' ', '_')}_{suffix or 'all'}_subset_wordcloud.png"
+    return save_description_wordcloud(word_freq, label, listing_count,
+                                      render='direct', filename=filename, profiler=profiler)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Build or query the listing index')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    subparsers.add_parser('build', help='tokenize data/*_rentals.csv into the index')
+    query = subparsers.add_parser('query', help='top words for a filtered subset')
+    query.add_argument('--neighborhood')
+    for attribute in NUMERIC_ATTRIBUTES:
+        query.add_argument(f'--min-{attribute}', type=float)
+        query.add_argument(f'--max-{attribute}', type=float)
+    query.add_argument('--top', type=int, default=20)
+    query.add_argument('--cloud', action='store_true', help='also save a word cloud')
+    for subparser in subparsers.choices.values():
+        add_profiling_arguments(subparser)
+    args = parser.parse_args()
+
+    with profiled_run(args, f'listing_index_{args.command}') as profiler:
+        if args.command == 'build':
+            with profiler.stage('build_index'):
+                build_index()
+            return
+
+        with profiler.stage('load'):
+            index = ListingIndex()
+        ranges = {f'{bound}_{attribute}': getattr(args, f'{bound}_{attribute}')
+                  for attribute in NUMERIC_ATTRIBUTES for bound in ('min', 'max')
+                  if getattr(args, f'{bound}_{attribute}') is not None}
+        start = time.perf_counter()
+        with profiler.stage('select'):
+            rows = index.select(args.neighborhood, **ranges)
+        with profiler.stage('count'):
+            word_freq = index.frequencies(rows)
+        elapsed = time.perf_counter() - start
+
+        matched = index.listings if rows is None else len(rows)
+        print(f"{matched:,} of {index.listings:,} listings match ({elapsed * 1000:.1f} ms)")
+        for word, count in word_freq.most_common(args.top):
+            print(f"  {word}: {count}")
+
+        if args.cloud:
+            subset_wordcloud(index, args.neighborhood, profiler=profiler, **ranges)
+
+
+if __name__ == '__main__':
+    main()
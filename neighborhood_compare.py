@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+"""
+Compare rental listing language across neighborhoods
+
+All listings from every data/*_rentals.csv are tokenized once into a single
+sparse (CSR) document-term matrix over a shared vocabulary. Per-neighborhood
+statistics are then computed with sparse/dense matrix algebra instead of
+per-neighborhood Python loops:
+
+- TF-IDF: the mean L2-normalized TF-IDF vector of each neighborhood's listings
+- Weighted log-odds with an informative Dirichlet prior (Monroe, Colaresi &
+  Quinn, 2008): z-scores of how much more a neighborhood uses a word than all
+  other neighborhoods combined, shrunk towards the corpus-wide rate so rare
+  words don't dominate
+
+Positive scores feed directly into per-neighborhood "distinctive word" clouds.
+"""
+
+import argparse
+import os
+from array import array
+
+import numpy as np
+import pandas as pd
+from nltk.corpus import stopwords
+from scipy import sparse
+from wordcloud import WordCloud
+
+from generate_wordcloud import (description_tokens, find_neighborhoods,
+                                save_wordcloud_direct)
+from profiling import NULL_PROFILER, add_profiling_arguments, profiled_run
+
+
+def load_all_listings(data_dir='data'):
+    """Concatenate every neighborhood CSV, labelled by its file name"""
+    frames = []
+    for neighborhood in find_neighborhoods(data_dir):
+        df = pd.read_csv(os.path.join(data_dir, f'{neighborhood}_rentals.csv'))
+        df['neighborhood_key'] = neighborhood
+        frames.append(df)
+
+    if not frames:
+        return pd.DataFrame(columns=['description', 'neighborhood_key'])
+    return pd.concat(frames, ignore_index=True)
+
+
+def build_document_term_matrix(descriptions):
+    """Tokenize each description into one row of a CSR count matrix
+
+    Returns ``(matrix, vocabulary)`` where ``vocabulary[j]`` is the word for
+    column ``j``.
+    """
+    stop_words = set(stopwords.words('english'))
+    term_ids = {}
+    indices = array('i')
+    indptr = array('q', [0])
+
+    for text in descriptions:
+        if isinstance(text, str):
+            for word in description_tokens(text, stop_words):
+                indices.append(term_ids.setdefault(word, len(term_ids)))
+        indptr.append(len(indices))
+
+    indices = np.frombuffer(indices, dtype=np.int32)
+    data = np.ones(len(indices), dtype=np.int32)
+    matrix = sparse.csr_matrix((data, indices, np.frombuffer(indptr, dtype=np.int64)),
+                               shape=(len(indptr) - 1, len(term_ids)))
+    # Repeated words in a listing become a single entry with their count
+    matrix.sum_duplicates()
+
+    vocabulary = np.empty(len(term_ids), dtype=object)
+    for word, term_id in term_ids.items():
+        vocabulary[term_id] = word
+    return matrix, vocabulary
+
+
+def group_indicator(labels):
+    """Sparse (groups x listings) 0/1 matrix plus the group names"""
+    codes, names = pd.factorize(pd.Series(labels), sort=True)
+    indicator = sparse.csr_matrix(
+        (np.ones(len(codes), dtype=np.int32), (codes, np.arange(len(codes)))),
+        shape=(len(names), len(codes)))
+    return indicator, np.asarray(names)
+
+
+def tfidf_scores(matrix, indicator):
+    """Mean L2-normalized TF-IDF vector per group, as a dense (groups x terms) array"""
+    n_docs = matrix.shape[0]
+    document_frequency = np.bincount(matrix.indices, minlength=matrix.shape[1])
+    idf = np.log((1 + n_docs) / (1 + document_frequency)) + 1
+
+    weighted = matrix.multiply(idf).tocsr()
+    norms = np.sqrt(np.asarray(weighted.multiply(weighted).sum(axis=1)).ravel())
+    norms[norms == 0] = 1
+    weighted = sparse.diags(1 / norms) @ weighted
+
+    group_sizes = np.asarray(indicator.sum(axis=1)).ravel()
+    group_sizes[group_sizes == 0] = 1
+    return (sparse.diags(1 / group_sizes) @ (indicator @ weighted)).toarray()
+
+
+def log_odds_scores(group_counts, prior_strength=None):
+    """Weighted log-odds z-scores with an informative Dirichlet prior
+
+    ``group_counts`` is a (groups x terms) count matrix. The prior is the
+    corpus-wide term distribution scaled to ``prior_strength`` pseudo-counts
+    (default: the mean number of tokens per group).
+    """
+    counts = np.asarray(group_counts.toarray() if sparse.issparse(group_counts)
+                        else group_counts, dtype=np.float64)
+    totals = counts.sum(axis=0)
+    if prior_strength is None:
+        prior_strength = max(counts.sum() / max(len(counts), 1), 1.0)
+    alpha = prior_strength * totals / max(totals.sum(), 1)
+    alpha0 = alpha.sum()
+
+    group_n = counts.sum(axis=1, keepdims=True)
+    rest = totals - counts
+    rest_n = group_n.sum() - group_n
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        delta = (np.log((counts + alpha) / (group_n + alpha0 - counts - alpha))
+                 - np.log((rest + alpha) / (rest_n + alpha0 - rest - alpha)))
+        variance = 1 / (counts + alpha) + 1 / (rest + alpha)
+        z = delta / np.sqrt(variance)
+    return np.nan_to_num(z, nan=0.0, posinf=0.0, neginf=0.0)
+
+
+def top_scores(scores, vocabulary, names, top_n=100):
+    """``{group: {word: score}}`` with each group's ``top_n`` positive scores"""
+    top_n = min(top_n, scores.shape[1])
+    if top_n == 0:
+        return {name: {} for name in names}
+    top = np.argpartition(-scores, top_n - 1, axis=1)[:, :top_n]
+    top_values = np.take_along_axis(scores, top, axis=1)
+    return {
+        name: {vocabulary[j]: float(v) for j, v in zip(cols, values) if v > 0}
+        for name, cols, values in zip(names, top, top_values)
+    }
+
+
+def compare_neighborhoods(df, top_n=100, prior_strength=None, profiler=NULL_PROFILER):
+    """Distinctive words per neighborhood for a listings DataFrame
+
+    Returns ``{'log_odds': {...}, 'tfidf': {...}, 'listings': {...}}`` keyed by
+    neighborhood, plus the matrix shape under ``'shape'``.
+    """
+    with profiler.stage('tokenize'):
+        matrix, vocabulary = build_document_term_matrix(df['description'])
+    with profiler.stage('score'):
+        indicator, names = group_indicator(df['neighborhood_key'])
+        group_counts = indicator @ matrix
+        return {
+            'log_odds': top_scores(log_odds_scores(group_counts, prior_strength),
+                                   vocabulary, names, top_n),
+            'tfidf': top_scores(tfidf_scores(matrix, indicator), vocabulary, names, top_n),
+            'listings': dict(zip(names, np.asarray(indicator.sum(axis=1)).ravel().tolist())),
+            'shape': matrix.shape,
+        }
+
+
+def generate_distinctive_clouds(results, method='log_odds', colormap='viridis',
+                                target_width=None):
+    """Save a word cloud of each neighborhood's distinctive words"""
+    filenames = []
+    for neighborhood, scores in results[method].items():
+        if not scores:
+            print(f"No distinctive words found for {neighborhood}")
+            continue
+        wordcloud = WordCloud(width=1200, height=800, background_color='white',
+                              max_words=len(scores), colormap=colormap,
+                              relative_scaling=0.5, random_state=42)
+        wordcloud.generate_from_frequencies(scores)
+
+        name = neighborhood.replace('_', ' ')
+        title = (f'Distinctive Words in {name} Rental Listings\n'
+                 f'({method.replace("_", "-")}, {results["listings"][neighborhood]} listings)')
+        filename = f'data/{neighborhood}_distinctive_{method}_wordcloud.png'
+        save_wordcloud_direct(wordcloud, filename, title, target_width=target_width)
+        filenames.append(filename)
+        print(f"Distinctive word cloud saved to {filename}")
+    return filenames
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare listing language across neighborhoods')
+    parser.add_argument('--method', choices=['log_odds', 'tfidf'], default='log_odds')
+    parser.add_argument('--top', type=int, default=100, help='words per neighborhood')
+    parser.add_argument('--no-clouds', action='store_true', help='only print the top words')
+    add_profiling_arguments(parser)
+    args = parser.parse_args()
+
+    with profiled_run(args, 'neighborhood_compare') as profiler:
+        with profiler.stage('load'):
+            df = load_all_listings()
+        if df['neighborhood_key'].nunique() < 2:
+            print("Need data from at least 2 neighborhoods for comparison")
+            return
+
+        results = compare_neighborhoods(df, top_n=args.top, profiler=profiler)
+        rows, cols = results['shape']
+        print(f"Document-term matrix: {rows:,} listings x {cols:,} words")
+
+        for neighborhood, scores in results[args.method].items():
+            top = sorted(scores.items(), key=lambda item: item[1], reverse=True)[:10]
+            print(f"\nMost distinctive words in {neighborhood.replace('_', ' ')}:")
+            for word, score in top:
+                print(f"  {word}: {score:.2f}")
+
+        if not args.no_clouds:
+            with profiler.stage('clouds'):
+                generate_distinctive_clouds(results, method=args.method)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+"""
+Configurable word normalization applied once per vocabulary type
+
+Counts for "renovated"/"renovation"/"renovations" or "floor"/"floors" are
+merged by normalizing tokens: case folding, stripping possessives, hyphen
+handling and stemming (Porter or Snowball) or WordNet lemmatization.
+
+Normalization never runs per token occurrence. Descriptions are counted by
+surface form first, then each distinct type is mapped through a memo table,
+and the counts are remapped by summing onto the normalized keys. The memo
+is persisted in data/.normalize_cache/, one file per configuration, so later
+runs only normalize types they have never seen.
+
+Stopwords also catch their own inflections: the stopwords' normalized keys
+are computed once, and a word whose key is one of them is dropped unless the
+word is its own key. "homes" goes with the real-estate stopword "home", while
+the base form "park" survives "parking" and "homestead" (a different key) is
+kept.
+Each merged group is shown under its most frequent surface form, e.g.
+"renovated" rather than the stem "renov".
+"""
+
+import hashlib
+import json
+import os
+from collections import Counter, defaultdict
+
+import nltk
+from nltk.corpus import stopwords
+from nltk.stem import PorterStemmer, SnowballStemmer, WordNetLemmatizer
+from nltk.tokenize import word_tokenize
+
+from generate_wordcloud import real_estate_stopwords
+
+CACHE_DIR = 'data/.normalize_cache'
+STEMMERS = ('porter', 'snowball', 'lemma', None)
+HYPHEN_MODES = ('keep', 'split', 'join')
+POSSESSIVE_SUFFIXES = ("'s", "’s", "'", "’")
+# Part of the memo key; bump when _normalize's rules change
+MEMO_VERSION = 2
+
+
+class Normalizer:
+    """Maps surface tokens to normalized terms, memoized per distinct token"""
+
+    def __init__(self, stemmer='snowball', casefold=True, possessives=True, hyphens='keep',
+                 min_length=3, cache_dir=CACHE_DIR):
+        if stemmer not in STEMMERS:
+            raise ValueError(f"Unknown stemmer: {stemmer}")
+        if hyphens not in HYPHEN_MODES:
+            raise ValueError(f"Unknown hyphen mode: {hyphens}")
+        self.stemmer = stemmer
+        self.casefold = casefold
+        self.possessives = possessives
+        self.hyphens = hyphens
+        self.min_length = min_length
+        self.cache_dir = cache_dir
+        self._reduce = self._make_reducer(stemmer)
+
+        self.stop_words = set(stopwords.words('english')) | real_estate_stopwords
+        self.stop_stems = frozenset(self._reduce(word) for word in self.stop_words
+                                    if word.isalpha())
+        self.memo = self._load_memo()
+        self._loaded_size = len(self.memo)
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _make_reducer(stemmer):
+        if stemmer == 'porter':
+            return PorterStemmer().stem
+        if stemmer == 'snowball':
+            return SnowballStemmer('english').stem
+        if stemmer == 'lemma':
+            try:
+                nltk.data.find('corpora/wordnet')
+            except LookupError:
+                nltk.download('wordnet')
+            lemmatizer = WordNetLemmatizer()
+            # Nouns first ("floors" -> "floor"), then verbs ("renovated" -> "renovate")
+            return lambda word: lemmatizer.lemmatize(lemmatizer.lemmatize(word, 'n'), 'v')
+        return lambda word: word
+
+    def config_key(self):
+        """Short id of the settings that change the token -> term mapping"""
+        config = json.dumps([MEMO_VERSION, self.stemmer, self.casefold, self.possessives, self.hyphens,
+                             self.min_length, sorted(self.stop_words)])
+        return hashlib.sha256(config.encode('utf-8')).hexdigest()[:16]
+
+    def _memo_filename(self):
+        return os.path.join(self.cache_dir, f'{self.config_key()}.json')
+
+    def _load_memo(self):
+        if self.cache_dir is None or not os.path.exists(self._memo_filename()):
+            return {}
+        with open(self._memo_filename()) as f:
+            return {token: tuple(tuple(pair) for pair in terms)
+                    for token, terms in json.load(f).items()}
+
+    def save(self):
+        """Persist the memo table if it learned new tokens"""
+        if self.cache_dir is None or len(self.memo) == self._loaded_size:
+            return
+        os.makedirs(self.cache_dir, exist_ok=True)
+        filename = self._memo_filename()
+        with open(filename + '.tmp', 'w') as f:
+            json.dump(self.memo, f)
+        os.replace(filename + '.tmp', filename)
+        self._loaded_size = len(self.memo)
+
+    def _keep(self, word):
+        return (word.replace('-', '').isalpha()
+                and not word.startswith('-') and not word.endswith('-')
+                and len(word) >= self.min_length
+                and word not in self.stop_words)
+
+    def _inflected_stopword(self, word, term):
+        """Whether ``word`` reduces to a stopword's key without being that key itself"""
+        return term in self.stop_stems and term != word
+
+    def _normalize(self, token):
+        word = token.casefold() if self.casefold else token
+        if self.possessives:
+            for suffix in POSSESSIVE_SUFFIXES:
+                if word.endswith(suffix) and len(word) > len(suffix):
+                    word = word[:-len(suffix)]
+                    break
+        if '-' in word and self.hyphens == 'split':
+            parts = word.split('-')
+        elif '-' in word and self.hyphens == 'join':
+            parts = [word.replace('-', '')]
+        else:
+            parts = [word]
+
+        terms = []
+        for part in parts:
+            if not self._keep(part):
+                continue
+            # Stem hyphenated words piece by piece so "built-ins" -> "built-in"
+            term = '-'.join(self._reduce(piece) for piece in part.split('-'))
+            if not self._inflected_stopword(part, term):
+                terms.append((term, part))
+        return tuple(terms)
+
+    def terms(self, token):
+        """``(term, cleaned surface word)`` pairs for one token (empty if filtered out)"""
+        terms = self.memo.get(token)
+        if terms is None:
+            self.misses += 1
+            terms = self.memo[token] = self._normalize(token)
+        else:
+            self.hits += 1
+        return terms
+
+    def normalize_counts(self, type_counts):
+        """Remap ``{surface token: count}`` onto normalized terms
+
+        Each merged group is labelled with its most frequent surface form.
+        """
+        surfaces = defaultdict(Counter)
+        for token, count in type_counts.items():
+            for term, surface in self.terms(token):
+                surfaces[term][surface] += count
+
+        return Counter({forms.most_common(1)[0][0]: sum(forms.values())
+                        for forms in surfaces.values()})
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {'types': len(self.memo), 'hits': self.hits, 'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else None}
+
+
+def count_token_types(descriptions):
+    """Counter of raw lower-cased tokens, before any filtering"""
+    type_counts = Counter()
+    for text in descriptions:
+        if isinstance(text, str):
+            type_counts.update(word_tokenize(text.lower()))
+    return type_counts
+
+
+def count_normalized_words(descriptions, normalizer=None):
+    """Word counts for descriptions with normalization applied per token type"""
+    if normalizer is None:
+        normalizer = Normalizer()
+    word_freq = normalizer.normalize_counts(count_token_types(descriptions))
+    normalizer.save()
+    return word_freq
@@ -0,0 +1,284 @@
+#!/usr/bin/env python3
+"""
+Bounded-memory top-k phrase (n-gram) counting for word clouds
+
+Exact bigram/trigram Counters grow with the corpus. Here every neighborhood
+keeps two fixed-size streaming sketches instead:
+
+- a count-min sketch (``depth`` x ``width`` counters) that can estimate the
+  count of any phrase, and
+- a space-saving summary of the ``capacity`` heaviest phrases.
+
+Error bounds, for a stream of N phrase occurrences:
+
+- Count-min: ``true <= estimate <= true + epsilon * N`` with probability at
+  least ``1 - delta``, where ``width = ceil(e / epsilon)`` and
+  ``depth = ceil(ln(1 / delta))``. The defaults (width 2**16, depth 5) give
+  epsilon ~= 4.1e-5 and delta ~= 0.7%.
+- Space-saving: ``true <= estimate <= true + N / capacity`` for every tracked
+  phrase, and every phrase occurring more than ``N / capacity`` times is
+  tracked.
+
+Reported counts are the minimum of the two (both only ever overestimate).
+Both sketches merge by addition, so chunks or worker processes can be counted
+independently and combined.
+
+Phrases are runs of 2-3 adjacent words that are neither punctuation, numbers
+nor English stopwords (hyphenated words such as "in-unit" are kept). A phrase
+made only of real-estate stopwords is dropped, but one that contains them is
+kept, so "rent stabilized" survives even though "rent" alone is filtered.
+"""
+
+import hashlib
+import heapq
+import itertools
+import math
+from collections import Counter
+
+import numpy as np
+import pandas as pd
+from nltk.corpus import stopwords
+from nltk.tokenize import word_tokenize
+
+from generate_wordcloud import real_estate_stopwords
+
+
+class CountMinSketch:
+    """Count-min sketch over strings with mergeable counters"""
+
+    def __init__(self, width=1 << 16, depth=5, seed=0):
+        self.width = width
+        self.depth = depth
+        self.seed = seed
+        self.table = np.zeros((depth, width), dtype=np.int64)
+        self.total = 0
+        self._rows = np.arange(depth, dtype=np.uint64)
+
+    @classmethod
+    def from_error(cls, epsilon=1e-4, delta=0.01, seed=0):
+        """Size a sketch for an additive error of ``epsilon * N`` w.p. ``1 - delta``"""
+        return cls(width=math.ceil(math.e / epsilon),
+                   depth=math.ceil(math.log(1 / delta)), seed=seed)
+
+    @property
+    def epsilon(self):
+        return math.e / self.width
+
+    @property
+    def delta(self):
+        return math.exp(-self.depth)
+
+    def _columns(self, item):
+        """One column per row via double hashing of a single 128-bit digest"""
+        digest = hashlib.blake2b(item.encode('utf-8'), digest_size=16,
+                                 salt=self.seed.to_bytes(16, 'little')).digest()
+        h1 = np.uint64(int.from_bytes(digest[:8], 'little'))
+        h2 = np.uint64(int.from_bytes(digest[8:], 'little') | 1)
+        with np.errstate(over='ignore'):
+            return ((h1 + self._rows * h2) % np.uint64(self.width)).astype(np.intp)
+
+    def add(self, item, count=1):
+        columns = self._columns(item)
+        self.table[np.arange(self.depth), columns] += count
+        self.total += count
+        return int(self.table[np.arange(self.depth), columns].min())
+
+    def estimate(self, item):
+        return int(self.table[np.arange(self.depth), self._columns(item)].min())
+
+    def merge(self, other):
+        """Add another sketch's counts into this one"""
+        if (self.width, self.depth, self.seed) != (other.width, other.depth, other.seed):
+            raise ValueError("Can only merge count-min sketches with the same width, depth and seed")
+        self.table += other.table
+        self.total += other.total
+        return self
+
+
+class SpaceSaving:
+    """Space-saving heavy hitters (Metwally et al.) with mergeable summaries"""
+
+    def __init__(self, capacity=500):
+        self.capacity = capacity
+        self.counts = {}
+        self.errors = {}
+        self.total = 0
+        self._heap = []
+
+    def _push(self, item):
+        heapq.heappush(self._heap, (self.counts[item], item))
+        if len(self._heap) > 4 * self.capacity:
+            self._heap = [(count, item) for item, count in self.counts.items()]
+            heapq.heapify(self._heap)
+
+    def _pop_min(self):
+        """Remove and return the tracked item with the smallest count"""
+        while True:
+            count, item = heapq.heappop(self._heap)
+            if self.counts.get(item) == count:
+                del self.counts[item]
+                return item, count, self.errors.pop(item)
+
+    def add(self, item, count=1):
+        self.total += count
+        if item in self.counts:
+            self.counts[item] += count
+        elif len(self.counts) < self.capacity:
+            self.counts[item] = count
+            self.errors[item] = 0
+        else:
+            # Replace the minimum; its count becomes the newcomer's error bound
+            _, min_count, _ = self._pop_min()
+            self.counts[item] = min_count + count
+            self.errors[item] = min_count
+        self._push(item)
+
+    def min_count(self):
+        """Upper bound on the count of any untracked item"""
+        if len(self.counts) < self.capacity:
+            return 0
+        return min(self.counts.values())
+
+    def merge(self, other):
+        """Combine two summaries (Agarwal et al., "Mergeable Summaries", 2012)"""
+        floor_self, floor_other = self.min_count(), other.min_count()
+        counts, errors = {}, {}
+        for item in set(self.counts) | set(other.counts):
+            counts[item] = (self.counts.get(item, floor_self)
+                            + other.counts.get(item, floor_other))
+            errors[item] = (self.errors.get(item, floor_self)
+                            + other.errors.get(item, floor_other))
+        keep = heapq.nlargest(self.capacity, counts, key=counts.get)
+        self.counts = {item: counts[item] for item in keep}
+        self.errors = {item: errors[item] for item in keep}
+        self.total += other.total
+        self._heap = [(count, item) for item, count in self.counts.items()]
+        heapq.heapify(self._heap)
+        return self
+
+    def top(self, k):
+        return heapq.nlargest(k, self.counts.items(), key=lambda pair: pair[1])
+
+
+class PhraseCounter:
+    """Count-min sketch plus space-saving summary for one stream of phrases"""
+
+    def __init__(self, n_values=(2, 3), capacity=500, width=1 << 16, depth=5, seed=0):
+        self.n_values = tuple(n_values)
+        self.sketch = CountMinSketch(width=width, depth=depth, seed=seed)
+        self.heavy = SpaceSaving(capacity=capacity)
+        self._stop_words = set(stopwords.words('english'))
+
+    def add_text(self, text, count=1):
+        """Count every phrase in one description ``count`` times"""
+        for phrase in extract_phrases(text, self.n_values, self._stop_words):
+            self.sketch.add(phrase, count)
+            self.heavy.add(phrase, count)
+
+    def merge(self, other):
+        self.sketch.merge(other.sketch)
+        self.heavy.merge(other.heavy)
+        return self
+
+    def error_bound(self):
+        """Worst-case overcount of a reported phrase (space-saving guarantee)"""
+        return self.heavy.total / self.heavy.capacity
+
+    def top(self, k=50, min_count=2):
+        """``{phrase: count}`` for the ``k`` heaviest phrases"""
+        result = {}
+        for phrase, count in self.heavy.top(k):
+            count = min(count, self.sketch.estimate(phrase))
+            if count >= min_count:
+                result[phrase] = count
+        return result
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state['_stop_words']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._stop_words = set(stopwords.words('english'))
+
+
+def is_phrase_word(token, stop_words):
+    """Words that may appear inside a phrase"""
+    return (token.replace('-', '').isalpha()
+            and not token.startswith('-') and not token.endswith('-')
+            and len(token) > 1
+            and token not in stop_words)
+
+
+def extract_phrases(text, n_values=(2, 3), stop_words=None):
+    """Yield the n-gram phrases of a description"""
+    if stop_words is None:
+        stop_words = set(stopwords.words('english'))
+    run = []
+    # Split 'washer/dryer' style pairs, which the tokenizer keeps as one token
+    for token in word_tokenize(text.lower().replace('/', ' / ')) + ['.']:
+        if is_phrase_word(token, stop_words):
+            run.append(token)
+            continue
+        for n in n_values:
+            for i in range(len(run) - n + 1):
+                words = run[i:i + n]
+                if not all(word in real_estate_stopwords for word in words):
+                    yield ' '.join(words)
+        run = []
+
+
+def count_phrases(descriptions, weights=None, **counter_kwargs):
+    """PhraseCounter for an iterable of descriptions
+
+    ``weights`` (one per description, e.g. from dedup) repeats each
+    description's phrases that many times, rounded to a whole count.
+    """
+    counter = PhraseCounter(**counter_kwargs)
+    if weights is None:
+        weights = itertools.repeat(1)
+    for text, weight in zip(descriptions, weights):
+        if isinstance(text, str):
+            counter.add_text(text, max(int(round(weight)), 1))
+    return counter
+
+
+def count_phrases_streaming(csv_filename, chunksize=10000, **counter_kwargs):
+    """PhraseCounter for a CSV, built chunk by chunk and merged"""
+    total = None
+    for chunk in pd.read_csv(csv_filename, usecols=['description'], chunksize=chunksize):
+        counter = count_phrases(chunk['description'], **counter_kwargs)
+        total = counter if total is None else total.merge(counter)
+    return total if total is not None else PhraseCounter(**counter_kwargs)
+
+
+def phrases_by_neighborhood(df, k=50, **counter_kwargs):
+    """Top-k phrases for each neighborhood in a multi-neighborhood DataFrame"""
+    key = 'neighborhood_key' if 'neighborhood_key' in df.columns else 'neighborhood'
+    return {neighborhood: count_phrases(group['description'], **counter_kwargs).top(k)
+            for neighborhood, group in df.groupby(key)}
+
+
+def combine_words_and_phrases(word_freq, phrase_freq, mostly=0.5):
+    """Frequencies for WordCloud.generate_from_frequencies with phrases included
+
+    Words that mostly occur inside one of the phrases (its count is at least
+    ``mostly`` of the word's) are reduced by that phrase's count so the same
+    text isn't shown twice at full weight. Only the largest phrase count per
+    word is subtracted: overlapping phrases such as "hardwood floors" and
+    "beautiful hardwood floors" count the same occurrences, so subtracting
+    both would remove them twice.
+    """
+    inside = {}
+    for phrase, count in phrase_freq.items():
+        for word in set(phrase.split()):
+            inside[word] = max(inside.get(word, 0), count)
+
+    combined = Counter(word_freq)
+    for word, count in inside.items():
+        if word in combined and count >= mostly * combined[word]:
+            combined[word] = max(combined[word] - count, 0)
+    for phrase, count in phrase_freq.items():
+        combined[phrase] += count
+    return Counter({key: value for key, value in combined.items() if value > 0})
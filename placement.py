@@ -0,0 +1,307 @@
+#!/usr/bin/env python3
+"""
+Faster word placement for WordCloud layouts
+
+WordCloud.generate_from_frequencies keeps a full-resolution integral image of
+the canvas. After every word it re-runs two cumulative sums over the part of
+the canvas below and right of the word, and every position search scans the
+whole canvas. Both cost O(canvas area) per word, so layout time grows with
+canvas size times word count.
+
+``generate_layout`` places the same words with the same rules (font sizes,
+relative scaling, orientations, margins, mask, repeat, colors) on an
+occupancy pyramid instead:
+
+- a boolean ink bitmap, plus coarser grids (8x8 and 2x2 pixel blocks by
+  default) marking blocks that contain any ink,
+- after a word is drawn, only the blocks under it are recomputed,
+- a search looks for free windows on the coarsest grid first, all at once
+  with NumPy window sums, picks one at random (with a random offset inside
+  it), and only falls back to finer grids when no coarse window is free,
+- finer grids are only searched in 128-pixel tiles where the coarser grid
+  still has room for the box, and the search stops as soon as a grid shows
+  it can't fit anywhere,
+- when a word has to shrink, the largest fitting font size is found by
+  binary search instead of trying every size from the top.
+
+The result is an ordinary ``layout_``, so recolor(), to_image(), to_svg(),
+the layout cache and svg_export work unchanged. Positions differ from the
+stock engine's (both are random), but words never overlap.
+
+Usage:
+    wordcloud = WordCloud(random_state=42, **NOTEBOOK_SETTINGS)
+    layout_words(wordcloud, word_freq, engine='grid')
+"""
+
+from operator import itemgetter
+from random import Random
+
+import numpy as np
+from PIL import Image, ImageDraw, ImageFont
+
+LAYOUT_ENGINES = ('wordcloud', 'grid')
+BLOCK_SIZES = (8, 2, 1)
+# Finer grids are searched in tiles of this many pixels (a multiple of every block size)
+TILE_SIZE = 128
+
+
+def _coarsen(bitmap, block):
+    """Grid of ``block``-sized cells that contain any set pixel
+
+    Cells hanging over the bitmap's edge count as occupied.
+    """
+    if block == 1:
+        return bitmap.copy()
+    height, width = bitmap.shape
+    rows, cols = -(-height // block), -(-width // block)
+    padded = np.ones((rows * block, cols * block), dtype=bool)
+    padded[:height, :width] = bitmap
+    return padded.reshape(rows, block, cols, block).any(axis=(1, 3))
+
+
+def integral_image(grid):
+    """Zero-padded summed-area table of a boolean grid"""
+    integral = np.zeros((grid.shape[0] + 1, grid.shape[1] + 1), dtype=np.int32)
+    np.cumsum(np.cumsum(grid, axis=0, dtype=np.int32), axis=1, out=integral[1:, 1:])
+    return integral
+
+
+def free_windows(integral, size_x, size_y):
+    """Boolean array of top-left cells where a ``size_x`` by ``size_y`` window is empty"""
+    rows, cols = integral.shape[0] - 1, integral.shape[1] - 1
+    if size_x > rows or size_y > cols:
+        return np.zeros((0, 0), dtype=bool)
+    sums = (integral[size_x:, size_y:] - integral[:-size_x, size_y:]
+            - integral[size_x:, :-size_y] + integral[:-size_x, :-size_y])
+    return sums == 0
+
+
+class OccupancyPyramid:
+    """Ink bitmap of the canvas plus coarser any-ink grids, updated locally"""
+
+    def __init__(self, height, width, mask=None, block_sizes=BLOCK_SIZES):
+        self.height = height
+        self.width = width
+        self.block_sizes = sorted(set(block_sizes) | {1}, reverse=True)
+        self.bitmap = np.zeros((height, width), dtype=bool) if mask is None else mask.copy()
+        self.grids = {block: _coarsen(self.bitmap, block) for block in self.block_sizes}
+        # Summed-area tables, computed on demand and dropped on every update
+        self._integrals = {}
+        # Searches answered per block size, for placement_stats_
+        self.hits = dict.fromkeys(self.block_sizes, 0)
+        self.misses = 0
+
+    def _free_cells(self, block, sizes, region=None):
+        """Top-left cells of the free windows of each ``(cells_x, cells_y)`` in ``sizes``
+
+        Searches the whole grid, or only the tiles marked in ``region``. In
+        tiles, the first size is searched for windows starting in the tile and
+        the others also one cell past it. Returns a ``(rows, cols)`` per size.
+        """
+        grid = self.grids[block]
+        if region is None:
+            if block not in self._integrals:
+                self._integrals[block] = integral_image(grid)
+            return [np.nonzero(free_windows(self._integrals[block], *size)) for size in sizes]
+
+        step = TILE_SIZE // block
+        extend_x = max(size[0] for size in sizes)
+        extend_y = max(size[1] for size in sizes)
+        found = [([np.empty(0, dtype=int)], [np.empty(0, dtype=int)]) for _ in sizes]
+        for tile_row, tile_col in zip(*np.nonzero(region)):
+            row, col = tile_row * step, tile_col * step
+            integral = integral_image(grid[row:row + step + extend_x, col:col + step + extend_y])
+            for i, ((rows, cols), size) in enumerate(zip(found, sizes)):
+                limit = step if i == 0 else step + 1
+                window_rows, window_cols = np.nonzero(free_windows(integral, *size)[:limit, :limit])
+                rows.append(window_rows + row)
+                cols.append(window_cols + col)
+        return [(np.concatenate(rows), np.concatenate(cols)) for rows, cols in found]
+
+    def _start_tiles(self, rows, cols, block):
+        """Tiles holding the top-left pixel of any box whose first whole cell is (row, col)"""
+        region = np.zeros((-(-self.height // TILE_SIZE), -(-self.width // TILE_SIZE)), dtype=bool)
+        tile_rows = [np.maximum(rows * block - block + 1, 0) // TILE_SIZE, rows * block // TILE_SIZE]
+        tile_cols = [np.maximum(cols * block - block + 1, 0) // TILE_SIZE, cols * block // TILE_SIZE]
+        for tile_row in tile_rows:
+            for tile_col in tile_cols:
+                region[tile_row, tile_col] = True
+        return region
+
+    def find_position(self, size_x, size_y, random_state):
+        """Random free ``(row, col)`` for a ``size_x`` by ``size_y`` box, or None"""
+        region = None
+        for block in self.block_sizes:
+            cells_x, cells_y = -(-size_x // block), -(-size_y // block)
+            # A box anywhere fully covers at least this many cells
+            inner_x, inner_y = (size_x - block + 1) // block, (size_y - block + 1) // block
+            sizes = [(cells_x, cells_y)]
+            if inner_x > 0 and inner_y > 0:
+                sizes.append((inner_x, inner_y))
+            found = self._free_cells(block, sizes, region)
+
+            rows, cols = found[0]
+            if len(rows):
+                index = random_state.randrange(len(rows))
+                # Any offset that keeps the box inside the free cells is free too
+                x = int(rows[index]) * block + random_state.randrange(cells_x * block - size_x + 1)
+                y = int(cols[index]) * block + random_state.randrange(cells_y * block - size_y + 1)
+                self.hits[block] += 1
+                return x, y
+            if len(found) > 1:
+                rows, cols = found[1]
+                if len(rows) == 0:
+                    # No finer grid can fit the box either
+                    break
+                # Finer grids only need searching where such a window could be
+                tiles = self._start_tiles(rows, cols, block)
+                region = tiles if region is None else region & tiles
+        self.misses += 1
+        return None
+
+    def update(self, ink, x, y):
+        """Mark the set pixels of ``ink`` (placed at ``(x, y)``) as occupied"""
+        x_end, y_end = x + ink.shape[0], y + ink.shape[1]
+        self.bitmap[x:x_end, y:y_end] |= ink
+        self._integrals.clear()
+        for block in self.block_sizes:
+            if block == 1:
+                self.grids[1][x:x_end, y:y_end] = self.bitmap[x:x_end, y:y_end]
+                continue
+            row, col = x // block, y // block
+            row_end, col_end = -(-x_end // block), -(-y_end // block)
+            self.grids[block][row:row_end, col:col_end] = _coarsen(
+                self.bitmap[row * block:row_end * block, col * block:col_end * block], block)
+
+
+def generate_layout(wordcloud, frequencies, max_font_size=None, block_sizes=BLOCK_SIZES):
+    """Lay out ``frequencies`` on ``wordcloud`` like generate_from_frequencies, faster
+
+    Sets ``words_`` and ``layout_`` and returns the WordCloud.
+    """
+    frequencies = sorted(frequencies.items(), key=itemgetter(1), reverse=True)
+    if not frequencies:
+        raise ValueError("We need at least 1 word to plot a word cloud, got 0.")
+    frequencies = frequencies[:wordcloud.max_words]
+    max_frequency = float(frequencies[0][1])
+    frequencies = [(word, freq / max_frequency) for word, freq in frequencies]
+
+    random_state = wordcloud.random_state if wordcloud.random_state is not None else Random()
+
+    if wordcloud.mask is not None:
+        # Same blocked-pixel rule as WordCloud (white is masked out)
+        boolean_mask = wordcloud._get_bolean_mask(wordcloud.mask)
+        height, width = wordcloud.mask.shape[:2]
+    else:
+        boolean_mask = None
+        height, width = wordcloud.height, wordcloud.width
+    occupancy = OccupancyPyramid(height, width, boolean_mask, block_sizes)
+
+    if max_font_size is None:
+        max_font_size = wordcloud.max_font_size
+    if max_font_size is None:
+        # As in WordCloud: size the first word from a trial layout of the top two
+        if len(frequencies) == 1:
+            font_size = wordcloud.height
+        else:
+            generate_layout(wordcloud, dict(frequencies[:2]), max_font_size=wordcloud.height,
+                            block_sizes=block_sizes)
+            sizes = [font_size for _, font_size, *_ in wordcloud.layout_]
+            if not sizes:
+                raise ValueError("Couldn't find space to draw. Either the Canvas size"
+                                 " is too small or too much of the image is masked out.")
+            font_size = sizes[0] if len(sizes) == 1 else int(2 * sizes[0] * sizes[1]
+                                                             / (sizes[0] + sizes[1]))
+    else:
+        font_size = max_font_size
+
+    wordcloud.words_ = dict(frequencies)
+
+    if wordcloud.repeat and len(frequencies) < wordcloud.max_words:
+        times_extend = int(np.ceil(wordcloud.max_words / len(frequencies))) - 1
+        frequencies_org = list(frequencies)
+        downweight = frequencies[-1][1]
+        for i in range(times_extend):
+            frequencies.extend([(word, freq * downweight ** (i + 1))
+                                for word, freq in frequencies_org])
+
+    img_grey = Image.new('L', (width, height))
+    draw = ImageDraw.Draw(img_grey)
+    fonts = {}
+    margin = wordcloud.margin
+
+    def transposed_font(size, orientation):
+        if size not in fonts:
+            fonts[size] = ImageFont.truetype(wordcloud.font_path, size)
+        return ImageFont.TransposedFont(fonts[size], orientation=orientation)
+
+    def place(word, size, orientation):
+        box = draw.textbbox((0, 0), word, font=transposed_font(size, orientation), anchor='lt')
+        return occupancy.find_position(box[3] + margin, box[2] + margin, random_state)
+
+    font_sizes, positions, orientations, colors = [], [], [], []
+    last_freq = 1.
+    for word, freq in frequencies:
+        if freq == 0:
+            continue
+        rs = wordcloud.relative_scaling
+        if rs != 0:
+            font_size = int(round((rs * (freq / float(last_freq)) + (1 - rs)) * font_size))
+        if random_state.random() < wordcloud.prefer_horizontal:
+            orientation = None
+        else:
+            orientation = Image.ROTATE_90
+        if font_size < wordcloud.min_font_size:
+            break
+
+        result = place(word, font_size, orientation)
+        if result is None and orientation is None and wordcloud.prefer_horizontal < 1:
+            orientation = Image.ROTATE_90
+            result = place(word, font_size, orientation)
+        if result is None:
+            # WordCloud then steps the size down horizontally until the word
+            # fits; boxes only grow with the size, so bisect for the largest
+            orientation = None
+            sizes = range(font_size - wordcloud.font_step, wordcloud.min_font_size - 1,
+                          -wordcloud.font_step)
+            low, high = 0, len(sizes)
+            while low < high:
+                middle = (low + high) // 2
+                position = place(word, sizes[middle], None)
+                if position is None:
+                    low = middle + 1
+                else:
+                    high, result = middle, position
+            if result is None:
+                break
+            font_size = sizes[high]
+
+        x, y = result[0] + margin // 2, result[1] + margin // 2
+        font = transposed_font(font_size, orientation)
+        draw.text((y, x), word, fill='white', font=font)
+        left, top, right, bottom = draw.textbbox((y, x), word, font=font)
+        slack = margin + 2
+        region = (max(left - slack, 0), max(top - slack, 0),
+                  min(right + slack, width), min(bottom + slack, height))
+        occupancy.update(np.asarray(img_grey.crop(region)) > 0, region[1], region[0])
+
+        positions.append((x, y))
+        orientations.append(orientation)
+        font_sizes.append(font_size)
+        colors.append(wordcloud.color_func(word, font_size=font_size, position=(x, y),
+                                           orientation=orientation, random_state=random_state,
+                                           font_path=wordcloud.font_path))
+        last_freq = freq
+
+    wordcloud.layout_ = list(zip(frequencies, font_sizes, positions, orientations, colors))
+    wordcloud.placement_stats_ = {'hits': occupancy.hits, 'misses': occupancy.misses}
+    return wordcloud
+
+
+def layout_words(wordcloud, frequencies, engine='wordcloud'):
+    """Lay out ``frequencies`` with the stock WordCloud engine or the grid engine"""
+    if engine == 'wordcloud':
+        return wordcloud.generate_from_frequencies(frequencies)
+    if engine == 'grid':
+        return generate_layout(wordcloud, frequencies)
+    raise ValueError(f"Unknown layout engine: {engine}")
@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+"""
+Progressive word clouds: a quick sampled preview first, the full render after
+
+``progressive_wordcloud`` reservoir-samples a few hundred descriptions in
+one streaming pass over the whole CSV, lays them out on a small canvas with
+fewer words and returns that preview immediately. The pass only reads the
+description column chunk by chunk, so memory stays bounded and only the
+sample is tokenized. The full-quality cloud (every description, notebook canvas
+settings, direct PNG save) is built on a background thread in a single pass
+over the file.
+When it finishes, a report compares the sample's top words with the full
+result, so you can tell whether the preview was representative.
+
+Usage (e.g. from making_clouds.ipynb):
+    run = progressive_wordcloud('Echo Park', scheme='greens')
+    run.preview.to_image()   # available right away
+    run.wait()               # full cloud + overlap report
+"""
+
+import argparse
+import random
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+from generate_wordcloud import (count_description_words, count_words_streaming,
+                                save_wordcloud_direct)
+from layout_cache import NOTEBOOK_SETTINGS, cached_wordcloud
+from profiling import NULL_PROFILER, add_profiling_arguments, profiled_run
+
+PREVIEW_SETTINGS = dict(NOTEBOOK_SETTINGS, width=480, height=320, max_words=40,
+                        min_font_size=8, max_font_size=80)
+
+_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='full-render')
+
+
+def reservoir_sample(items, k, seed=0):
+    """Uniform sample of ``k`` items from an iterable of unknown length (Algorithm R)
+
+    Returns ``(sample, items_seen)``.
+    """
+    rng = random.Random(seed)
+    sample = []
+    seen = 0
+    for item in items:
+        seen += 1
+        if len(sample) < k:
+            sample.append(item)
+        else:
+            j = rng.randrange(seen)
+            if j < k:
+                sample[j] = item
+    return sample, seen
+
+
+def _descriptions(csv_filename, chunksize=10000):
+    """Non-empty descriptions from the CSV, read ``chunksize`` rows at a time"""
+    with pd.read_csv(csv_filename, usecols=['description'], chunksize=chunksize) as reader:
+        for chunk in reader:
+            yield from chunk['description'].dropna().astype(str)
+
+
+def top_word_overlap(sample_freq, full_freq, ks=(10, 25, 50)):
+    """How well a sample's top words match the full counts
+
+    ``overlap@k`` is the share of the full top-k also in the sample's top-k;
+    ``rank_correlation`` is Spearman's rho over the words in both top-50s.
+    """
+    sample_rank = [word for word, _ in sample_freq.most_common(max(ks))]
+    full_rank = [word for word, _ in full_freq.most_common(max(ks))]
+    report = {f'overlap@{k}': len(set(sample_rank[:k]) & set(full_rank[:k])) / max(min(k, len(full_rank)), 1)
+              for k in ks}
+
+    shared = [word for word in full_rank if word in sample_rank]
+    if len(shared) > 1:
+        sample_position = {word: i for i, word in enumerate(w for w in sample_rank if w in shared)}
+        n = len(shared)
+        squared = sum((i - sample_position[word]) ** 2 for i, word in enumerate(shared))
+        report['rank_correlation'] = 1 - 6 * squared / (n * (n * n - 1))
+    else:
+        report['rank_correlation'] = None
+    report['missing_from_sample'] = [word for word in full_rank[:10] if word not in sample_rank[:10]]
+    return report
+
+
+def print_overlap_report(report, neighborhood):
+    """Summarize a top_word_overlap report"""
+    overlaps = ', '.join(f"{key} {value:.0%}" for key, value in report.items()
+                         if key.startswith('overlap@'))
+    print(f"Preview vs full cloud for {neighborhood}: {overlaps}")
+    if report['rank_correlation'] is not None:
+        print(f"  Rank correlation of shared top words: {report['rank_correlation']:.2f}")
+    if report['missing_from_sample']:
+        print(f"  Full top-10 words missing from the preview's top 10: "
+              f"{', '.join(report['missing_from_sample'])}")
+
+
+class ProgressiveRun:
+    """Preview cloud now, full cloud (and overlap report) when the future completes"""
+
+    def __init__(self, neighborhood, preview, sample_freq, sample_size, scanned,
+                 preview_seconds, future):
+        self.neighborhood = neighborhood
+        self.preview = preview
+        self.sample_freq = sample_freq
+        self.sample_size = sample_size
+        self.scanned = scanned
+        self.preview_seconds = preview_seconds
+        self.future = future
+
+    def done(self):
+        return self.future.done()
+
+    def wait(self, timeout=None):
+        """Block until the full render is finished; returns its result dict"""
+        return self.future.result(timeout)
+
+
+def _full_render(csv_filename, neighborhood, scheme, sample_freq, filename, target_width, done_callback,
+                 profiler):
+    try:
+        return _render_full_cloud(csv_filename, neighborhood, scheme, sample_freq, filename,
+                                  target_width, done_callback, profiler)
+    except Exception:
+        # Otherwise the error only surfaces if someone calls wait()
+        print(f"\nFull render of {neighborhood} failed:")
+        traceback.print_exc()
+        raise
+
+
+def _render_full_cloud(csv_filename, neighborhood, scheme, sample_freq, filename, target_width,
+                       done_callback, profiler):
+    start = time.perf_counter()
+    word_freq, listings = count_words_streaming(csv_filename, profiler=profiler)
+    with profiler.stage('layout'):
+        wordcloud, _ = cached_wordcloud(word_freq, colormap=scheme, **NOTEBOOK_SETTINGS)
+    title = f'Most Common Words in {neighborhood} Rental Descriptions\n(Total: {listings} listings)'
+    with profiler.stage('save'):
+        save_wordcloud_direct(wordcloud, filename, title, target_width=target_width)
+
+    report = top_word_overlap(sample_freq, word_freq)
+    result = {'wordcloud': wordcloud, 'word_freq': word_freq, 'filename': filename,
+              'report': report, 'seconds': time.perf_counter() - start}
+    print(f"\nFull cloud saved to {filename} ({result['seconds']:.1f}s)")
+    print_overlap_report(report, neighborhood)
+    if done_callback is not None:
+        done_callback(result)
+    return result
+
+
+def progressive_wordcloud(neighborhood, scheme='viridis', sample_size=300, seed=0,
+                          target_width=2400, filename=None, done_callback=None,
+                          profiler=NULL_PROFILER):
+    """Return a ProgressiveRun with a sampled preview; the full cloud renders in the background
+
+    The preview samples uniformly from every description in the CSV.
+    ``done_callback(result)`` is called from
+    the background thread once the full cloud is saved. ``profiler`` times the
+    preview as one 'preview' stage and the full render's stages after it.
+    """
+    stem = neighborhood.replace(' ', '_')
+    csv_filename = f'data/{stem}_rentals.csv'
+    if filename is None:
+        filename = f'data/{stem}_description_wordcloud_{scheme}.png'
+
+    start = time.perf_counter()
+    with profiler.stage('preview'):
+        sample, scanned = reservoir_sample(_descriptions(csv_filename), sample_size, seed)
+        sample_freq = count_description_words(sample)
+        preview, _ = cached_wordcloud(sample_freq, colormap=scheme, **PREVIEW_SETTINGS)
+    preview_seconds = time.perf_counter() - start
+    print(f"Preview of {neighborhood} from {len(sample)} of all {scanned} descriptions "
+          f"({preview_seconds:.2f}s); full render running in the background...")
+
+    future = _executor.submit(_full_render, csv_filename, neighborhood, scheme,
+                              sample_freq, filename, target_width, done_callback, profiler)
+    return ProgressiveRun(neighborhood, preview, sample_freq, len(sample), scanned,
+                          preview_seconds, future)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Quick sampled preview, then the full word cloud')
+    parser.add_argument('neighborhood')
+    parser.add_argument('--scheme', default='viridis')
+    parser.add_argument('--sample-size', type=int, default=300)
+    parser.add_argument('--preview', help='also save the preview PNG here')
+    add_profiling_arguments(parser)
+    args = parser.parse_args()
+
+    with profiled_run(args, f"preview_{args.neighborhood.replace(' ', '_')}") as profiler:
+        run = progressive_wordcloud(args.neighborhood, scheme=args.scheme, sample_size=args.sample_size,
+                                    profiler=profiler)
+        if args.preview:
+            run.preview.to_file(args.preview)
+            print(f"Preview saved to {args.preview}")
+        run.wait()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,298 @@
+#!/usr/bin/env python3
+"""
+Per-stage timing, cProfile and tracemalloc instrumentation for the pipeline
+
+Entry points take a ``profiler`` argument and wrap each stage (load,
+parse_prices, tokenize, normalize, count, layout, render, save) in
+``profiler.stage(name)``.
+The default is NULL_PROFILER, whose ``stage()`` hands back one shared no-op
+context manager, so uninstrumented runs pay nothing beyond that call.
+
+A StageProfiler always records wall-clock time per stage and can optionally
+capture cProfile statistics and tracemalloc peak/top allocations for each
+stage. ``write_reports()`` produces:
+
+- <name>.txt    human-readable summary
+- <name>.json   the same data, machine-readable
+- <name>.prof   merged cProfile stats (load with pstats or snakeviz)
+- <name>.folded collapsed stacks ("stage;caller;callee microseconds"), which
+                flamegraph.pl, speedscope and inferno read directly
+"""
+
+import contextlib
+import cProfile
+import io
+import json
+import os
+import pstats
+import time
+import tracemalloc
+from collections import OrderedDict
+from datetime import datetime
+
+PROFILE_DIR = 'data/profiles'
+
+
+class _NullProfiler:
+    """Stand-in used when profiling is disabled"""
+
+    enabled = False
+    _context = contextlib.nullcontext()
+
+    def stage(self, name):
+        return self._context
+
+
+NULL_PROFILER = _NullProfiler()
+
+
+class StageProfiler:
+    """Collect timings (and optionally cProfile/tracemalloc data) per stage"""
+
+    enabled = True
+
+    def __init__(self, name='run', profile=False, trace_memory=False, top_allocations=10):
+        self.name = name
+        self.profile = profile
+        self.trace_memory = trace_memory
+        self.top_allocations = top_allocations
+        self.stages = OrderedDict()
+        self.profiles = OrderedDict()
+        self.allocations = {}
+        self.started = datetime.now()
+
+    def _entry(self, name):
+        return self.stages.setdefault(name, {'calls': 0, 'seconds': 0.0})
+
+    @contextlib.contextmanager
+    def stage(self, name):
+        entry = self._entry(name)
+        profiler = None
+        if self.trace_memory:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+            tracemalloc.reset_peak()
+            before = tracemalloc.take_snapshot()
+            start_memory = tracemalloc.get_traced_memory()[0]
+        if self.profile:
+            profiler = cProfile.Profile()
+            profiler.enable()
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            entry['seconds'] += time.perf_counter() - start
+            entry['calls'] += 1
+            if profiler is not None:
+                profiler.disable()
+                self.profiles.setdefault(name, []).append(profiler)
+            if self.trace_memory:
+                current, peak = tracemalloc.get_traced_memory()
+                after = tracemalloc.take_snapshot()
+                entry['peak_mib'] = max(entry.get('peak_mib', 0.0),
+                                        (peak - start_memory) / 1024 / 1024)
+                entry['retained_mib'] = entry.get('retained_mib', 0.0) + (current - start_memory) / 1024 / 1024
+                entry['top_allocations'] = self._add_allocations(
+                    name, after.compare_to(before, 'lineno'))
+
+    def _add_allocations(self, name, stats):
+        """Sum allocation diffs per source line over every call of a stage"""
+        totals = self.allocations.setdefault(name, {})
+        for stat in stats:
+            location = f'{stat.traceback[0].filename}:{stat.traceback[0].lineno}'
+            total = totals.setdefault(location, {'location': location, 'size_kib': 0.0, 'count': 0})
+            total['size_kib'] += stat.size_diff / 1024
+            total['count'] += stat.count_diff
+        ranked = sorted(totals.values(), key=lambda total: abs(total['size_kib']), reverse=True)
+        return [dict(total) for total in ranked[:self.top_allocations]]
+
+    def stage_stats(self, name):
+        """Merged pstats.Stats for one stage (None without --profile)"""
+        profilers = self.profiles.get(name)
+        if not profilers:
+            return None
+        stats = pstats.Stats(profilers[0], stream=io.StringIO())
+        for profiler in profilers[1:]:
+            stats.add(profiler)
+        return stats
+
+    def summary(self):
+        """Report as a dict"""
+        total = sum(entry['seconds'] for entry in self.stages.values())
+        return {
+            'name': self.name,
+            'started': self.started.isoformat(timespec='seconds'),
+            'total_seconds': total,
+            'stages': self.stages,
+        }
+
+    def format_report(self, top_functions=15):
+        """Human-readable report"""
+        summary = self.summary()
+        lines = [f"Profile for {self.name} ({summary['started']})", '']
+        header = f"{'stage':<14}{'calls':>7}{'seconds':>10}{'share':>8}"
+        if self.trace_memory:
+            header += f"{'peak MiB':>11}{'kept MiB':>11}"
+        lines += [header, '-' * len(header)]
+        for name, entry in self.stages.items():
+            share = entry['seconds'] / summary['total_seconds'] if summary['total_seconds'] else 0
+            row = f"{name:<14}{entry['calls']:>7}{entry['seconds']:>10.3f}{share:>8.1%}"
+            if self.trace_memory:
+                row += f"{entry.get('peak_mib', 0):>11.1f}{entry.get('retained_mib', 0):>11.1f}"
+            lines.append(row)
+        lines.append(f"{'total':<14}{'':>7}{summary['total_seconds']:>10.3f}")
+
+        for name, entry in self.stages.items():
+            if entry.get('top_allocations'):
+                lines += ['', f"Top allocations in {name}:"]
+                for allocation in entry['top_allocations']:
+                    lines.append(f"  {allocation['size_kib']:>10.1f} KiB  {allocation['count']:>8}  "
+                                 f"{allocation['location']}")
+            stats = self.stage_stats(name)
+            if stats is not None:
+                stream = io.StringIO()
+                stats.stream = stream
+                stats.sort_stats('cumulative').print_stats(top_functions)
+                lines += ['', f"cProfile for {name} (top {top_functions} by cumulative time):",
+                          stream.getvalue().strip()]
+        return '\n'.join(lines)
+
+    def folded_stacks(self, min_fraction=1e-4):
+        """Collapsed stack lines ("frame;frame;frame microseconds")
+
+        cProfile only records caller/callee pairs, not full stacks, so stacks
+        are rebuilt by walking down from each stage's root functions and
+        splitting every function's time across its callees in proportion to
+        the recorded edge times. The profiler's own frames (``stage()`` and
+        the contextlib machinery around it) are left out. Branches worth less than ``min_fraction`` of
+        the stage are not expanded, which keeps the walk bounded on large
+        call graphs.
+        """
+        if not self.profiles:
+            # Timings only: one frame per stage
+            return [f"{name} {int(entry['seconds'] * 1e6)}"
+                    for name, entry in self.stages.items() if entry['seconds'] > 0]
+
+        lines = []
+        for name in self.profiles:
+            raw = self.stage_stats(name).stats
+            callees = {}
+            for function, (_, _, _, _, callers) in raw.items():
+                for caller, edge in callers.items():
+                    callees.setdefault(caller, []).append((function, edge[3]))
+            roots = [function for function, value in raw.items()
+                     if not any(caller in raw for caller in value[4])]
+            folded = {}
+            cutoff = self.stages[name]['seconds'] * min_fraction
+
+            def profiler_only(function):
+                """Profiler frames, and builtins (like the next() that resumes
+                stage()) that only lead into them"""
+                if _is_profiler_frame(function):
+                    return True
+                called = [callee for callee, _ in callees.get(function, [])]
+                return (function[0] == '~' and bool(called)
+                        and all(_is_profiler_frame(callee) for callee in called))
+
+            def walk(function, seconds, path, depth):
+                _, _, self_time, cumulative, _ = raw[function]
+                if profiler_only(function):
+                    return
+                if _is_context_frame(function):
+                    # Splice contextlib plumbing out, keeping what it calls
+                    if cumulative > 0 and seconds > 0 and depth < 64:
+                        for callee, edge_time in callees.get(function, []):
+                            walk(callee, seconds * edge_time / cumulative, path, depth + 1)
+                    return
+                path = path + (_frame_name(function),)
+                if cumulative > 0 and seconds > 0:
+                    own = seconds * min(self_time / cumulative, 1.0)
+                    folded[path] = folded.get(path, 0.0) + own
+                    if depth < 64 and seconds >= cutoff:
+                        for callee, edge_time in callees.get(function, []):
+                            if _frame_name(callee) in path:
+                                continue
+                            walk(callee, seconds * edge_time / cumulative, path, depth + 1)
+
+            for root in roots:
+                walk(root, raw[root][3], (name,), 0)
+            lines += [f"{';'.join(path)} {int(seconds * 1e6)}"
+                      for path, seconds in folded.items() if seconds * 1e6 >= 1]
+        return lines
+
+    def write_reports(self, directory=PROFILE_DIR):
+        """Write the text/JSON reports (plus .prof/.folded) and return the base path"""
+        os.makedirs(directory, exist_ok=True)
+        base = os.path.join(directory, f"{self.name}-{self.started:%Y%m%d-%H%M%S}")
+
+        with open(base + '.txt', 'w') as f:
+            f.write(self.format_report() + '\n')
+        with open(base + '.json', 'w') as f:
+            json.dump(self.summary(), f, indent=2)
+        with open(base + '.folded', 'w') as f:
+            f.write('\n'.join(self.folded_stacks()) + '\n')
+
+        if self.profiles:
+            merged = None
+            for name in self.profiles:
+                stats = self.stage_stats(name)
+                if merged is None:
+                    merged = stats
+                else:
+                    merged.add(stats)
+            merged.dump_stats(base + '.prof')
+
+        print(f"Profile report written to {base}.txt (+ .json, .folded"
+              f"{', .prof' if self.profiles else ''})")
+        return base
+
+
+def _is_profiler_frame(function):
+    """This module's own frames and the cProfile calls they make"""
+    filename, _, name = function
+    if filename == '~':
+        return '_lsprof.Profiler' in name
+    return os.path.abspath(filename) == os.path.abspath(__file__)
+
+
+def _is_context_frame(function):
+    return os.path.basename(function[0]) == 'contextlib.py'
+
+
+def _frame_name(function):
+    filename, lineno, name = function
+    if filename == '~':
+        return name.strip('<>').replace(' ', '_')
+    return f"{os.path.basename(filename)}:{name}:{lineno}"
+
+
+def add_profiling_arguments(parser):
+    """Add --profile/--trace-memory/--profile-dir to an argparse parser"""
+    parser.add_argument('--profile', action='store_true',
+                        help='time each stage and capture cProfile statistics')
+    parser.add_argument('--trace-memory', action='store_true',
+                        help='record tracemalloc peak and top allocations per stage')
+    parser.add_argument('--profile-dir', default=PROFILE_DIR,
+                        help=f'where to write profile reports (default: {PROFILE_DIR})')
+
+
+def profiler_from_args(args, name):
+    """StageProfiler if profiling was requested on the command line, else NULL_PROFILER"""
+    if not (args.profile or args.trace_memory):
+        return NULL_PROFILER
+    return StageProfiler(name=name, profile=args.profile, trace_memory=args.trace_memory)
+
+
+@contextlib.contextmanager
+def profiled_run(args, name):
+    """Profiler for a command-line run, writing its reports when the run ends
+
+    Every CLI adds the flags with add_profiling_arguments and wraps its work
+    in ``with profiled_run(args, name) as profiler:``.
+    """
+    profiler = profiler_from_args(args, name)
+    try:
+        yield profiler
+    finally:
+        if profiler.enabled:
+            profiler.write_reports(args.profile_dir)
@@ -15,6 +15,7 @@ from nltk.tokenize import word_tokenize
 from wordcloud import WordCloud
 from playwright.sync_api import sync_playwright
 from datetime import datetime
+from aggregates import update_aggregates
 
 # Download NLTK resources if needed
 try:
@@ -574,6 +575,9 @@ def save_results(listings, neighborhood):
     
     df.to_csv(csv_filename, index=False)
     print(f"Saved {len(df)} listings to {csv_filename}")
+    
+    # Aggregate this batch's word counts now, so later clouds never re-tokenize it
+    update_aggregates(neighborhood, df)
 
 def generate_word_cloud_from_descriptions(df, neighborhood):
     """Generate word cloud from descriptions"""
@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+"""
+Compact SVG export of word cloud layouts
+
+The SVGs saved from making_clouds.ipynb are matplotlib figures wrapping a
+base64 PNG, so they are bigger than the PNGs themselves. This writer draws
+the layout as vectors instead, in one of two modes:
+
+- ``'paths'``: only the glyphs that occur in the cloud are taken from the
+  font, each converted once to a path in <defs>, and every letter is a <use>
+  of its glyph (``href`` plus ``xlink:href`` for SVG 1.1 renderers) inside
+  one transformed group per word. Renders identically everywhere, with no
+  font loading.
+- ``'font'``: the font is subset to the characters used (no hinting,
+  desubroutinized) and embedded as WOFF, and each word is a <text> element,
+  so the words stay selectable and searchable. Smaller than ``'paths'``.
+
+Both place words exactly like WordCloud.to_svg, round coordinates, set each
+fill once and leave out whitespace, metadata and default attributes. Next to
+the .svg a .svg.gz (and a .svg.br when the brotli module is installed) is
+written so a static server can send it precompressed.
+
+Usage:
+    python svg_export.py "Echo Park" --scheme greens
+"""
+
+import argparse
+import base64
+import gzip
+import io
+import os
+from xml.sax import saxutils
+
+from fontTools import subset
+from fontTools.pens.svgPathPen import SVGPathPen
+from fontTools.ttLib import TTFont
+from PIL import Image, ImageColor, ImageFont
+
+from profiling import NULL_PROFILER, add_profiling_arguments, profiled_run
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+def _number(value, precision=2):
+    """Shortest decimal for a coordinate ('12', '3.5', '-0.25')"""
+    text = f'{value:.{precision}f}'
+    if '.' in text:
+        text = text.rstrip('0').rstrip('.')
+    return '0' if text == '-0' else text
+
+
+def _hex_color(color):
+    """'rgb(82, 197, 105)' or 'hsl(...)' as a short '#52c569'"""
+    try:
+        return '#{:02x}{:02x}{:02x}'.format(*ImageColor.getrgb(color)[:3])
+    except ValueError:
+        return color
+
+
+def glyph_definitions(font, characters):
+    """``({char: (glyph id, advance)}, [<path> defs])`` for the characters used
+
+    Glyph outlines stay in font units (y up); each word's transform flips and
+    scales them.
+    """
+    cmap = font.getBestCmap()
+    glyph_set = font.getGlyphSet()
+    notdef = font.getGlyphOrder()[0]
+
+    glyphs, defs, ids = {}, [], {}
+    for char in sorted(characters):
+        name = cmap.get(ord(char), notdef)
+        advance = font['hmtx'][name][0]
+        if name not in ids:
+            pen = SVGPathPen(glyph_set, ntos=lambda value: _number(value, 0))
+            glyph_set[name].draw(pen)
+            path = pen.getCommands()
+            ids[name] = f'g{len(ids)}' if path else None
+            if path:
+                defs.append(f'<path id="{ids[name]}" d="{path}"/>')
+        glyphs[char] = (ids[name], advance)
+    return glyphs, defs
+
+
+def subset_font_face(font_path, characters, family='w'):
+    """@font-face rule embedding a WOFF subset of the font with just ``characters``"""
+    options = subset.Options(hinting=False, desubroutinize=True, ignore_missing_glyphs=True,
+                             name_IDs=[], layout_features=[], notdef_outline=False)
+    options.flavor = 'woff'
+    font = subset.load_font(font_path, options)
+    subsetter = subset.Subsetter(options)
+    subsetter.populate(text=''.join(sorted(characters)))
+    subsetter.subset(font)
+    buffer = io.BytesIO()
+    subset.save_font(font, buffer, options)
+    data = base64.b64encode(buffer.getvalue()).decode('ascii')
+    return (f'@font-face{{font-family:{family};src:url(data:font/woff;base64,{data})}}'
+            f'text{{font-family:{family}}}')
+
+
+def to_compact_svg(wordcloud, mode='paths', precision=2):
+    """SVG markup for a generated WordCloud (``mode`` is 'paths' or 'font')"""
+    if mode not in ('paths', 'font'):
+        raise ValueError(f"Unknown SVG mode: {mode}")
+    scale = wordcloud.scale
+    width, height = wordcloud.width * scale, wordcloud.height * scale
+    characters = {c for (word, _), *_ in wordcloud.layout_ for c in word}
+
+    # SVG 1.1 renderers (older Safari, Inkscape, librsvg) only resolve xlink:href on <use>
+    xlink = ' xmlns:xlink="http://www.w3.org/1999/xlink"' if mode == 'paths' else ''
+    parts = [f'<svg xmlns="http://www.w3.org/2000/svg"{xlink} width="{_number(width)}" '
+             f'height="{_number(height)}" viewBox="0 0 {_number(width)} {_number(height)}">']
+    if mode == 'paths':
+        font = TTFont(wordcloud.font_path, lazy=True)
+        units_per_em = font['head'].unitsPerEm
+        glyphs, defs = glyph_definitions(font, characters)
+        parts.append(f'<defs>{"".join(defs)}</defs>')
+    else:
+        parts.append(f'<style>{subset_font_face(wordcloud.font_path, characters)}</style>')
+    if wordcloud.background_color is not None:
+        parts.append(f'<rect width="100%" height="100%" fill="{wordcloud.background_color}"/>')
+
+    for (word, _), font_size, (y, x), orientation, color in wordcloud.layout_:
+        color = _hex_color(color)
+        x *= scale
+        y *= scale
+        # Same metrics (and so the same placement) as WordCloud.to_svg
+        pil_font = ImageFont.truetype(wordcloud.font_path, int(font_size * scale))
+        (size_x, _), (offset_x, offset_y) = pil_font.font.getsize(word)
+        ascent, _ = pil_font.getmetrics()
+        min_x, max_x, max_y = -offset_x, size_x - offset_x, ascent - offset_y
+
+        if orientation == Image.ROTATE_90:
+            transform = f'translate({_number(x + max_y, precision)} {_number(y + max_x - min_x, precision)})rotate(-90)'
+        else:
+            transform = f'translate({_number(x + min_x, precision)} {_number(y + max_y, precision)})'
+
+        if mode == 'font':
+            parts.append(f'<text transform="{transform}" font-size="{int(font_size * scale)}" '
+                         f'fill="{color}">{saxutils.escape(word)}</text>')
+            continue
+
+        size = _number(int(font_size * scale) / units_per_em, 6)
+        uses, advance = [], 0
+        for char in word:
+            glyph_id, glyph_advance = glyphs[char]
+            if glyph_id is not None:
+                uses.append(f'<use href="#{glyph_id}" xlink:href="#{glyph_id}"'
+                            + (f' x="{advance}"' if advance else '') + '/>')
+            advance += glyph_advance
+        parts.append(f'<g transform="{transform}scale({size} -{size})" fill="{color}">'
+                     f'{"".join(uses)}</g>')
+
+    parts.append('</svg>')
+    return ''.join(parts)
+
+
+def write_compact_svg(wordcloud, filename, mode='paths', precompress=True):
+    """Write the compact SVG plus precompressed copies; returns ``{path: bytes}``"""
+    data = to_compact_svg(wordcloud, mode=mode).encode('utf-8')
+    with open(filename, 'wb') as f:
+        f.write(data)
+    sizes = {filename: len(data)}
+
+    if precompress:
+        # mtime=0 keeps the .gz byte-identical between runs
+        with open(filename + '.gz', 'wb') as f:
+            f.write(gzip.compress(data, compresslevel=9, mtime=0))
+        sizes[filename + '.gz'] = os.path.getsize(filename + '.gz')
+        if brotli is not None:
+            with open(filename + '.br', 'wb') as f:
+                f.write(brotli.compress(data, mode=brotli.MODE_TEXT))
+            sizes[filename + '.br'] = os.path.getsize(filename + '.br')
+    return sizes
+
+
+def export_neighborhood_svg(neighborhood, scheme='viridis', mode='paths', filename=None,
+                            layout_engine='wordcloud', profiler=NULL_PROFILER):
+    """Compact SVG cloud for one neighborhood's descriptions"""
+    # Imported here so the SVG writer itself only needs wordcloud and fontTools
+    import pandas as pd
+    from generate_wordcloud import count_description_words
+    from layout_cache import NOTEBOOK_SETTINGS, cached_wordcloud
+
+    csv_filename = f'data/{neighborhood.replace(" ", "_")}_rentals.csv'
+    if not os.path.exists(csv_filename):
+        print(f"No data file found for {neighborhood}")
+        return None
+
+    with profiler.stage('load'):
+        df = pd.read_csv(csv_filename)
+    word_freq = count_description_words(df['description'].dropna().astype(str), profiler=profiler)
+    with profiler.stage('layout'):
+        wordcloud, _ = cached_wordcloud(word_freq, colormap=scheme, layout_engine=layout_engine,
+                                        **NOTEBOOK_SETTINGS)
+    if filename is None:
+        filename = f'data/{neighborhood.replace(" ", "_")}_description_wordcloud_compact.svg'
+
+    with profiler.stage('save'):
+        sizes = write_compact_svg(wordcloud, filename, mode=mode)
+    for path, size in sizes.items():
+        print(f"  {path}: {size / 1024:.1f} KB")
+    return filename
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Export a compact vector SVG word cloud')
+    parser.add_argument('neighborhood')
+    parser.add_argument('--scheme', default='viridis', help='color scheme or matplotlib colormap')
+    parser.add_argument('--mode', choices=['paths', 'font'], default='paths',
+                        help='glyph paths with <use> (default) or an embedded font subset')
+    parser.add_argument('--output', help='SVG filename (default: data/<N>_description_wordcloud_compact.svg)')
+    add_profiling_arguments(parser)
+    args = parser.parse_args()
+    with profiled_run(args, f"svg_{args.neighborhood.replace(' ', '_')}") as profiler:
+        export_neighborhood_svg(args.neighborhood, args.scheme, args.mode, args.output,
+                                profiler=profiler)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,6 @@
+import os
+import sys
+
+# Charts render without a display; modules are imported from the repo root
+os.environ.setdefault('MPLBACKEND', 'Agg')
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
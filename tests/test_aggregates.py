@@ -0,0 +1,34 @@
+import pandas as pd
+
+from aggregates import batch_key, update_aggregates, window_frequencies
+
+
+def rentals(rows):
+    return pd.DataFrame(rows, columns=['scraped_date', 'description'])
+
+
+def test_only_new_or_changed_batches_are_aggregated(tmp_path):
+    df = rentals([('2025-08-04 10:00:00', 'Hardwood floors and parking'),
+                  ('2025-08-04 10:00:00', 'Hardwood floors throughout'),
+                  ('2025-08-11 09:30:00', 'Rooftop deck with parking')])
+
+    assert update_aggregates('Test Hood', df, root=tmp_path) == [
+        '2025-08-04T10-00-00', '2025-08-11T09-30-00']
+    assert update_aggregates('Test Hood', df, root=tmp_path) == []
+
+    df.loc[2, 'description'] = 'Rooftop deck with a gym'
+    assert update_aggregates('Test Hood', df, root=tmp_path) == ['2025-08-11T09-30-00']
+
+
+def test_window_sums_stored_batches(tmp_path):
+    df = rentals([('2025-08-04 10:00:00', 'Hardwood floors and a garage'),
+                  ('2025-08-11 09:30:00', 'Heated garage'),
+                  (None, 'Garage included')])
+    update_aggregates('Test Hood', df, root=tmp_path)
+
+    word_freq, listings = window_frequencies('Test Hood', root=tmp_path)
+    assert (word_freq['garage'], listings) == (3, 3)
+
+    word_freq, listings = window_frequencies('Test Hood', start='2025-08-10', root=tmp_path)
+    assert (word_freq['garage'], word_freq['hardwood'], listings) == (1, 0, 1)
+    assert batch_key(None) == 'unknown'
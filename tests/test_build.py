@@ -0,0 +1,56 @@
+import matplotlib.pyplot as plt
+import pandas as pd
+
+import build
+from build import Target, build_price_chart, plan
+
+
+def noop():
+    pass
+
+
+def record(target):
+    return {'signature': target.signature(),
+            'outputs': {path: build.file_sha256(path) for path in target.outputs}}
+
+
+def test_plan_rebuilds_only_what_changed(tmp_path):
+    source = tmp_path / 'Echo_Park_rentals.csv'
+    output = tmp_path / 'cloud.png'
+    source.write_text('description\nHardwood floors\n')
+    output.write_bytes(b'png')
+    cloud = Target('cloud', noop, inputs=[str(source)], settings={'scheme': 'viridis'},
+                   outputs=[str(output)])
+    assets = Target('assets', noop, inputs=[str(output)], depends=['cloud'])
+    manifest = {'targets': {'cloud': record(cloud), 'assets': record(assets)}}
+
+    assert plan([cloud, assets], {'targets': {}}) == {'cloud': ['never built'],
+                                                    'assets': ['never built']}
+    assert plan([cloud, assets], manifest) == {}
+    assert plan([cloud, assets], manifest, force=True) == {'cloud': ['forced'], 'assets': ['forced']}
+
+    source.write_text('description\nRooftop deck\n')
+    assert plan([cloud, assets], manifest) == {'cloud': [f'input:{source} changed'],
+                                               'assets': ['cloud rebuilt']}
+
+    source.write_text('description\nHardwood floors\n')
+    output.unlink()
+    assert plan([cloud, assets], manifest)['cloud'] == [f'{output} missing']
+
+    output.write_bytes(b'png')
+    cloud.settings['scheme'] = 'greens'
+    assert plan([cloud, assets], manifest)['cloud'] == ['setting:scheme changed']
+
+
+def test_chart_steps_close_their_figures(tmp_path, monkeypatch):
+    (tmp_path / 'data').mkdir()
+    pd.DataFrame({'description': ['Hardwood floors'] * 3,
+                  'price': ['$2,100/mo', '$1,800/mo', '$2,600/mo']}).to_csv(
+        tmp_path / 'data' / 'Echo_Park_rentals.csv', index=False)
+    monkeypatch.chdir(tmp_path)
+    plt.close('all')
+
+    build_price_chart('Echo_Park')
+
+    assert (tmp_path / 'data' / 'Echo_Park_price_analysis.png').exists()
+    assert plt.get_fignums() == []
@@ -0,0 +1,44 @@
+from PIL import Image
+
+from build_web_assets import build_variants, patch_index, srcset, versioned_url
+
+
+def test_variants_are_resized_and_hashed(tmp_path):
+    source = tmp_path / 'Echo_Park_description_wordcloud.png'
+    Image.new('RGB', (2000, 1000), 'white').save(source)
+
+    stem, entry = build_variants(str(source), output_dir=str(tmp_path))
+
+    assert stem == 'Echo_Park'
+    variants = entry['variants']
+    assert (variants['thumb']['width'], variants['thumb']['height']) == (480, 240)
+    assert variants['medium']['width'] == 1200
+    assert variants['full']['width'] == 2000
+    # The full-size PNG is the source itself
+    assert variants['full']['png']['path'] == str(source).replace('\\', '/')
+    assert (tmp_path / 'Echo_Park-thumb.webp').exists()
+
+    value = srcset(entry, 'webp')
+    assert value.startswith(variants['thumb']['webp']['path'] + '?v=')
+    assert value.endswith(' 1200w')
+
+
+def test_patched_cards_fall_back_to_png(tmp_path):
+    source = tmp_path / 'Watts_description_wordcloud.png'
+    Image.new('RGB', (800, 400), 'white').save(source)
+    stem, entry = build_variants(str(source), output_dir=str(tmp_path))
+    index = tmp_path / 'index.html'
+    index.write_text(
+        '<div class="wordcloud-card" data-neighborhood="Watts">\n'
+        '  <div class="wordcloud-preview" style="background-image: url(x)">\n'
+        '        // Click functionality for Beverly Hills background\n'
+        "            const imageUrl = `data/${neighborhood}_description_wordcloud.png`;\n")
+
+    patch_index({'assets': {stem: entry}}, str(index))
+    html = index.read_text()
+    patch_index({'assets': {stem: entry}}, str(index))
+
+    assert index.read_text() == html
+    assert f'data-full-png="{versioned_url(entry["variants"]["full"]["png"])}"' in html
+    assert "this.getAttribute('data-full-png')" in html
+    assert html.count('const supportsWebp') == 1
@@ -0,0 +1,152 @@
+import functools
+import json
+import threading
+import urllib.error
+import urllib.request
+from http.server import ThreadingHTTPServer
+
+import pandas as pd
+import pytest
+
+from cloud_server import (REPO_DIR, BadRequest, ByteLRUCache, CloudRequestHandler, CloudService,
+                          LRUCache, is_public_path, parse_params)
+
+
+def test_lru_cache_evicts_least_recently_used():
+    cache = LRUCache(maxsize=2)
+    cache.put('a', 1)
+    cache.put('b', 2)
+    assert cache.get('a') == 1
+    cache.put('c', 3)
+
+    assert cache.get('b') is None
+    assert (cache.get('a'), cache.get('c')) == (1, 3)
+    assert cache.stats()['hits'] == 3
+    assert cache.stats()['misses'] == 1
+
+
+def test_byte_lru_cache_stays_within_budget():
+    cache = ByteLRUCache(max_bytes=100)
+    for key in 'abc':
+        cache.put(key, {'body': b'x' * 40})
+
+    assert cache.get('a') is None
+    assert cache.total_bytes() == 80
+
+
+def test_parse_params_rejects_values_outside_the_allow_lists(tmp_path):
+    pd.DataFrame({'description': ['Hardwood floors']}).to_csv(tmp_path / 'Echo_Park_rentals.csv')
+    query = {'neighborhood': ['Echo Park']}
+
+    assert parse_params(query, tmp_path)['width'] == 800
+    for bad in ({'width': ['801']}, {'scheme': ['not_a_scheme']}, {'max_words': ['61']},
+                {'start': ['last week']}, {'neighborhood': ['../Echo_Park']}):
+        with pytest.raises(BadRequest):
+            parse_params(dict(query, **bad), tmp_path)
+
+
+def test_only_index_and_web_assets_are_public():
+    assert is_public_path('/')
+    assert is_public_path('/index.html?scheme=teals')
+    assert is_public_path('/data/web/Watts-thumb.png')
+    assert is_public_path('/data/Watts_description_wordcloud.png')
+    assert not is_public_path('/.git/config')
+    assert not is_public_path('/data/.build_manifest.json')
+    assert not is_public_path('/data/web/../Watts_rentals.csv')
+    assert not is_public_path('/data/web/%2e%2e/%2e%2e/.git/config')
+
+
+@pytest.fixture
+def server(tmp_path):
+    descriptions = ['Hardwood floors, rooftop deck and a garage',
+                    'Sunny unit with hardwood floors and a balcony'] * 3
+    pd.DataFrame({'description': descriptions}).to_csv(tmp_path / 'Echo_Park_rentals.csv')
+    service = CloudService(data_dir=str(tmp_path))
+    handler = type('Handler', (CloudRequestHandler,), {'service': service})
+    httpd = ThreadingHTTPServer(('127.0.0.1', 0), functools.partial(handler, directory=REPO_DIR))
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f'http://127.0.0.1:{httpd.server_address[1]}', service
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def status(url):
+    try:
+        with urllib.request.urlopen(url) as response:
+            return response.status, response.read()
+    except urllib.error.HTTPError as error:
+        return error.code, b''
+
+
+def test_server_routes(server, tmp_path):
+    base, service = server
+
+    code, body = status(f'{base}/api/words.json?neighborhood=Echo_Park&n=2')
+    assert code == 200
+    assert json.loads(body)['words'][0] == {'word': 'hardwood', 'count': 6}
+
+    code, body = status(f'{base}/api/cloud.png?neighborhood=Echo_Park&width=400&height=200')
+    assert code == 200 and body.startswith(b'\x89PNG')
+    assert list((tmp_path / '.layout_cache').glob('*.json'))
+
+    assert status(f'{base}/api/cloud.png?neighborhood=Echo_Park&width=401')[0] == 400
+    assert status(f'{base}/index.html')[0] == 200
+    assert status(f'{base}/.git/config')[0] == 404
+    assert status(f'{base}/cloud_server.py')[0] == 404
+
+
+def test_byte_lru_cache_keeps_a_running_total():
+    cache = ByteLRUCache(max_bytes=100)
+    cache.put('a', {'body': b'x' * 30})
+    cache.put('b', {'body': b'x' * 30})
+    cache.put('a', {'body': b'x' * 10})
+    assert cache.total_bytes() == 40
+
+    cache.put('c', {'body': b'x' * 80})
+    assert cache.total_bytes() == 90
+    assert list(cache.entries) == ['a', 'c']
+
+
+def test_misses_for_different_keys_render_in_parallel(tmp_path):
+    service = CloudService(data_dir=str(tmp_path))
+    params = {'neighborhood': 'Echo_Park', 'start': None, 'end': None}
+    pd.DataFrame({'description': ['Hardwood floors']}).to_csv(tmp_path / 'Echo_Park_rentals.csv')
+    started = threading.Event()
+    release = threading.Event()
+    calls = []
+
+    def slow(params):
+        calls.append('slow')
+        started.set()
+        release.wait(timeout=10)
+        return b'slow', 'text/plain'
+
+    def fast(params):
+        calls.append('fast')
+        return b'fast', 'text/plain'
+
+    threads = [threading.Thread(target=service.cached_response, args=('slow', params, slow))
+               for _ in range(2)]
+    for thread in threads:
+        thread.start()
+    assert started.wait(timeout=10)
+    # A different key isn't held up by the render in progress
+    assert service.cached_response('fast', params, fast)['body'] == b'fast'
+    release.set()
+    for thread in threads:
+        thread.join(timeout=10)
+    assert calls.count('slow') == 1
+    assert not service.pending
+
+
+def test_render_errors_return_500(server, monkeypatch):
+    base, service = server
+
+    def fail(params, fmt='png'):
+        raise RuntimeError('font missing')
+    monkeypatch.setattr(service, 'render_cloud', fail)
+
+    assert status(f'{base}/api/cloud.png?neighborhood=Echo_Park')[0] == 500
+    assert status(f'{base}/api/words.json?neighborhood=Echo_Park')[0] == 200
+    assert not service.pending
@@ -0,0 +1,30 @@
+from dedup import count_words_deduplicated, find_near_duplicates
+
+BUILDING = ('Milo on Morton is a collection of three apartment buildings with a rooftop '
+            'deck, fitness center, covered parking and in-unit laundry in every home')
+
+
+def test_near_duplicates_share_a_group():
+    descriptions = [BUILDING,
+                    BUILDING + ' available now',
+                    'Charming craftsman bungalow with a private yard and a detached garage '
+                    'on a quiet tree lined street near the lake']
+
+    labels = find_near_duplicates(descriptions, threshold=0.7)
+
+    assert labels[0] == labels[1]
+    assert labels[2] != labels[0]
+
+
+def test_collapse_counts_each_duplicate_group_once():
+    descriptions = [BUILDING] * 5 + ['Sunny studio with hardwood floors and a rooftop view']
+
+    word_freq, report = count_words_deduplicated(descriptions, mode='collapse')
+
+    assert report['unique'] == 2
+    assert report['duplicates'] == 4
+    assert word_freq['rooftop'] == 2
+    assert word_freq['fitness'] == 1
+
+    weighted, _ = count_words_deduplicated(descriptions, mode='sqrt')
+    assert abs(weighted['fitness'] - 5 ** 0.5) < 1e-9
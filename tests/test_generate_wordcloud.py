@@ -0,0 +1,32 @@
+from collections import Counter
+
+from wordcloud import WordCloud
+
+from generate_wordcloud import compose_wordcloud_image, extract_numeric_prices, save_wordcloud_direct
+
+WORDS = Counter({'hardwood': 40, 'floors': 30, 'parking': 20, 'laundry': 10, 'views': 5})
+
+
+def small_wordcloud():
+    return WordCloud(width=200, height=100, random_state=0).generate_from_frequencies(WORDS)
+
+
+def test_compose_renders_at_target_width_without_changing_scale():
+    wordcloud = small_wordcloud()
+    image = compose_wordcloud_image(wordcloud, 'Title\nSecond line', target_width=400)
+    assert image.width == 400
+    assert image.height > 200
+    assert wordcloud.scale == 1
+    assert wordcloud.to_image().size == (200, 100)
+
+
+def test_save_direct_writes_png(tmp_path):
+    filename = tmp_path / 'cloud.png'
+    save_wordcloud_direct(small_wordcloud(), filename, 'Title', target_width=300,
+                          compress_level=9)
+    assert filename.read_bytes()[:8] == b'\x89PNG\r\n\x1a\n'
+
+
+def test_extract_numeric_prices_uses_the_first_dollar_amount():
+    assert extract_numeric_prices(['$2,800+ 1 bd', '$2,450/mo', '$3,100+ 2 bds', 'Contact us', 1800]) == [
+        2800, 2450, 3100, 1800]
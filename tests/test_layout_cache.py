@@ -0,0 +1,42 @@
+import os
+import shutil
+from collections import Counter
+
+from wordcloud import WordCloud
+
+from layout_cache import cached_wordcloud, layout_fingerprint, prune_cache
+
+WORDS = Counter({'hardwood': 40, 'floors': 30, 'parking': 20, 'laundry': 10, 'views': 5})
+SETTINGS = dict(width=200, height=100, max_words=10)
+
+
+def test_cached_layout_matches_fresh_layout(tmp_path):
+    fresh, hit = cached_wordcloud(WORDS, cache_dir=tmp_path, **SETTINGS)
+    assert not hit
+    cached, hit = cached_wordcloud(WORDS, colormap='greens', cache_dir=tmp_path, **SETTINGS)
+    assert hit
+    assert ([entry[:4] for entry in cached.layout_]
+            == [(pair, size, tuple(position), orientation)
+                for pair, size, position, orientation, _ in fresh.layout_])
+
+
+def test_fonts_with_the_same_name_get_different_keys(tmp_path):
+    font = WordCloud().font_path
+    other = tmp_path / 'other' / os.path.basename(font)
+    other.parent.mkdir()
+    shutil.copy(font, other)
+    with open(other, 'ab') as f:
+        f.write(b'\0')
+
+    key = layout_fingerprint(WORDS, WordCloud(font_path=font, **SETTINGS), 42)
+    other_key = layout_fingerprint(WORDS, WordCloud(font_path=str(other), **SETTINGS), 42)
+    assert key != other_key
+
+
+def test_prune_removes_least_recently_used(tmp_path):
+    for i in range(5):
+        path = tmp_path / f'{i}.json'
+        path.write_text('x' * 100)
+        os.utime(path, (i, i))
+    assert prune_cache(tmp_path, max_bytes=250) == 3
+    assert sorted(os.listdir(tmp_path)) == ['3.json', '4.json']
@@ -0,0 +1,60 @@
+import sys
+
+import pandas as pd
+
+import listing_index
+from listing_index import ListingIndex, build_index, listing_attributes
+
+
+def write_rentals(data_dir):
+    data_dir.mkdir()
+    pd.DataFrame({
+        'description': ['Hardwood floors and a rooftop deck', 'Cozy studio with hardwood floors',
+                        'Garden view with a garage'],
+        'price': ['$2,100/mo', '$1,600/mo', '$3,400/mo'],
+        'beds': ['1 bd', 'Studio', '2 bds'],
+    }).to_csv(data_dir / 'Echo_Park_rentals.csv', index=False)
+    pd.DataFrame({
+        'description': ['Hardwood floors near the metro'],
+        'price': ['$1,900/mo'],
+        'beds': ['1 bd'],
+    }).to_csv(data_dir / 'Watts_rentals.csv', index=False)
+
+
+def test_select_and_frequencies(tmp_path):
+    write_rentals(tmp_path / 'data')
+    df = pd.concat([pd.read_csv(tmp_path / 'data' / 'Echo_Park_rentals.csv').assign(neighborhood_key='Echo_Park'),
+                    pd.read_csv(tmp_path / 'data' / 'Watts_rentals.csv').assign(neighborhood_key='Watts')],
+                   ignore_index=True)
+    build_index(df, directory=tmp_path / 'index')
+    index = ListingIndex(tmp_path / 'index')
+
+    assert index.select() is None
+    assert list(index.select('Echo Park')) == [0, 1, 2]
+    assert list(index.select('Echo Park', max_price=2500)) == [0, 1]
+    assert list(index.select(min_price=1800, max_price=2500)) == [0, 3]
+
+    word_freq = index.frequencies(index.select('Echo Park', max_price=2500))
+    assert word_freq.most_common(1) == [('hardwood', 2)]
+    assert index.frequencies()['hardwood'] == 3
+    assert index.frequencies(top_n=1) == {'hardwood': 3}
+
+
+def test_query_cloud_command(tmp_path, monkeypatch):
+    write_rentals(tmp_path / 'data')
+    monkeypatch.chdir(tmp_path)
+
+    monkeypatch.setattr(sys, 'argv', ['listing_index.py', 'build'])
+    listing_index.main()
+    monkeypatch.setattr(sys, 'argv', ['listing_index.py', 'query', '--neighborhood', 'Echo Park',
+                                      '--max-price', '2500', '--cloud'])
+    listing_index.main()
+
+    assert (tmp_path / 'data' / 'Echo_Park_max_price_2500_subset_wordcloud.png').exists()
+
+
+def test_attributes_use_the_first_dollar_amount():
+    attributes = listing_attributes(pd.DataFrame({'price': ['$2,800+ 1 bd', 'Studio $1,450', None]}))
+    assert attributes['price'].tolist()[:2] == [2800, 1450]
+    assert attributes['beds'].tolist()[:2] == [1, 0]
+    assert attributes['price'].isna().tolist() == [False, False, True]
@@ -0,0 +1,54 @@
+import math
+
+import pandas as pd
+import pytest
+
+from neighborhood_compare import build_document_term_matrix, compare_neighborhoods
+
+# After stopword filtering, Venice has 9 tokens (beach x3, cottage, ocean, views,
+# steps, bungalow, boardwalk) and Koreatown 10 (subway x2, karaoke x2, koreatown,
+# loft, nearby, bars, city, views)
+LISTINGS = pd.DataFrame({
+    'description': ['Beach cottage with ocean views, steps to the beach',
+                    'Beach bungalow near the boardwalk',
+                    'Koreatown loft by the subway with karaoke nearby',
+                    'Karaoke bars, subway and city views',
+                    None],
+    'neighborhood_key': ['Venice', 'Venice', 'Koreatown', 'Koreatown', 'Koreatown'],
+})
+
+
+def test_matrix_counts_each_listing_in_its_own_row():
+    matrix, vocabulary = build_document_term_matrix(['beach beach views', None, 'views'])
+    counts = {vocabulary[j]: matrix[0, j] for j in matrix[0].indices}
+    assert counts == {'beach': 2, 'views': 1}
+    assert matrix[1].nnz == 0
+    assert matrix.shape[0] == 3
+
+
+def log_odds_z(count, group_n, rest_count, rest_n, alpha, alpha0):
+    delta = (math.log((count + alpha) / (group_n + alpha0 - count - alpha))
+             - math.log((rest_count + alpha) / (rest_n + alpha0 - rest_count - alpha)))
+    return delta / math.sqrt(1 / (count + alpha) + 1 / (rest_count + alpha))
+
+
+def test_log_odds_scores_follow_the_dirichlet_prior_formula():
+    results = compare_neighborhoods(LISTINGS, top_n=20)
+    venice, koreatown = results['log_odds']['Venice'], results['log_odds']['Koreatown']
+
+    # Default prior: 19 tokens / 2 groups = 9.5 pseudo-counts, alpha_w = 9.5 * total_w / 19
+    assert venice['beach'] == pytest.approx(log_odds_z(3, 9, 0, 10, 1.5, 9.5))
+    assert venice['views'] == pytest.approx(log_odds_z(1, 9, 1, 10, 1.0, 9.5))
+    assert koreatown['subway'] == pytest.approx(log_odds_z(2, 10, 0, 9, 1.0, 9.5))
+    assert max(venice, key=venice.get) == 'beach'
+    assert venice['beach'] > venice['ocean'] > venice['views']
+    assert set(sorted(koreatown, key=koreatown.get)[-2:]) == {'subway', 'karaoke'}
+    assert not set(venice) & {'subway', 'karaoke'}
+
+
+def test_tfidf_and_listing_counts():
+    results = compare_neighborhoods(LISTINGS, top_n=3)
+    assert 'beach' in results['tfidf']['Venice']
+    assert set(results['tfidf']['Koreatown']) & {'subway', 'karaoke'}
+    assert not set(results['tfidf']['Venice']) & {'subway', 'karaoke'}
+    assert results['listings'] == {'Koreatown': 3, 'Venice': 2}
@@ -0,0 +1,39 @@
+from collections import Counter
+
+from normalize import Normalizer, count_normalized_words
+
+
+def test_inflections_merge_under_most_frequent_form(tmp_path):
+    normalizer = Normalizer(cache_dir=tmp_path)
+    word_freq = count_normalized_words(['Renovated closets', 'Newly renovated closet',
+                                        'Renovated with new closets', 'Great parking'],
+                                       normalizer)
+
+    assert word_freq['renovated'] == 3
+    assert word_freq['closets'] == 3
+    assert 'closet' not in word_freq
+    # "parking" is a real-estate stopword
+    assert 'parking' not in word_freq
+
+
+def test_inflected_stopwords_are_dropped(tmp_path):
+    normalizer = Normalizer(cache_dir=tmp_path)
+    word_freq = normalizer.normalize_counts(Counter({'homes': 2, 'beds': 3, 'homestead': 1,
+                                                     'bedrock': 1, 'park': 4}))
+
+    # "home" and "bed" are real-estate stopwords; "park" is the base form of "parking"
+    assert word_freq == Counter({'park': 4, 'homestead': 1, 'bedrock': 1})
+
+
+def test_memo_is_reused_across_runs(tmp_path):
+    type_counts = Counter({'closets': 2, 'closet': 1, "owner's": 1})
+    first = Normalizer(cache_dir=tmp_path)
+    first.normalize_counts(type_counts)
+    first.save()
+    assert first.stats()['misses'] == 3
+
+    second = Normalizer(cache_dir=tmp_path)
+    assert second.normalize_counts(type_counts) == Counter({'closets': 3, 'owner': 1})
+    assert second.stats()['misses'] == 0
+
+    assert Normalizer(stemmer='porter', cache_dir=tmp_path).config_key() != second.config_key()
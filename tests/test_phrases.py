@@ -0,0 +1,41 @@
+from collections import Counter
+
+import pandas as pd
+
+from generate_wordcloud import generate_word_cloud_from_descriptions
+from phrases import combine_words_and_phrases, count_phrases
+
+
+def test_overlapping_phrases_are_subtracted_once():
+    word_freq = Counter({'hardwood': 10, 'floors': 12, 'beautiful': 4, 'parking': 9})
+    phrase_freq = {'hardwood floors': 8, 'beautiful hardwood floors': 4, 'parking garage': 2}
+
+    combined = combine_words_and_phrases(word_freq, phrase_freq)
+
+    assert combined['hardwood'] == 2
+    assert combined['floors'] == 4
+    assert combined['beautiful'] == 0
+    # "parking" mostly appears on its own, so it keeps its full count
+    assert combined['parking'] == 9
+    assert combined['hardwood floors'] == 8
+
+
+def test_weighted_phrase_counts():
+    counter = count_phrases(['Hardwood floors throughout', 'Quiet hardwood floors'],
+                            weights=[3, 1])
+    assert counter.top(5)['hardwood floors'] == 4
+
+
+def test_phrases_respect_dedupe(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / 'data').mkdir()
+    copy = ('Milo on Morton offers hardwood floors, a rooftop deck, covered parking '
+            'and a fitness center in three apartment buildings')
+    df = pd.DataFrame({'description': [copy] * 6 + ['Sunny studio with hardwood floors']})
+
+    word_freq = generate_word_cloud_from_descriptions(df, 'Test', render='direct',
+                                                      dedupe='collapse', top_phrases=10)
+
+    assert word_freq['hardwood floors'] == 2
+    # Seen once after collapsing, below top()'s min_count, instead of six times
+    assert 'rooftop deck' not in word_freq
@@ -0,0 +1,61 @@
+import random
+from collections import Counter
+
+import numpy as np
+import pytest
+from PIL import Image, ImageDraw, ImageFont
+from wordcloud import WordCloud
+
+from placement import OccupancyPyramid, free_windows, generate_layout, integral_image, layout_words
+
+
+def test_find_position_only_returns_free_boxes():
+    rng = random.Random(3)
+    mask = np.zeros((90, 140), dtype=bool)
+    mask[30:60, 40:100] = True
+    pyramid = OccupancyPyramid(90, 140, mask=mask)
+
+    placed = 0
+    while True:
+        size_x, size_y = rng.randrange(3, 20), rng.randrange(3, 30)
+        position = pyramid.find_position(size_x, size_y, rng)
+        if position is None:
+            # Must agree with an exhaustive search of the full-resolution bitmap
+            assert not free_windows(integral_image(pyramid.bitmap), size_x, size_y).any()
+            break
+        x, y = position
+        assert 0 <= x <= 90 - size_x and 0 <= y <= 140 - size_y
+        assert not pyramid.bitmap[x:x + size_x, y:y + size_y].any()
+        pyramid.update(np.ones((size_x, size_y), dtype=bool), x, y)
+        placed += 1
+    assert placed > 10
+
+
+def ink_counts(wordcloud):
+    counts = np.zeros((wordcloud.height, wordcloud.width), dtype=np.uint8)
+    for (word, _), font_size, (x, y), orientation, _ in wordcloud.layout_:
+        image = Image.new('L', (wordcloud.width, wordcloud.height))
+        font = ImageFont.TransposedFont(ImageFont.truetype(wordcloud.font_path, font_size),
+                                        orientation=orientation)
+        ImageDraw.Draw(image).text((y, x), word, fill=255, font=font)
+        counts += np.asarray(image) > 0
+    return counts
+
+
+def test_grid_layout_has_no_overlaps():
+    words = Counter({f'word{chr(97 + i)}{chr(97 + j)}': 100 - 3 * i - j
+                     for i in range(6) for j in range(5)})
+    wordcloud = WordCloud(width=300, height=200, random_state=1, max_words=30)
+    layout_words(wordcloud, words, engine='grid')
+
+    assert len(wordcloud.layout_) > 10
+    (word, frequency), font_size, position, orientation, color = wordcloud.layout_[0]
+    assert (word, frequency) == ('wordaa', 1.0)
+    assert isinstance(font_size, int) and len(position) == 2 and color
+    assert ink_counts(wordcloud).max() == 1
+    assert wordcloud.to_image().size == (300, 200)
+
+
+def test_generate_layout_rejects_empty_frequencies():
+    with pytest.raises(ValueError):
+        generate_layout(WordCloud(width=100, height=100), {})
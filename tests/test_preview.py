@@ -0,0 +1,62 @@
+from collections import Counter
+
+import pandas as pd
+import pytest
+
+import preview
+from preview import _descriptions, progressive_wordcloud, reservoir_sample, top_word_overlap
+
+
+def test_reservoir_sample_keeps_k_items():
+    sample, seen = reservoir_sample(iter(range(1000)), 10, seed=1)
+    assert seen == 1000
+    assert len(set(sample)) == 10
+    assert reservoir_sample(range(3), 10) == ([0, 1, 2], 3)
+
+
+def test_top_word_overlap():
+    full = Counter({'hardwood': 9, 'floors': 8, 'garage': 7, 'balcony': 1})
+    sample = Counter({'floors': 5, 'hardwood': 4, 'balcony': 3})
+    report = top_word_overlap(sample, full, ks=(2, 3))
+    assert report['overlap@2'] == 1.0
+    assert report['overlap@3'] == pytest.approx(2 / 3)
+    assert report['missing_from_sample'] == ['garage']
+
+
+def write_rentals(data_dir, rows=50):
+    data_dir.mkdir()
+    descriptions = [f'Hardwood floors and a garage, unit {i}' if i % 3 else None for i in range(rows)]
+    pd.DataFrame({'description': descriptions}).to_csv(data_dir / 'Test_rentals.csv', index=False)
+    return data_dir / 'Test_rentals.csv'
+
+
+def test_preview_samples_the_whole_file(tmp_path, monkeypatch):
+    csv_filename = write_rentals(tmp_path / 'data')
+    assert len(list(_descriptions(csv_filename, chunksize=7))) == 33
+    # Rows from the last chunk get sampled too, not just the first few
+    sampled = {text for seed in range(20)
+               for text in reservoir_sample(_descriptions(csv_filename, chunksize=7), 4, seed)[0]}
+    assert 'Hardwood floors and a garage, unit 49' in sampled
+
+    monkeypatch.chdir(tmp_path)
+    run = progressive_wordcloud('Test', sample_size=4, target_width=400)
+    assert (run.sample_size, run.scanned) == (4, 33)
+    result = run.wait(timeout=60)
+    assert result['word_freq']['hardwood'] == 33
+    assert (tmp_path / 'data' / 'Test_description_wordcloud_viridis.png').exists()
+
+
+def test_full_render_errors_are_printed(tmp_path, monkeypatch, capsys):
+    write_rentals(tmp_path / 'data')
+    monkeypatch.chdir(tmp_path)
+
+    def fail(csv_filename, **kwargs):
+        raise OSError('disk full')
+    monkeypatch.setattr(preview, 'count_words_streaming', fail)
+
+    run = progressive_wordcloud('Test', sample_size=4)
+    with pytest.raises(OSError):
+        run.wait(timeout=60)
+    captured = capsys.readouterr()
+    assert 'Full render of Test failed' in captured.out
+    assert 'OSError: disk full' in captured.err
@@ -0,0 +1,52 @@
+import tracemalloc
+
+from profiling import NULL_PROFILER, StageProfiler
+
+
+def allocate_first():
+    return [bytearray(1024) for _ in range(200)]
+
+
+def allocate_second():
+    return [bytearray(2048) for _ in range(200)]
+
+
+def test_stage_timings_and_allocations_accumulate_across_calls():
+    profiler = StageProfiler(trace_memory=True)
+    kept = []
+    try:
+        with profiler.stage('tokenize'):
+            kept.append(allocate_first())
+        with profiler.stage('tokenize'):
+            kept.append(allocate_second())
+    finally:
+        tracemalloc.stop()
+
+    entry = profiler.stages['tokenize']
+    assert entry['calls'] == 2
+    assert entry['seconds'] > 0
+    locations = [allocation['location'] for allocation in entry['top_allocations']]
+    assert any(location.endswith(f':{allocate_first.__code__.co_firstlineno + 1}')
+               for location in locations)
+    assert any(location.endswith(f':{allocate_second.__code__.co_firstlineno + 1}')
+               for location in locations)
+    assert 'Top allocations in tokenize:' in profiler.format_report()
+
+
+def test_null_profiler_stage_is_a_no_op():
+    with NULL_PROFILER.stage('load'):
+        pass
+    assert not NULL_PROFILER.enabled
+
+
+def test_folded_stacks_leave_out_the_profiler_frames():
+    profiler = StageProfiler(profile=True)
+    with profiler.stage('count'):
+        allocate_first()
+
+    lines = profiler.folded_stacks()
+    assert any(line.startswith('count;test_profiling.py:allocate_first:') for line in lines)
+    for line in lines:
+        assert 'profiling.py:' not in line.replace('test_profiling.py:', '')
+        assert 'contextlib.py' not in line and '_lsprof' not in line
+        assert 'builtins.next' not in line
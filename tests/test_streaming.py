@@ -0,0 +1,18 @@
+import pandas as pd
+
+from generate_wordcloud import count_description_words, count_words_streaming
+
+
+def test_streaming_counts_match_in_memory_counts(tmp_path):
+    descriptions = ['Spacious unit with hardwood floors.', None,
+                    "Hardwood floors, parking and the building's gym.",
+                    'Parking included; pets welcome!'] * 7
+    csv_filename = tmp_path / 'Test_rentals.csv'
+    pd.DataFrame({'description': descriptions, 'price': 1}).to_csv(csv_filename, index=False)
+
+    word_freq, listings = count_words_streaming(csv_filename, chunksize=3)
+
+    assert listings == len(descriptions)
+    expected = count_description_words(pd.Series(descriptions).dropna().astype(str))
+    assert word_freq == expected
+    assert word_freq['hardwood'] == 14
@@ -0,0 +1,43 @@
+import gzip
+import xml.etree.ElementTree as ET
+from collections import Counter
+
+from wordcloud import WordCloud
+
+from svg_export import to_compact_svg, write_compact_svg
+
+SVG = '{http://www.w3.org/2000/svg}'
+XLINK_HREF = '{http://www.w3.org/1999/xlink}href'
+WORDS = Counter({'hardwood': 40, 'floors': 30, 'balcony': 20, 'closets': 10, 'views': 5})
+
+
+def small_wordcloud():
+    return WordCloud(width=200, height=100, random_state=0).generate_from_frequencies(WORDS)
+
+
+def test_paths_mode_draws_every_letter_from_shared_glyphs():
+    wordcloud = small_wordcloud()
+    root = ET.fromstring(to_compact_svg(wordcloud, mode='paths'))
+
+    words = [word for (word, _), *_ in wordcloud.layout_]
+    assert len(root.findall(f'{SVG}g')) == len(words)
+    assert len(root.findall(f'.//{SVG}use')) == sum(len(word) for word in words)
+    assert len(root.findall(f'{SVG}defs/{SVG}path')) == len(set(''.join(words)))
+    for use in root.iter(f'{SVG}use'):
+        assert use.get('href') == use.get(XLINK_HREF)
+
+
+def test_font_mode_keeps_words_as_text(tmp_path):
+    wordcloud = small_wordcloud()
+    filename = str(tmp_path / 'cloud.svg')
+    sizes = write_compact_svg(wordcloud, filename, mode='font')
+
+    with open(filename, 'rb') as f:
+        data = f.read()
+    root = ET.fromstring(data)
+    assert sorted(text.text for text in root.findall(f'{SVG}text')) == sorted(
+        word for (word, _), *_ in wordcloud.layout_)
+    assert 'font/woff' in root.find(f'{SVG}style').text
+    with open(filename + '.gz', 'rb') as f:
+        assert gzip.decompress(f.read()) == data
+    assert sizes[filename] == len(data)